@@ -0,0 +1,238 @@
+"""Compiled alias index for resolving person mentions in a query.
+
+``ArchiveRetriever._inject_entity_facts`` used to try every 4-, 3- and
+2-gram of the query against ``Identity.get_by_name`` and
+``identity_db.resolve_name`` (including ``LIKE '%x%'`` scans over all
+canonical names), then resolve each leftover token with another query —
+dozens of SQLite round-trips per question.
+
+:class:`AliasIndex` is a token trie over every canonical name and alias,
+compiled once per *identity version* (see
+``identity_db.bump_identity_version``).  Each node records:
+
+- ``exact`` — persons whose canonical name (first) or alias is exactly the
+  token run leading to the node;
+- ``within`` — persons whose canonical name *contains* that token run.
+  Every suffix of each canonical name is inserted, so a contiguous run of
+  name tokens (e.g. the Hebrew half of ``"Shiran Waintrob / שירן וינטרוב"``)
+  reaches a node; this replaces the ``LIKE '%ngram%'`` fallback at token
+  granularity.
+
+:meth:`AliasIndex.resolve` walks the trie once from each query token and
+applies the same precedence as the SQL implementation: longer n-grams
+first, exact matches before unique containment matches, and single tokens
+only by exact name.
+
+Usage::
+
+    from alias_index import get_alias_index
+    person_ids, mentions = get_alias_index().resolve(tokens)
+"""
+
+import re
+import threading
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from utils.logger import logger
+
+
+MAX_NGRAM = 4  # Longest token run matched as a full name
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize_name(name: str) -> List[str]:
+    """Split a name into lowercased word tokens (punctuation dropped)."""
+    return [t.lower() for t in _TOKEN_RE.findall(name or "")]
+
+
+class _Node:
+    """Trie node; immutable once the index is compiled."""
+
+    __slots__ = ("children", "exact", "within")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_Node"] = {}
+        self.exact: Tuple[int, ...] = ()
+        self.within: FrozenSet[int] = frozenset()
+
+
+class AliasIndex:
+    """Token trie over canonical names and aliases."""
+
+    def __init__(self, names_by_person: Dict[int, List[str]]) -> None:
+        """Compile the trie.
+
+        Args:
+            names_by_person: person_id → [canonical_name, alias, ...] as
+                returned by ``identity_db.get_all_person_names()``
+        """
+        self._root = _Node()
+        self.size = 0
+        canonical_exact: Dict[int, List[int]] = {}
+        alias_exact: Dict[int, List[int]] = {}
+        within: Dict[int, set] = {}
+
+        for pid in sorted(names_by_person):
+            names = names_by_person[pid]
+            if not names:
+                continue
+            canonical = tokenize_name(names[0])
+            if 0 < len(canonical) <= MAX_NGRAM:
+                self._add_exact(canonical, pid, canonical_exact)
+            for alias in names[1:]:
+                tokens = tokenize_name(alias)
+                if 0 < len(tokens) <= MAX_NGRAM:
+                    self._add_exact(tokens, pid, alias_exact)
+            for start in range(len(canonical)):
+                node = self._root
+                for token in canonical[start:start + MAX_NGRAM]:
+                    node = self._child(node, token)
+                    within.setdefault(id(node), set()).add(pid)
+
+        # Freeze: canonical matches rank ahead of alias matches, mirroring
+        # get_person_by_name's canonical-then-alias lookup order.
+        for node in self._walk():
+            key = id(node)
+            ordered = list(dict.fromkeys(
+                canonical_exact.get(key, []) + alias_exact.get(key, [])
+            ))
+            node.exact = tuple(ordered)
+            node.within = frozenset(within.get(key, ()))
+            self.size += 1
+
+    # =====================================================================
+    # Build helpers
+    # =====================================================================
+
+    @staticmethod
+    def _child(node: _Node, token: str) -> _Node:
+        child = node.children.get(token)
+        if child is None:
+            child = node.children[token] = _Node()
+        return child
+
+    def _add_exact(self, tokens: List[str], pid: int, table: Dict[int, List[int]]) -> None:
+        node = self._root
+        for token in tokens:
+            node = self._child(node, token)
+        table.setdefault(id(node), []).append(pid)
+
+    def _walk(self):
+        stack = list(self._root.children.values())
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.children.values())
+
+    # =====================================================================
+    # Lookup
+    # =====================================================================
+
+    def resolve(self, tokens: Sequence[str]) -> Tuple[List[int], List[Tuple[str, int]]]:
+        """Resolve every person mentioned in a tokenized query.
+
+        Multi-token runs (up to ``MAX_NGRAM``) are accepted when they match
+        a canonical name or alias exactly, or — failing that — are
+        contained in exactly one canonical name.  Runs are taken longest
+        first, then left to right; tokens used by an accepted run are
+        consumed.  Each remaining token adds every person with that exact
+        single-token name or alias.
+
+        Args:
+            tokens: Query tokens (e.g. from ``LlamaIndexRAG._tokenize_query``)
+
+        Returns:
+            Tuple of (person IDs in resolution order, list of
+            (matched n-gram, person_id) pairs for multi-token matches)
+        """
+        lowered = [t.lower() for t in tokens]
+        candidates: List[Tuple[int, int, int]] = []  # (n, start, person_id)
+        singles: Dict[int, Tuple[int, ...]] = {}
+
+        for start in range(len(lowered)):
+            node: Optional[_Node] = self._root
+            for n in range(1, min(MAX_NGRAM, len(lowered) - start) + 1):
+                node = node.children.get(lowered[start + n - 1])
+                if node is None:
+                    break
+                if n == 1:
+                    singles[start] = node.exact
+                elif node.exact:
+                    candidates.append((n, start, node.exact[0]))
+                elif len(node.within) == 1:
+                    candidates.append((n, start, next(iter(node.within))))
+
+        candidates.sort(key=lambda c: (-c[0], c[1]))
+        resolved: Dict[int, None] = {}
+        consumed: set = set()
+        mentions: List[Tuple[str, int]] = []
+        for n, start, pid in candidates:
+            span = range(start, start + n)
+            if pid in resolved or any(i in consumed for i in span):
+                continue
+            resolved[pid] = None
+            consumed.update(span)
+            mentions.append((" ".join(tokens[start:start + n]), pid))
+
+        for start, pids in singles.items():
+            if start not in consumed:
+                for pid in pids:
+                    resolved.setdefault(pid, None)
+
+        return list(resolved), mentions
+
+
+_EMPTY = AliasIndex({})
+
+_cache: Tuple[Optional[str], AliasIndex] = (None, _EMPTY)
+_build_lock = threading.Lock()
+
+
+def _build() -> Optional[AliasIndex]:
+    import identity_db
+
+    try:
+        return AliasIndex(identity_db.get_all_person_names())
+    except Exception as e:
+        logger.debug(f"Alias index build failed (non-critical): {e}")
+        return None
+
+
+def get_alias_index() -> AliasIndex:
+    """Return the alias index for the current identity version.
+
+    Returns:
+        The compiled index; empty if the identity store is empty or
+        unavailable
+    """
+    global _cache
+    import identity_db
+
+    version = identity_db.get_identity_version()
+    if version is None:
+        # No shared version counter — cannot tell whether a cached index is
+        # stale, so compile a fresh one (a single query, unlike the per-n-gram
+        # lookups it replaces).
+        return _build() or _EMPTY
+
+    cached_version, index = _cache
+    if cached_version == version:
+        return index
+
+    with _build_lock:
+        cached_version, index = _cache
+        if cached_version == version:
+            return index
+        index = _build()
+        if index is None:
+            return _EMPTY
+        _cache = (version, index)
+        logger.debug(f"Alias index v{version} compiled: {index.size} trie nodes")
+        return index
+
+
+def invalidate() -> None:
+    """Drop the in-process index (the next lookup re-checks the version)."""
+    global _cache
+    _cache = (None, _EMPTY)
@@ -11,7 +11,7 @@ os.environ['PYTHONUNBUFFERED'] = '1'
 
 print("🚀 Starting application...", flush=True)
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
@@ -227,6 +227,209 @@ def list_plugins():
 # RAG QUERY & SEARCH ENDPOINTS
 # =============================================================================
 
+def _prepare_rag_query(data: Dict[str, Any], question: str) -> Dict[str, Any]:
+    """Resolve filters, conversation state and the chat engine for a query.
+
+    Shared by ``/rag/query`` and ``/rag/query/stream``.
+
+    Args:
+        data: Request JSON body
+        question: The user's question
+
+    Returns:
+        Dict with ``conversation_id``, ``filters`` and ``chat_engine``
+    """
+    conversation_id = data.get("conversation_id") or str(uuid.uuid4())
+    k = data.get("k", 10)
+    
+    # Load persisted filters, then override with any explicit request params
+    filters = get_conversation_filters(conversation_id)
+    
+    if data.get("filter_chat_name") is not None:
+        if data["filter_chat_name"]:
+            filters["chat_name"] = data["filter_chat_name"]
+        else:
+            filters.pop("chat_name", None)
+    
+    if data.get("filter_sender") is not None:
+        if data["filter_sender"]:
+            filters["sender"] = data["filter_sender"]
+        else:
+            filters.pop("sender", None)
+    
+    if data.get("filter_days") is not None:
+        if data["filter_days"]:
+            filters["days"] = str(data["filter_days"])
+        else:
+            filters.pop("days", None)
+    
+    # New filters: sources, date range, content types, sort order
+    if data.get("filter_sources") is not None:
+        if data["filter_sources"]:
+            # Store as comma-separated string in Redis hash
+            filters["sources"] = ",".join(data["filter_sources"])
+        else:
+            filters.pop("sources", None)
+    
+    if data.get("filter_date_from") is not None:
+        if data["filter_date_from"]:
+            filters["date_from"] = data["filter_date_from"]
+        else:
+            filters.pop("date_from", None)
+    
+    if data.get("filter_date_to") is not None:
+        if data["filter_date_to"]:
+            filters["date_to"] = data["filter_date_to"]
+        else:
+            filters.pop("date_to", None)
+    
+    if data.get("filter_content_types") is not None:
+        if data["filter_content_types"]:
+            filters["content_types"] = ",".join(data["filter_content_types"])
+        else:
+            filters.pop("content_types", None)
+    
+    if data.get("sort_order") is not None:
+        if data["sort_order"] and data["sort_order"] != "relevance":
+            filters["sort_order"] = data["sort_order"]
+        else:
+            filters.pop("sort_order", None)
+    
+    set_conversation_filters(conversation_id, filters)
+    
+    # Conversation persistence
+    is_new_conversation = not conversations_db.conversation_exists(conversation_id)
+    if is_new_conversation:
+        title = conversations_db._generate_title(question)
+        conversations_db.create_conversation(
+            conversation_id=conversation_id,
+            title=title,
+            filters=filters,
+        )
+        logger.info(f"Created new conversation: {conversation_id} — '{title}'")
+    else:
+        conversations_db.update_conversation_filters(conversation_id, filters)
+    
+    # Restore Redis chat memory from SQLite if expired
+    conversations_db.restore_chat_memory_if_needed(
+        conversation_id=conversation_id,
+        chat_store=rag.chat_store,
+        max_messages=int(settings.session_max_history) * 2,
+    )
+    
+    # Parse list filters from comma-separated strings
+    sources_list = [s.strip() for s in filters["sources"].split(",")] if filters.get("sources") else None
+    content_types_list = [c.strip() for c in filters["content_types"].split(",")] if filters.get("content_types") else None
+    
+    # Create chat engine with filters and conversation memory
+    chat_engine = rag.create_chat_engine(
+        conversation_id=conversation_id,
+        filter_chat_name=filters.get("chat_name"),
+        filter_sender=filters.get("sender"),
+        filter_days=int(filters["days"]) if filters.get("days") else None,
+        filter_sources=sources_list,
+        filter_date_from=filters.get("date_from"),
+        filter_date_to=filters.get("date_to"),
+        filter_content_types=content_types_list,
+        sort_order=filters.get("sort_order", "relevance"),
+        k=k,
+        query=question,
+    )
+    
+    return {
+        "conversation_id": conversation_id,
+        "filters": filters,
+        "chat_engine": chat_engine,
+    }
+
+
+def _finalize_rag_answer(
+    question: str,
+    conversation_id: str,
+    raw_answer: str,
+    source_nodes: list,
+) -> tuple:
+    """Post-process an answer, persist the exchange and learn from it.
+
+    Shared by ``/rag/query`` and ``/rag/query/stream``.
+
+    Args:
+        question: The user's question
+        conversation_id: Conversation the exchange belongs to
+        raw_answer: The LLM answer text
+        source_nodes: All retrieved source nodes
+
+    Returns:
+        Tuple of (answer, rich_content, sources)
+    """
+    # Post-process for rich content (images, ICS events, buttons)
+    # NOTE: rich_processor.process() needs ALL source_nodes to find images
+    answer, rich_content = rich_processor.process(
+        answer=raw_answer,
+        source_nodes=source_nodes,
+    )
+    
+    # Filter sources for user-visible display (removes context-only noise)
+    # Read configurable settings with sensible defaults
+    _filter_enabled = settings.get("source_display_filter_enabled", "true").lower() == "true"
+    if _filter_enabled:
+        _min_score = float(settings.get("source_display_min_score", "0.5"))
+        _max_count = int(settings.get("source_display_max_count", "8"))
+        _answer_filter = settings.get("source_display_answer_filter", "true").lower() == "true"
+        display_nodes = rich_processor.filter_sources_for_display(
+            source_nodes=source_nodes,
+            answer=answer,
+            min_score=_min_score,
+            max_count=_max_count,
+            answer_filter=_answer_filter,
+        )
+    else:
+        display_nodes = source_nodes
+    
+    sources = []
+    for node_with_score in display_nodes:
+        node = node_with_score.node
+        metadata = getattr(node, 'metadata', {})
+        if metadata.get("source") == "system":
+            continue
+        sources.append({
+            "content": getattr(node, 'text', '')[:300],
+            "score": node_with_score.score,
+            "sender": metadata.get("sender", ""),
+            "chat_name": metadata.get("chat_name", ""),
+            "timestamp": metadata.get("timestamp"),
+        })
+
+    # Persist messages to SQLite (include sources + rich_content JSON)
+    conversations_db.add_message(conversation_id, "user", question)
+    conversations_db.add_message(
+        conversation_id, "assistant", answer,
+        sources=json.dumps(sources) if sources else "",
+        rich_content=json.dumps(rich_content) if rich_content else "",
+    )
+
+    # Entity extraction from user chat messages — learn from corrections
+    # and facts the user provides in conversation (e.g., "David has a son
+    # named Ben"). Non-blocking: failures never affect the chat response.
+    try:
+        from identity_extractor import get_extractor, ExtractionSource
+        get_extractor().submit(
+            content=question,
+            source=ExtractionSource.CHAT_CORRECTION,
+            source_ref=f"chat_correction:{conversation_id}" if conversation_id else "",
+            llm_context=answer,
+        )
+    except Exception as e:
+        logger.debug(f"Chat entity extraction failed (non-critical): {e}")
+
+    return answer, rich_content, sources
+
+
+def _sse(event: str, payload: Dict[str, Any]) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
 @app.route("/rag/query", methods=["POST"])
 @limiter.limit("20/minute")
 def rag_query():
@@ -238,106 +441,13 @@ def rag_query():
         if not question:
             return jsonify({"error": "Missing 'question' in request body"}), 400
 
-        conversation_id = data.get("conversation_id") or str(uuid.uuid4())
-        k = data.get("k", 10)
-        
-        # Load persisted filters, then override with any explicit request params
-        filters = get_conversation_filters(conversation_id)
-        
-        if data.get("filter_chat_name") is not None:
-            if data["filter_chat_name"]:
-                filters["chat_name"] = data["filter_chat_name"]
-            else:
-                filters.pop("chat_name", None)
-        
-        if data.get("filter_sender") is not None:
-            if data["filter_sender"]:
-                filters["sender"] = data["filter_sender"]
-            else:
-                filters.pop("sender", None)
-        
-        if data.get("filter_days") is not None:
-            if data["filter_days"]:
-                filters["days"] = str(data["filter_days"])
-            else:
-                filters.pop("days", None)
-        
-        # New filters: sources, date range, content types, sort order
-        if data.get("filter_sources") is not None:
-            if data["filter_sources"]:
-                # Store as comma-separated string in Redis hash
-                filters["sources"] = ",".join(data["filter_sources"])
-            else:
-                filters.pop("sources", None)
-        
-        if data.get("filter_date_from") is not None:
-            if data["filter_date_from"]:
-                filters["date_from"] = data["filter_date_from"]
-            else:
-                filters.pop("date_from", None)
-        
-        if data.get("filter_date_to") is not None:
-            if data["filter_date_to"]:
-                filters["date_to"] = data["filter_date_to"]
-            else:
-                filters.pop("date_to", None)
-        
-        if data.get("filter_content_types") is not None:
-            if data["filter_content_types"]:
-                filters["content_types"] = ",".join(data["filter_content_types"])
-            else:
-                filters.pop("content_types", None)
-        
-        if data.get("sort_order") is not None:
-            if data["sort_order"] and data["sort_order"] != "relevance":
-                filters["sort_order"] = data["sort_order"]
-            else:
-                filters.pop("sort_order", None)
-        
-        set_conversation_filters(conversation_id, filters)
-        
-        # Conversation persistence
-        is_new_conversation = not conversations_db.conversation_exists(conversation_id)
-        if is_new_conversation:
-            title = conversations_db._generate_title(question)
-            conversations_db.create_conversation(
-                conversation_id=conversation_id,
-                title=title,
-                filters=filters,
-            )
-            logger.info(f"Created new conversation: {conversation_id} — '{title}'")
-        else:
-            conversations_db.update_conversation_filters(conversation_id, filters)
-        
-        # Restore Redis chat memory from SQLite if expired
-        conversations_db.restore_chat_memory_if_needed(
-            conversation_id=conversation_id,
-            chat_store=rag.chat_store,
-            max_messages=int(settings.session_max_history) * 2,
-        )
-        
-        # Parse list filters from comma-separated strings
-        sources_list = [s.strip() for s in filters["sources"].split(",")] if filters.get("sources") else None
-        content_types_list = [c.strip() for c in filters["content_types"].split(",")] if filters.get("content_types") else None
-        
-        # Create chat engine with filters and conversation memory
-        chat_engine = rag.create_chat_engine(
-            conversation_id=conversation_id,
-            filter_chat_name=filters.get("chat_name"),
-            filter_sender=filters.get("sender"),
-            filter_days=int(filters["days"]) if filters.get("days") else None,
-            filter_sources=sources_list,
-            filter_date_from=filters.get("date_from"),
-            filter_date_to=filters.get("date_to"),
-            filter_content_types=content_types_list,
-            sort_order=filters.get("sort_order", "relevance"),
-            k=k,
-        )
+        ctx = _prepare_rag_query(data, question)
+        conversation_id = ctx["conversation_id"]
         
         # Snapshot cost meter before query to compute per-query cost
         cost_snapshot = METER.snapshot()
         
-        response = chat_engine.chat(question)
+        response = ctx["chat_engine"].chat(question)
         raw_answer = str(response)
         
         # Compute per-query cost
@@ -348,65 +458,9 @@ def rag_query():
         if hasattr(response, 'source_nodes') and response.source_nodes:
             source_nodes = response.source_nodes
         
-        # Post-process for rich content (images, ICS events, buttons)
-        # NOTE: rich_processor.process() needs ALL source_nodes to find images
-        answer, rich_content = rich_processor.process(
-            answer=raw_answer,
-            source_nodes=source_nodes,
+        answer, rich_content, sources = _finalize_rag_answer(
+            question, conversation_id, raw_answer, source_nodes,
         )
-        
-        # Filter sources for user-visible display (removes context-only noise)
-        # Read configurable settings with sensible defaults
-        _filter_enabled = settings.get("source_display_filter_enabled", "true").lower() == "true"
-        if _filter_enabled:
-            _min_score = float(settings.get("source_display_min_score", "0.5"))
-            _max_count = int(settings.get("source_display_max_count", "8"))
-            _answer_filter = settings.get("source_display_answer_filter", "true").lower() == "true"
-            display_nodes = rich_processor.filter_sources_for_display(
-                source_nodes=source_nodes,
-                answer=answer,
-                min_score=_min_score,
-                max_count=_max_count,
-                answer_filter=_answer_filter,
-            )
-        else:
-            display_nodes = source_nodes
-        
-        sources = []
-        for node_with_score in display_nodes:
-            node = node_with_score.node
-            metadata = getattr(node, 'metadata', {})
-            if metadata.get("source") == "system":
-                continue
-            sources.append({
-                "content": getattr(node, 'text', '')[:300],
-                "score": node_with_score.score,
-                "sender": metadata.get("sender", ""),
-                "chat_name": metadata.get("chat_name", ""),
-                "timestamp": metadata.get("timestamp"),
-            })
-
-        # Persist messages to SQLite (include sources + rich_content JSON)
-        conversations_db.add_message(conversation_id, "user", question)
-        conversations_db.add_message(
-            conversation_id, "assistant", answer,
-            sources=json.dumps(sources) if sources else "",
-            rich_content=json.dumps(rich_content) if rich_content else "",
-        )
-
-        # Entity extraction from user chat messages — learn from corrections
-        # and facts the user provides in conversation (e.g., "David has a son
-        # named Ben"). Non-blocking: failures never affect the chat response.
-        try:
-            from identity_extractor import get_extractor, ExtractionSource
-            get_extractor().submit(
-                content=question,
-                source=ExtractionSource.CHAT_CORRECTION,
-                source_ref=f"chat_correction:{conversation_id}" if conversation_id else "",
-                llm_context=answer,
-            )
-        except Exception as e:
-            logger.debug(f"Chat entity extraction failed (non-critical): {e}")
 
         stats = rag.get_stats()
 
@@ -414,7 +468,7 @@ def rag_query():
             "answer": answer,
             "question": question,
             "conversation_id": conversation_id,
-            "filters": filters,
+            "filters": ctx["filters"],
             "sources": sources,
             "rich_content": rich_content,
             "stats": stats,
@@ -430,6 +484,91 @@ def rag_query():
         return jsonify({"error": str(e), "traceback": trace}), 500
 
 
+@app.route("/rag/query/stream", methods=["POST"])
+@limiter.limit("20/minute")
+def rag_query_stream():
+    """Streaming variant of ``/rag/query`` using Server-Sent Events.
+
+    Answer tokens are sent as they arrive from the LLM so the UI can render
+    the first words immediately instead of waiting for the full answer.
+
+    Events:
+        meta  — ``{conversation_id, filters}``, sent before retrieval starts
+        token — ``{delta}``, one per streamed LLM chunk
+        done  — final payload: ``{answer, question, conversation_id, filters,
+                sources, rich_content, cost}`` (same shape as ``/rag/query``
+                minus ``stats``)
+        error — ``{error}``
+    """
+    data = request.json or {}
+    question = data.get("question")
+
+    if not question:
+        return jsonify({"error": "Missing 'question' in request body"}), 400
+
+    try:
+        ctx = _prepare_rag_query(data, question)
+    except Exception as e:
+        trace = traceback.format_exc()
+        logger.error(f"RAG stream query error: {e}\n{trace}")
+        return jsonify({"error": str(e), "traceback": trace}), 500
+
+    conversation_id = ctx["conversation_id"]
+    filters = ctx["filters"]
+
+    def generate():
+        yield _sse("meta", {"conversation_id": conversation_id, "filters": filters})
+        try:
+            started = time.monotonic()
+            cost_snapshot = METER.snapshot()
+
+            response = ctx["chat_engine"].stream_chat(question)
+            parts = []
+            for delta in response.response_gen:
+                if not delta:
+                    continue
+                if not parts:
+                    logger.info(
+                        f"RAG stream first token after {(time.monotonic() - started) * 1000:.0f}ms"
+                    )
+                parts.append(delta)
+                yield _sse("token", {"delta": delta})
+
+            raw_answer = "".join(parts)
+            query_cost = METER.session_total - cost_snapshot
+            source_nodes = list(getattr(response, "source_nodes", None) or [])
+
+            answer, rich_content, sources = _finalize_rag_answer(
+                question, conversation_id, raw_answer, source_nodes,
+            )
+
+            yield _sse("done", {
+                "answer": answer,
+                "question": question,
+                "conversation_id": conversation_id,
+                "filters": filters,
+                "sources": sources,
+                "rich_content": rich_content,
+                "cost": {
+                    "query_cost_usd": round(query_cost, 6),
+                    "session_total_usd": round(METER.session_total, 6),
+                },
+            })
+        except Exception as e:
+            trace = traceback.format_exc()
+            logger.error(f"RAG stream query error: {e}\n{trace}")
+            yield _sse("error", {"error": str(e)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # disable proxy buffering
+        },
+    )
+
+
 @app.route("/rag/search", methods=["POST"])
 @limiter.limit("30/minute")
 def rag_search():
@@ -481,6 +620,17 @@ def rag_stats():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/rag/ingest-metrics", methods=["GET"])
+def rag_ingest_metrics():
+    """Get ingestion metrics (batcher queue depth/batch size/flush latency, dedup counters)."""
+    try:
+        return jsonify(rag.get_ingest_metrics()), 200
+    except Exception as e:
+        trace = traceback.format_exc()
+        logger.error(f"RAG ingest metrics error: {e}\n{trace}")
+        return jsonify({"error": str(e), "traceback": trace}), 500
+
+
 @app.route("/rag/chats", methods=["GET"])
 def rag_chats():
     """Get all unique chat names from the RAG vector store."""
@@ -617,8 +767,8 @@ def rag_delete_by_source():
             return jsonify({"error": "Missing 'source' in request body"}), 400
         
         if not data.get("confirm", False):
-            # Dry run: show how many would be deleted
-            stats = rag.get_stats()
+            # Dry run: show how many would be deleted (exact, not cached)
+            stats = rag.get_stats(exact=True)
             source_counts = stats.get("source_counts", {})
             count = source_counts.get(source_value, 0)
             return jsonify({
@@ -1408,18 +1558,31 @@ def merge_identities():
         
         # Post-merge: update person_ids in Qdrant payloads so that
         # points referencing the now-deleted source persons get re-pointed
-        # to the surviving target person.
+        # to the surviving target person.  Heavily linked identities touch
+        # thousands of points, so the remap runs as a resumable Celery task
+        # (progress: GET /identities/merge/remap/<celery_task_id>).
+        merged_source_ids = [int(s) for s in source_ids]
         try:
-            from llamaindex_rag import get_rag
-            rag = get_rag()
-            if rag:
-                qdrant_result = rag.update_person_ids_after_merge(
-                    target_id=int(target_id),
-                    source_ids=[int(s) for s in source_ids],
-                )
-                result["qdrant_update"] = qdrant_result
+            from tasks.rag import remap_person_ids_after_merge
+            async_result = remap_person_ids_after_merge.delay(
+                int(target_id), merged_source_ids,
+            )
+            result["qdrant_update"] = {
+                "status": "queued",
+                "celery_task_id": async_result.id,
+            }
         except Exception as e:
-            logger.debug(f"Post-merge Qdrant update failed (non-critical): {e}")
+            logger.warning(f"Post-merge remap dispatch failed, running inline: {e}")
+            try:
+                from llamaindex_rag import get_rag
+                rag = get_rag()
+                if rag:
+                    result["qdrant_update"] = rag.update_person_ids_after_merge(
+                        target_id=int(target_id),
+                        source_ids=merged_source_ids,
+                    )
+            except Exception as e:
+                logger.debug(f"Post-merge Qdrant update failed (non-critical): {e}")
         
         # Clear person_resolver caches (merged persons have new IDs)
         try:
@@ -1436,6 +1599,30 @@ def merge_identities():
         return jsonify({"error": str(e), "traceback": trace}), 500
 
 
+@app.route("/identities/merge/remap/<celery_task_id>", methods=["GET"])
+def merge_remap_status(celery_task_id: str):
+    """Report progress of a post-merge Qdrant person_ids remap task.
+    
+    Returns the Celery state (PENDING, PROGRESS, RETRY, SUCCESS, FAILURE)
+    plus the latest progress counters.
+    """
+    try:
+        from tasks.rag import remap_person_ids_after_merge
+        async_result = remap_person_ids_after_merge.AsyncResult(celery_task_id)
+        info = async_result.info
+        if isinstance(info, Exception):
+            info = {"error": str(info)}
+        return jsonify({
+            "celery_task_id": celery_task_id,
+            "state": async_result.state,
+            **(info if isinstance(info, dict) else {}),
+        }), 200
+    except Exception as e:
+        trace = traceback.format_exc()
+        logger.error(f"Merge remap status error: {e}\n{trace}")
+        return jsonify({"error": str(e), "traceback": trace}), 500
+
+
 @app.route("/identities/merge-candidates", methods=["GET"])
 def merge_candidates():
     """Find potential duplicate persons that could be merged.
@@ -1782,6 +1969,18 @@ def get_insight_templates():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/scheduled-tasks/scheduler", methods=["GET"])
+def get_insight_scheduler_stats():
+    """Get the scheduler due-queue state and dispatch skew metrics."""
+    try:
+        import schedule_queue
+        return jsonify(schedule_queue.get_stats()), 200
+    except Exception as e:
+        trace = traceback.format_exc()
+        logger.error(f"Scheduler stats error: {e}\n{trace}")
+        return jsonify({"error": str(e), "traceback": trace}), 500
+
+
 @app.route("/scheduled-tasks/<int:task_id>", methods=["GET"])
 def get_scheduled_task(task_id: int):
     """Get a single scheduled task with its latest result."""
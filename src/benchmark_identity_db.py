@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Benchmark per-query overhead of identity_db connection handling.
+
+Compares the old connection-per-call strategy (open + WAL/foreign_keys
+pragmas + close around every function) with the thread-local pooled
+connection, on the lookups a single RAG query performs: ``get_person_by_name``
+and ``resolve_name`` per n-gram, plus relationship expansion.
+
+Runs against a throwaway database seeded with synthetic persons, so it
+never touches real data.
+
+Usage:
+    # From the src/ directory (so imports resolve):
+    cd src && python benchmark_identity_db.py
+
+    # Bigger store / more iterations:
+    cd src && python benchmark_identity_db.py --persons 5000 --iterations 2000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+# Ensure src/ is on the import path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Point settings_db / identity_db at a throwaway database BEFORE importing them
+_TMP_DIR = tempfile.mkdtemp(prefix="identity-bench-")
+os.environ["SETTINGS_DB_PATH"] = os.path.join(_TMP_DIR, "settings.db")
+
+import identity_db  # noqa: E402
+
+
+_FIRST = ["David", "Shiran", "Doron", "Noa", "Yael", "Omer", "Tamar", "Avi", "Maya", "Ben"]
+_LAST = ["Cohen", "Levi", "Mizrahi", "Peretz", "Biton", "Friedman", "Waintrob", "Katz"]
+
+
+def _seed(persons: int) -> List[int]:
+    """Insert synthetic persons, aliases and relationships in one transaction."""
+    conn = identity_db._get_connection()
+    try:
+        ids = []
+        for i in range(persons):
+            name = f"{random.choice(_FIRST)} {random.choice(_LAST)} {i}"
+            cur = conn.execute("INSERT INTO persons (canonical_name) VALUES (?)", (name,))
+            pid = cur.lastrowid
+            ids.append(pid)
+            for alias in (name, name.split()[0], f"{name.split()[0]}_{i}"):
+                conn.execute(
+                    "INSERT OR IGNORE INTO person_aliases (person_id, alias, script, source) "
+                    "VALUES (?, ?, 'latin', 'bench')",
+                    (pid, alias),
+                )
+        for pid in ids:
+            for other in random.sample(ids, min(3, len(ids))):
+                if other != pid:
+                    conn.execute(
+                        "INSERT OR IGNORE INTO person_relationships "
+                        "(person_id, related_person_id, relationship_type) VALUES (?, ?, 'friend')",
+                        (pid, other),
+                    )
+        conn.commit()
+        return ids
+    finally:
+        identity_db._release_connection(conn)
+
+
+def _legacy_get_connection() -> sqlite3.Connection:
+    """The pre-pooling strategy: a brand-new connection per function call."""
+    conn = sqlite3.connect(identity_db.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+def _query_workload(ids: List[int]) -> Callable[[], None]:
+    """One RAG query's worth of identity lookups (n-grams + expansion)."""
+    ngrams = ["what", "did", "David", "Cohen", "say", "to", "Shiran", "about", "Noa"]
+    seeds = random.sample(ids, min(3, len(ids)))
+
+    def run() -> None:
+        for gram in ngrams:
+            identity_db.get_person_by_name(gram)
+            identity_db.resolve_name(gram)
+        identity_db.expand_person_ids_with_relationships(seeds, max_depth=1)
+
+    return run
+
+
+def _measure(fn: Callable[[], None], iterations: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[int(len(samples) * 0.95) - 1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--persons", type=int, default=2000, help="Synthetic persons to seed")
+    parser.add_argument("--iterations", type=int, default=500, help="Workload repetitions")
+    args = parser.parse_args()
+
+    random.seed(42)
+    ids = _seed(args.persons)
+    workload = _query_workload(ids)
+    calls = 2 * 9 + 1  # lookups per workload run (see _query_workload)
+    workload()  # warm up page cache for both runs
+
+    pooled_get, pooled_release = identity_db._get_connection, identity_db._release_connection
+    identity_db._get_connection = _legacy_get_connection
+    identity_db._release_connection = lambda conn: conn.close()
+    try:
+        before = _measure(workload, args.iterations)
+    finally:
+        identity_db._get_connection = pooled_get
+        identity_db._release_connection = pooled_release
+    after = _measure(workload, args.iterations)
+
+    print(f"identity_db benchmark: {args.persons} persons, {args.iterations} iterations, "
+          f"{calls} identity_db calls per query")
+    print(f"{'':24}{'mean':>10}{'p50':>10}{'p95':>10}{'per call':>12}")
+    for label, res in (("connection-per-call", before), ("pooled (thread-local)", after)):
+        print(
+            f"{label:24}{res['mean_ms']:>8.2f}ms{res['p50_ms']:>8.2f}ms"
+            f"{res['p95_ms']:>8.2f}ms{res['mean_ms'] * 1000 / calls:>10.1f}us"
+        )
+    print(f"speedup: {before['mean_ms'] / after['mean_ms']:.1f}x")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        shutil.rmtree(_TMP_DIR, ignore_errors=True)
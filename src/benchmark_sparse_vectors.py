@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Benchmark sparse-vector encoding for bulk ingestion.
+
+Compares the per-node path ``_upsert_sparse_vectors`` used to take — the
+original ``tokenize`` (a ``unicodedata.category`` call per character, an
+uncompiled regex) plus a CRC32 per token, one text at a time — with the
+batch encoder ``utils.sparse_vectors.encode_documents``, in-process and
+across a process pool.
+
+Runs on synthetic Hebrew/English chunks (with RTL marks and zero-width
+characters, like WhatsApp and Gmail text), and checks that every encoder
+produces identical vectors before timing them.
+
+Usage:
+    # From the src/ directory (so imports resolve):
+    cd src && python benchmark_sparse_vectors.py
+
+    # Bigger backfill / more processes:
+    cd src && python benchmark_sparse_vectors.py --texts 50000 --processes 8
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import unicodedata
+from binascii import crc32
+from collections import Counter
+from typing import Callable, List, Tuple
+
+# Ensure src/ is on the import path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils import sparse_vectors  # noqa: E402
+
+
+_HEBREW = [
+    "הסכם", "גירושין", "בין", "דוד", "ומירי", "של", "את", "על", "עם", "זה",
+    "פגישה", "מחר", "בבוקר", "חשבונית", "תשלום", "ביטוח", "בן", "בת", "אב",
+]
+_ENGLISH = [
+    "invoice", "meeting", "tomorrow", "payment", "insurance", "contract",
+    "the", "and", "for", "with", "flight", "booking", "receipt", "a", "of",
+]
+_INVISIBLE = ["\u200f", "\u200e", "\u200b", "\u200d"]  # RLM, LRM, ZWSP, ZWJ
+
+
+def _synthetic_texts(count: int, avg_words: int) -> List[str]:
+    texts = []
+    for _ in range(count):
+        words = []
+        for _ in range(max(1, int(random.gauss(avg_words, avg_words / 3)))):
+            word = random.choice(_HEBREW if random.random() < 0.6 else _ENGLISH)
+            if random.random() < 0.05:
+                word = random.choice(_INVISIBLE) + word
+            words.append(word)
+        texts.append(" ".join(words))
+    return texts
+
+
+# ---------------------------------------------------------------------------
+# The pre-batch implementation (verbatim), as the baseline
+# ---------------------------------------------------------------------------
+
+def _legacy_tokenize(text: str) -> List[str]:
+    clean = "".join(
+        ch for ch in text if unicodedata.category(ch) not in {"Cf"}
+    )
+    raw_tokens = re.findall(r"[\w]{2,}", clean, re.UNICODE)
+    return [
+        t.lower()
+        for t in raw_tokens
+        if len(t) >= 3 or sparse_vectors._HE_RE.search(t)
+    ]
+
+
+def _legacy_compute(text: str) -> Tuple[List[int], List[float]]:
+    tokens = _legacy_tokenize(text)
+    if not tokens:
+        return ([], [])
+    tf_counts = Counter(tokens)
+    doc_length = len(tokens)
+    k1, b = sparse_vectors._BM25_K1, sparse_vectors._BM25_B
+    avgdl = sparse_vectors._AVG_DOC_LENGTH
+    indices, values = [], []
+    for token, tf in tf_counts.items():
+        indices.append(crc32(token.encode("utf-8")) & 0xFFFFFFFF)
+        values.append(tf * (k1 + 1) / (tf + k1 * (1 - b + b * (doc_length / avgdl))))
+    return (indices, values)
+
+
+def _measure(fn: Callable[[], list], repeats: int) -> Tuple[float, list]:
+    best = float("inf")
+    result: list = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--texts", type=int, default=20000, help="Synthetic chunks to encode")
+    parser.add_argument("--words", type=int, default=120, help="Average words per chunk")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for the pooled run")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per encoder (best is kept)")
+    args = parser.parse_args()
+
+    random.seed(42)
+    texts = _synthetic_texts(args.texts, args.words)
+    sparse_vectors._strip_pattern()  # one-time pattern build, not part of the per-batch cost
+
+    runs = [
+        ("per-node (legacy)", lambda: [_legacy_compute(t) for t in texts]),
+        ("per-node (current)", lambda: [sparse_vectors.compute_sparse_vector(t) for t in texts]),
+        ("encode_documents", lambda: sparse_vectors.encode_documents(texts)),
+    ]
+    if args.processes > 1:
+        runs.append((
+            f"encode_documents x{args.processes}",
+            lambda: sparse_vectors.encode_documents(texts, processes=args.processes),
+        ))
+
+    results = []
+    for label, fn in runs:
+        seconds, output = _measure(fn, args.repeats)
+        vectors = [(item[0], item[1]) for item in output]
+        results.append((label, seconds, vectors))
+
+    baseline = results[0][2]
+    for label, _, vectors in results[1:]:
+        if vectors != baseline:
+            raise SystemExit(f"{label} produced different vectors than the legacy encoder")
+
+    tokens = sum(len(v[0]) for v in baseline)
+    print(f"sparse encoder benchmark: {args.texts} texts, ~{args.words} words each, "
+          f"{tokens} unique (text, token) pairs; outputs identical")
+    print(f"{'':28}{'total':>10}{'per text':>12}{'speedup':>10}")
+    for label, seconds, _ in results:
+        print(
+            f"{label:28}{seconds * 1000:>8.0f}ms{seconds * 1e6 / args.texts:>10.1f}us"
+            f"{results[0][1] / seconds:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
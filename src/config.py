@@ -18,7 +18,8 @@ from typing import Any
 class Settings:
     """Attribute-style access to SQLite-backed settings.
     
-    Reads every attribute lookup from the SQLite settings database.
+    Every attribute lookup reads from the in-process settings snapshot kept
+    by settings_db (a dict read; reloaded only when settings change).
     
     Usage:
         settings.openai_model       -> "gpt-4o"
@@ -0,0 +1,190 @@
+"""Cached "Known Contacts" roster for the chat system prompt.
+
+``LlamaIndexRAG._build_system_prompt`` used to rebuild the full contact
+list from ``Identity.all_summary()`` (two SQLite queries per person) on
+every ``create_chat_engine`` call, i.e. on every ``/rag/query``, and
+injected every contact into the prompt.
+
+The roster is now built once per *identity version* (see
+``identity_db.bump_identity_version``) and cached in-process and in Redis
+under ``identity:roster:<version>``, like the name index.  Each entry is
+pre-rendered (``"Name (alias/alias)"``) and indexed by its name parts, so
+the prompt can carry either:
+
+- ``full`` — the whole roster (pre-joined, capped at ``MAX_CONTACTS_CHARS``);
+- ``relevant`` — only contacts sharing a name part with the query, plus
+  contacts linked to those parts across scripts via the name-expansion
+  index (``דורון`` → ``Doron``), which is exactly the set the
+  disambiguation rule needs.
+
+Usage::
+
+    from contact_roster import get_contact_roster
+    text, count = get_contact_roster().relevant(tokens)
+"""
+
+import json
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.logger import logger
+from utils.redis_conn import get_redis_client
+
+
+REDIS_KEY_PREFIX = "identity:roster:"
+REDIS_TTL = 86400  # seconds — old versions are never read again
+
+# Cap contacts string to ~6000 chars (~1500 tokens) to prevent the system
+# prompt from exceeding LLM token limits.
+MAX_CONTACTS_CHARS = 6000
+
+_MIN_PART_LEN = 2  # Hebrew has meaningful 2-letter first names (טל, בן, אור)
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _name_parts(names: Iterable[str]) -> List[str]:
+    parts = {
+        t.lower()
+        for name in names if name
+        for t in _TOKEN_RE.findall(name)
+        if len(t) >= _MIN_PART_LEN and not t.isdigit()
+    }
+    return sorted(parts)
+
+
+def join_contacts(entries: List[str], total: int) -> str:
+    """Join entries, truncating at the last complete entry before the cap."""
+    text = ", ".join(entries)
+    if len(text) <= MAX_CONTACTS_CHARS:
+        return text
+    truncated = text[:MAX_CONTACTS_CHARS]
+    last_comma = truncated.rfind(", ")
+    text = truncated[:last_comma] if last_comma > 0 else truncated
+    return f"{text} ... (and more, {total} total)"
+
+
+class ContactRoster:
+    """Pre-rendered contact entries indexed by lowercased name part."""
+
+    def __init__(self, entries: List[Tuple[str, List[str]]]) -> None:
+        """Index the roster.
+
+        Args:
+            entries: (rendered entry, name parts) pairs in display order
+        """
+        self._entries = [entry for entry, _ in entries]
+        self._by_part: Dict[str, List[int]] = {}
+        for idx, (_, parts) in enumerate(entries):
+            for part in parts:
+                self._by_part.setdefault(part, []).append(idx)
+        self.count = len(self._entries)
+        self.full_text = join_contacts(self._entries, self.count)
+
+    @classmethod
+    def from_identities(cls, identities: Iterable) -> "ContactRoster":
+        """Render the roster from ``Identity.all_summary()`` results."""
+        entries: List[Tuple[str, List[str]]] = []
+        for p in identities:
+            if p.is_group:
+                continue
+            name = p.name
+            aliases = [a for a in p.alias_names if a != name]
+            rendered = f"{name} ({'/'.join(aliases[:3])})" if aliases else name
+            entries.append((rendered, _name_parts([name, *aliases])))
+        return cls(entries)
+
+    def to_json(self) -> str:
+        parts_by_entry: Dict[int, List[str]] = {}
+        for part, idxs in self._by_part.items():
+            for idx in idxs:
+                parts_by_entry.setdefault(idx, []).append(part)
+        return json.dumps(
+            [[entry, sorted(parts_by_entry.get(i, []))] for i, entry in enumerate(self._entries)],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, raw: str) -> "ContactRoster":
+        return cls([(entry, parts) for entry, parts in json.loads(raw)])
+
+    def relevant(self, tokens: Iterable[str]) -> Tuple[str, int]:
+        """Render only the contacts matching the query tokens.
+
+        Args:
+            tokens: Query tokens (e.g. from ``LlamaIndexRAG._tokenize_query``)
+
+        Returns:
+            Tuple of (comma-separated entries, number of entries)
+        """
+        from name_index import get_name_index
+
+        name_index = get_name_index()
+        matched: set = set()
+        for token in tokens:
+            low = token.lower()
+            matched.update(self._by_part.get(low, ()))
+            # Cross-script: parts of persons who also carry this part
+            for part in name_index.get(low, ()):
+                matched.update(self._by_part.get(part.lower(), ()))
+        entries = [self._entries[i] for i in sorted(matched)]
+        return join_contacts(entries, len(entries)), len(entries)
+
+
+_cache: Tuple[Optional[str], Optional[ContactRoster]] = (None, None)
+_build_lock = threading.Lock()
+
+
+def _build() -> ContactRoster:
+    from identity import Identity
+    return ContactRoster.from_identities(Identity.all_summary())
+
+
+def get_contact_roster() -> ContactRoster:
+    """Return the contact roster for the current identity version.
+
+    Raises:
+        Exception: If the identity store cannot be read
+    """
+    global _cache
+    import identity_db
+
+    version = identity_db.get_identity_version()
+    if version is None:
+        return _build()
+
+    cached_version, roster = _cache
+    if cached_version == version and roster is not None:
+        return roster
+
+    with _build_lock:
+        cached_version, roster = _cache
+        if cached_version == version and roster is not None:
+            return roster
+
+        key = f"{REDIS_KEY_PREFIX}{version}"
+        roster = None
+        try:
+            raw = get_redis_client().get(key)
+            if raw:
+                roster = ContactRoster.from_json(raw)
+        except Exception as e:
+            logger.debug(f"Contact roster Redis read failed (non-critical): {e}")
+
+        if roster is None:
+            roster = _build()
+            try:
+                get_redis_client().set(key, roster.to_json(), ex=REDIS_TTL)
+            except Exception as e:
+                logger.debug(f"Contact roster Redis write failed (non-critical): {e}")
+
+        _cache = (version, roster)
+        logger.debug(f"Contact roster v{version} loaded: {roster.count} contacts")
+        return roster
+
+
+def invalidate() -> None:
+    """Drop the in-process roster (the next lookup re-checks the version)."""
+    global _cache
+    _cache = (None, None)
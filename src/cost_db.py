@@ -4,11 +4,21 @@ Stores cost events in the shared settings.db database. Provides
 functions for inserting events and querying aggregates (daily totals,
 breakdowns by kind/model, etc.).
 
+Aggregates are served from rollup tables keyed by (bucket, provider,
+model, kind) — ``cost_rollup_hourly``, ``cost_rollup_daily`` and the
+all-time ``cost_rollup_totals`` — which are updated in the same
+transaction as every insert.  Summary queries therefore read at most
+one row per bucket and model regardless of history size, and raw
+``cost_events`` can be pruned by ``compact_cost_events()`` (retention
+policy, run daily from Celery Beat) without changing any totals.
+
 Database location: data/settings.db (shared with settings_db and conversations_db)
 """
 
 import sqlite3
-from typing import Any, Dict, List, Optional
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from settings_db import DB_PATH
 
@@ -65,11 +75,199 @@ def init_cost_db() -> None:
             CREATE INDEX IF NOT EXISTS idx_cost_events_kind
                 ON cost_events(kind)
         """)
+
+        # Rollups: one row per (bucket, provider, model, kind)
+        for table, bucket_col in (
+            ("cost_rollup_hourly", "bucket_ts INTEGER NOT NULL"),
+            ("cost_rollup_daily", "day TEXT NOT NULL"),
+        ):
+            bucket = bucket_col.split()[0]
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    {bucket_col},
+                    provider TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    cost_usd REAL DEFAULT 0.0,
+                    event_count INTEGER DEFAULT 0,
+                    tokens INTEGER DEFAULT 0,
+                    PRIMARY KEY ({bucket}, provider, model, kind)
+                )
+            """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cost_rollup_totals (
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                cost_usd REAL DEFAULT 0.0,
+                event_count INTEGER DEFAULT 0,
+                tokens INTEGER DEFAULT 0,
+                PRIMARY KEY (provider, model, kind)
+            )
+        """)
         conn.commit()
+
+        # One-time backfill for databases created before the rollups existed
+        has_rollups = conn.execute("SELECT 1 FROM cost_rollup_totals LIMIT 1").fetchone()
+        has_events = conn.execute("SELECT 1 FROM cost_events LIMIT 1").fetchone()
+        if has_events and not has_rollups:
+            _rebuild_rollups(conn)
     finally:
         conn.close()
 
 
+# ---------------------------------------------------------------------------
+# Rollups
+# ---------------------------------------------------------------------------
+
+_HOUR = 3600
+_DAY = 86400
+
+# (table, bucket column) → SQL expression deriving the bucket from cost_events
+_ROLLUP_BUCKETS = {
+    "cost_rollup_hourly": ("bucket_ts", f"CAST(ts / {_HOUR} AS INTEGER) * {_HOUR}"),
+    "cost_rollup_daily": ("day", "DATE(ts, 'unixepoch')"),
+}
+
+_UPSERT_SET = (
+    "cost_usd = cost_usd + excluded.cost_usd, "
+    "event_count = event_count + excluded.event_count, "
+    "tokens = tokens + excluded.tokens"
+)
+
+
+def _hour_bucket(ts: float) -> int:
+    return int(ts // _HOUR) * _HOUR
+
+
+def _day_bucket(ts: float) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(ts))
+
+
+def _apply_rollups(conn: sqlite3.Connection, rows: Iterable[tuple]) -> None:
+    """Add event rows (``COST_EVENT_COLUMNS`` order) to the rollup tables.
+
+    Must run inside the transaction that inserts the events.
+    """
+    hourly: Dict[Tuple, List[float]] = defaultdict(lambda: [0.0, 0, 0])
+    daily: Dict[Tuple, List[float]] = defaultdict(lambda: [0.0, 0, 0])
+    totals: Dict[Tuple, List[float]] = defaultdict(lambda: [0.0, 0, 0])
+    for ts, provider, model, kind, in_tok, out_tok, total_tok, cost, *_ in rows:
+        key = (provider, model, kind)
+        tokens = (in_tok or 0) + (out_tok or 0) + (total_tok or 0)
+        for agg in (hourly[(_hour_bucket(ts), *key)], daily[(_day_bucket(ts), *key)], totals[key]):
+            agg[0] += cost or 0.0
+            agg[1] += 1
+            agg[2] += tokens
+
+    for table, agg in (("cost_rollup_hourly", hourly), ("cost_rollup_daily", daily)):
+        bucket = _ROLLUP_BUCKETS[table][0]
+        conn.executemany(
+            f"""INSERT INTO {table} ({bucket}, provider, model, kind, cost_usd, event_count, tokens)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT({bucket}, provider, model, kind) DO UPDATE SET {_UPSERT_SET}""",
+            [(*k, *v) for k, v in agg.items()],
+        )
+    conn.executemany(
+        f"""INSERT INTO cost_rollup_totals (provider, model, kind, cost_usd, event_count, tokens)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(provider, model, kind) DO UPDATE SET {_UPSERT_SET}""",
+        [(*k, *v) for k, v in totals.items()],
+    )
+
+
+def _rebuild_rollups(conn: sqlite3.Connection) -> None:
+    """Recompute every rollup table from the raw ``cost_events``."""
+    token_sum = "SUM(in_tokens + out_tokens + total_tokens)"
+    with conn:
+        for table, (bucket, expr) in _ROLLUP_BUCKETS.items():
+            conn.execute(f"DELETE FROM {table}")
+            conn.execute(
+                f"""INSERT INTO {table} ({bucket}, provider, model, kind, cost_usd, event_count, tokens)
+                    SELECT {expr}, provider, model, kind, SUM(cost_usd), COUNT(*), {token_sum}
+                    FROM cost_events GROUP BY 1, provider, model, kind"""
+            )
+        conn.execute("DELETE FROM cost_rollup_totals")
+        conn.execute(
+            f"""INSERT INTO cost_rollup_totals (provider, model, kind, cost_usd, event_count, tokens)
+                SELECT provider, model, kind, SUM(cost_usd), COUNT(*), {token_sum}
+                FROM cost_events GROUP BY provider, model, kind"""
+        )
+
+
+def rebuild_rollups() -> None:
+    """Recompute the rollups from raw events.
+
+    Only exact while no raw events have been compacted away; intended
+    for repairs after manual edits to ``cost_events``.
+    """
+    conn = _get_connection()
+    try:
+        _rebuild_rollups(conn)
+    finally:
+        conn.close()
+
+
+def compact_cost_events(
+    raw_retention_days: int = 90,
+    hourly_retention_days: int = 35,
+) -> Dict[str, int]:
+    """Apply the retention policy to raw events and hourly rollups.
+
+    Daily and all-time rollups are kept forever, so totals and daily
+    summaries are unaffected; only the per-event log
+    (``get_events``/``get_conversation_cost``) loses old history.
+
+    Args:
+        raw_retention_days: Keep raw events this many days (0 = forever)
+        hourly_retention_days: Keep hourly rollups this many days (0 = forever)
+
+    Returns:
+        Dict with the number of raw events and hourly rows deleted
+    """
+    now = time.time()
+    conn = _get_connection()
+    try:
+        with conn:
+            events_deleted = 0
+            hourly_deleted = 0
+            if raw_retention_days > 0:
+                events_deleted = conn.execute(
+                    "DELETE FROM cost_events WHERE ts < ?",
+                    (now - raw_retention_days * _DAY,),
+                ).rowcount
+            if hourly_retention_days > 0:
+                # Cut at a UTC day boundary so the remaining hourly rows
+                # cover whole days (see _window_rollup)
+                cutoff = int((now - hourly_retention_days * _DAY) // _DAY) * _DAY
+                hourly_deleted = conn.execute(
+                    "DELETE FROM cost_rollup_hourly WHERE bucket_ts < ?",
+                    (cutoff,),
+                ).rowcount
+        return {"events_deleted": events_deleted, "hourly_rows_deleted": hourly_deleted}
+    finally:
+        conn.close()
+
+
+def _window_rollup(conn: sqlite3.Connection, days: Optional[int]) -> Tuple[str, str, tuple]:
+    """Pick the rollup table and WHERE clause for a "last N days" window.
+
+    Hourly buckets give hour-precise windows.  When the window reaches
+    past compacted hourly history (daily rollups older than the oldest
+    hourly bucket exist) it is served from whole UTC days instead.
+    """
+    if days is None or days <= 0:
+        return "cost_rollup_totals", "", ()
+    min_ts = time.time() - days * _DAY
+    oldest_hour = conn.execute("SELECT MIN(bucket_ts) FROM cost_rollup_hourly").fetchone()[0]
+    oldest_day = conn.execute("SELECT MIN(day) FROM cost_rollup_daily").fetchone()[0]
+    if oldest_hour is not None and (
+        oldest_hour <= min_ts or oldest_day is None or oldest_day >= _day_bucket(oldest_hour)
+    ):
+        return "cost_rollup_hourly", "WHERE bucket_ts >= ?", (_hour_bucket(min_ts),)
+    return "cost_rollup_daily", "WHERE day >= ?", (_day_bucket(min_ts),)
+
+
 # ---------------------------------------------------------------------------
 # Insert
 # ---------------------------------------------------------------------------
@@ -105,20 +303,56 @@ def insert_cost_event(
     """
     conn = _get_connection()
     try:
-        cursor = conn.execute(
-            """INSERT INTO cost_events
-               (ts, provider, model, kind, in_tokens, out_tokens, total_tokens,
-                cost_usd, conversation_id, request_context)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (ts, provider, model, kind, in_tokens, out_tokens, total_tokens,
-             cost_usd, conversation_id, request_context),
-        )
-        conn.commit()
+        row = (ts, provider, model, kind, in_tokens, out_tokens, total_tokens,
+               cost_usd, conversation_id, request_context)
+        with conn:
+            cursor = conn.execute(
+                """INSERT INTO cost_events
+                   (ts, provider, model, kind, in_tokens, out_tokens, total_tokens,
+                    cost_usd, conversation_id, request_context)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                row,
+            )
+            _apply_rollups(conn, [row])
         return cursor.lastrowid or 0
     finally:
         conn.close()
 
 
+# Column order for insert_cost_events() rows
+COST_EVENT_COLUMNS = (
+    "ts", "provider", "model", "kind", "in_tokens", "out_tokens",
+    "total_tokens", "cost_usd", "conversation_id", "request_context",
+)
+
+
+def insert_cost_events(rows: List[tuple]) -> int:
+    """Insert many cost events in a single transaction.
+
+    Used by the CostMeter write-behind writer (cost_writer.py).
+
+    Args:
+        rows: Tuples of values in ``COST_EVENT_COLUMNS`` order
+
+    Returns:
+        Number of rows inserted
+    """
+    if not rows:
+        return 0
+    conn = _get_connection()
+    try:
+        with conn:
+            conn.executemany(
+                f"""INSERT INTO cost_events ({", ".join(COST_EVENT_COLUMNS)})
+                    VALUES ({", ".join("?" for _ in COST_EVENT_COLUMNS)})""",
+                rows,
+            )
+            _apply_rollups(conn, rows)
+        return len(rows)
+    finally:
+        conn.close()
+
+
 # ---------------------------------------------------------------------------
 # Queries
 # ---------------------------------------------------------------------------
@@ -181,18 +415,11 @@ def get_total_cost(days: Optional[int] = None) -> float:
     """
     conn = _get_connection()
     try:
-        if days is not None and days > 0:
-            import time
-            min_ts = time.time() - (days * 86400)
-            row = conn.execute(
-                "SELECT COALESCE(SUM(cost_usd), 0) as total FROM cost_events WHERE ts >= ?",
-                (min_ts,),
-            ).fetchone()
-        else:
-            row = conn.execute(
-                "SELECT COALESCE(SUM(cost_usd), 0) as total FROM cost_events"
-            ).fetchone()
-
+        table, where, params = _window_rollup(conn, days)
+        row = conn.execute(
+            f"SELECT COALESCE(SUM(cost_usd), 0) as total FROM {table} {where}",
+            params,
+        ).fetchone()
         return float(row["total"]) if row else 0.0
     finally:
         conn.close()
@@ -202,27 +429,25 @@ def get_daily_summary(days: int = 7) -> List[Dict[str, Any]]:
     """Get daily cost totals for the last N days.
 
     Args:
-        days: Number of days to include
+        days: Number of days to include (UTC calendar days)
 
     Returns:
         List of dicts: {date, total_cost, event_count, total_tokens}
     """
-    import time
-
     conn = _get_connection()
     try:
-        min_ts = time.time() - (days * 86400)
+        min_day = _day_bucket(time.time() - (days * _DAY))
         rows = conn.execute(
             """SELECT
-                DATE(created_at) as date,
+                day as date,
                 SUM(cost_usd) as total_cost,
-                COUNT(*) as event_count,
-                SUM(in_tokens + out_tokens + total_tokens) as total_tokens
-               FROM cost_events
-               WHERE ts >= ?
-               GROUP BY DATE(created_at)
-               ORDER BY date DESC""",
-            (min_ts,),
+                SUM(event_count) as event_count,
+                SUM(tokens) as total_tokens
+               FROM cost_rollup_daily
+               WHERE day >= ?
+               GROUP BY day
+               ORDER BY day DESC""",
+            (min_day,),
         ).fetchall()
 
         return [dict(row) for row in rows]
@@ -239,22 +464,13 @@ def get_cost_by_kind(days: Optional[int] = None) -> Dict[str, float]:
     Returns:
         Dict of kind -> total cost USD
     """
-    import time
-
     conn = _get_connection()
     try:
-        if days is not None and days > 0:
-            min_ts = time.time() - (days * 86400)
-            rows = conn.execute(
-                """SELECT kind, SUM(cost_usd) as total
-                   FROM cost_events WHERE ts >= ?
-                   GROUP BY kind""",
-                (min_ts,),
-            ).fetchall()
-        else:
-            rows = conn.execute(
-                "SELECT kind, SUM(cost_usd) as total FROM cost_events GROUP BY kind"
-            ).fetchall()
+        table, where, params = _window_rollup(conn, days)
+        rows = conn.execute(
+            f"SELECT kind, SUM(cost_usd) as total FROM {table} {where} GROUP BY kind",
+            params,
+        ).fetchall()
 
         return {row["kind"]: float(row["total"]) for row in rows}
     finally:
@@ -270,30 +486,18 @@ def get_cost_by_model(days: Optional[int] = None) -> List[Dict[str, Any]]:
     Returns:
         List of dicts: {provider, model, kind, total_cost, event_count}
     """
-    import time
-
     conn = _get_connection()
     try:
-        if days is not None and days > 0:
-            min_ts = time.time() - (days * 86400)
-            rows = conn.execute(
-                """SELECT provider, model, kind,
-                          SUM(cost_usd) as total_cost,
-                          COUNT(*) as event_count
-                   FROM cost_events WHERE ts >= ?
-                   GROUP BY provider, model, kind
-                   ORDER BY total_cost DESC""",
-                (min_ts,),
-            ).fetchall()
-        else:
-            rows = conn.execute(
-                """SELECT provider, model, kind,
-                          SUM(cost_usd) as total_cost,
-                          COUNT(*) as event_count
-                   FROM cost_events
-                   GROUP BY provider, model, kind
-                   ORDER BY total_cost DESC"""
-            ).fetchall()
+        table, where, params = _window_rollup(conn, days)
+        rows = conn.execute(
+            f"""SELECT provider, model, kind,
+                       SUM(cost_usd) as total_cost,
+                       SUM(event_count) as event_count
+                FROM {table} {where}
+                GROUP BY provider, model, kind
+                ORDER BY total_cost DESC""",
+            params,
+        ).fetchall()
 
         return [dict(row) for row in rows]
     finally:
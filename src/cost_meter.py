@@ -3,7 +3,8 @@
 Provides a thread-safe CostMeter singleton that:
 - Tracks per-event costs in memory (fast lookups)
 - Maintains a running session total
-- Persists every event to SQLite for historical queries
+- Persists every event to SQLite for historical queries, batched by a
+  background writer (see cost_writer.py)
 - Supports snapshotting for per-query cost calculation
 
 Usage:
@@ -67,7 +68,8 @@ class CostMeter:
     """Thread-safe in-memory cost meter with SQLite persistence.
 
     Maintains a running session total and a bounded event buffer.
-    Every event is also written to SQLite for historical queries.
+    Every event is also written to SQLite (write-behind, in batches)
+    for historical queries.
     """
 
     def __init__(self):
@@ -113,7 +115,7 @@ class CostMeter:
         """Record a cost event.
 
         Adds to the in-memory buffer, updates the session total,
-        and persists to SQLite.
+        and queues the event for batched persistence to SQLite.
 
         Args:
             event: The CostEvent to record
@@ -129,28 +131,26 @@ class CostMeter:
             if len(self._events) > MAX_MEMORY_EVENTS:
                 self._events = self._events[-MAX_MEMORY_EVENTS:]
 
-        # Persist to SQLite (outside lock to avoid holding it during I/O)
+        # Persist via the write-behind writer (batched executemany, crash spool)
         try:
-            import cost_db
-            cost_db.insert_cost_event(
-                ts=event.ts,
-                provider=event.provider,
-                model=event.model,
-                kind=event.kind,
-                in_tokens=event.in_tokens,
-                out_tokens=event.out_tokens,
-                total_tokens=event.total_tokens,
-                cost_usd=event.cost_usd,
-                conversation_id=event.conversation_id,
-                request_context=event.request_context,
-            )
+            from cost_writer import get_cost_writer
+            get_cost_writer().enqueue(event)
         except Exception:
             # Non-fatal: if persistence fails, in-memory tracking continues
             import logging
             logging.getLogger(__name__).warning(
-                "Failed to persist cost event to SQLite", exc_info=True
+                "Failed to queue cost event for persistence", exc_info=True
             )
 
+    def flush(self) -> int:
+        """Write buffered events to SQLite now (e.g. before reading totals).
+
+        Returns:
+            Number of events written
+        """
+        from cost_writer import get_cost_writer
+        return get_cost_writer().flush()
+
     # -----------------------------------------------------------------
     # Convenience methods — compute cost and record in one call
     # -----------------------------------------------------------------
@@ -204,6 +204,7 @@ class CostMeter:
         total_tokens: int,
         conversation_id: str = "",
         request_context: str = "",
+        cached: bool = False,
         meta: Optional[Dict[str, Any]] = None,
     ) -> CostEvent:
         """Record an embedding cost event.
@@ -214,13 +215,19 @@ class CostMeter:
             total_tokens: Total tokens embedded
             conversation_id: Associated conversation UUID
             request_context: Context label
+            cached: True when the embedding was served from a cache —
+                recorded as a zero-cost event
             meta: Optional metadata dict
 
         Returns:
             The created CostEvent
         """
-        model_key = resolve_model_key(provider, model)
-        cost = embed_cost(model_key, total_tokens)
+        if cached:
+            cost = 0.0
+            meta = {**(meta or {}), "cache_hit": True}
+        else:
+            model_key = resolve_model_key(provider, model)
+            cost = embed_cost(model_key, total_tokens)
 
         event = CostEvent(
             ts=time(),
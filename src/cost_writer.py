@@ -0,0 +1,322 @@
+"""Write-behind persistence for CostMeter events.
+
+``CostMeter.add`` used to call ``cost_db.insert_cost_event`` synchronously
+for every LLM, embedding and Whisper call — one SQLite connection and one
+transaction per event.  During bulk syncs that meant thousands of
+single-row transactions competing with the other SQLite writers.
+
+:class:`CostEventWriter` buffers events and a background thread writes
+them with one ``executemany`` transaction when ``max_batch_size`` events
+are pending or ``flush_interval`` seconds have passed.
+
+Durability:
+
+- **Shutdown** — ``shutdown()`` flushes the buffer; it runs from ``atexit``
+  and from Celery's ``worker_process_shutdown`` signal (prefork children
+  exit via ``os._exit`` and skip ``atexit``).
+- **Crashes** — every buffered event is also appended to a per-process
+  spool file (``cost_spool/<pid>.jsonl`` next to the database), which is
+  truncated after each successful flush.  Each process holds an exclusive
+  ``flock`` on its spool; a spool whose lock can be taken belongs to a
+  dead process, and its events are inserted and the file removed the next
+  time any process starts a writer.  A crash between the database commit
+  and the truncate can re-insert that one batch.
+
+Usage::
+
+    from cost_writer import get_cost_writer
+    get_cost_writer().enqueue(event)
+"""
+
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, TextIO
+
+from utils.logger import logger
+
+
+FLUSH_INTERVAL_SECONDS = 2.0
+MAX_BATCH_SIZE = 200
+SPOOL_OPEN_ATTEMPTS = 3  # reopen tries when recovery unlinks the spool mid-open
+
+
+def _spool_dir() -> str:
+    from settings_db import DB_PATH
+    return os.path.join(os.path.dirname(os.path.abspath(DB_PATH)), "cost_spool")
+
+
+def _row(event: Any) -> tuple:
+    """CostEvent → tuple in ``cost_db.COST_EVENT_COLUMNS`` order."""
+    return (
+        event.ts, event.provider, event.model, event.kind,
+        event.in_tokens, event.out_tokens, event.total_tokens,
+        event.cost_usd, event.conversation_id, event.request_context,
+    )
+
+
+class CostEventWriter:
+    """Buffers cost events and persists them in batches from a background thread.
+
+    Per-process state is re-created after a ``fork()`` so Celery prefork
+    children never share the parent's buffer, thread or spool file.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        spool_dir: Optional[str] = None,
+    ) -> None:
+        """Initialize the writer.
+
+        Args:
+            flush_interval: Max seconds an event waits before being written
+            max_batch_size: Flush as soon as this many events are pending
+            spool_dir: Directory for crash spool files (defaults to
+                ``cost_spool/`` next to the settings database)
+        """
+        self.flush_interval = flush_interval
+        self.max_batch_size = max(1, int(max_batch_size))
+        self._spool_dir = spool_dir
+        self._pid = -1
+        self._metrics: Dict[str, float] = {}
+        self._reset_process_state()
+
+    def _reset_process_state(self) -> None:
+        """(Re)create per-process state: lock, buffer, thread, spool."""
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._pending: List[tuple] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._spool: Optional[TextIO] = None
+        self._metrics = {"events": 0, "batches": 0, "failed_batches": 0, "recovered": 0}
+
+    def _ensure_started(self) -> None:
+        if self._pid != os.getpid():
+            self._reset_process_state()
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped = False
+            self._open_spool()
+            self._thread = threading.Thread(
+                target=self._run, name="cost-event-writer", daemon=True
+            )
+            self._thread.start()
+        threading.Thread(
+            target=self.recover_orphaned_spools, name="cost-spool-recovery", daemon=True
+        ).start()
+
+    # =====================================================================
+    # Public API
+    # =====================================================================
+
+    def enqueue(self, event: Any) -> None:
+        """Buffer a CostEvent for the next batched write."""
+        self._ensure_started()
+        row = _row(event)
+        with self._cond:
+            self._pending.append(row)
+            self._spool_append(row)
+            if len(self._pending) >= self.max_batch_size:
+                self._cond.notify_all()
+
+    def flush(self) -> int:
+        """Synchronously write everything currently buffered.
+
+        Returns:
+            Number of events written
+        """
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                import cost_db
+                cost_db.insert_cost_events(batch)
+            except Exception:
+                # Keep the events (still in the spool) for the next attempt
+                with self._cond:
+                    self._pending[:0] = batch
+                    self._metrics["failed_batches"] += 1
+                logger.warning(
+                    f"Failed to persist {len(batch)} cost event(s) to SQLite", exc_info=True
+                )
+                return 0
+            with self._cond:
+                self._metrics["events"] += len(batch)
+                self._metrics["batches"] += 1
+                if not self._pending:
+                    self._spool_truncate()
+                else:
+                    self._spool_rewrite()
+            return len(batch)
+
+    def shutdown(self) -> None:
+        """Flush buffered events and stop the writer thread."""
+        if self._pid != os.getpid():
+            return  # Nothing buffered in this (forked) process
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return in-process writer counters."""
+        with self._cond:
+            stats: Dict[str, Any] = {k: int(v) for k, v in self._metrics.items()}
+            stats["pending"] = len(self._pending)
+        stats["flush_interval"] = self.flush_interval
+        stats["max_batch_size"] = self.max_batch_size
+        return stats
+
+    def recover_orphaned_spools(self) -> int:
+        """Insert events left in spool files of processes that died.
+
+        Returns:
+            Number of recovered events
+        """
+        recovered = 0
+        own = self._spool.name if self._spool else None
+        for path in glob.glob(os.path.join(self._get_spool_dir(), "*.jsonl")):
+            if path == own:
+                continue
+            try:
+                recovered += self._recover_spool(path)
+            except Exception as e:
+                logger.debug(f"Cost spool recovery skipped {path}: {e}")
+        if recovered:
+            with self._cond:
+                self._metrics["recovered"] += recovered
+            logger.info(f"Recovered {recovered} unsaved cost event(s) from crashed processes")
+        return recovered
+
+    # =====================================================================
+    # Writer thread
+    # =====================================================================
+
+    def _run(self) -> None:
+        """Flush when the batch fills up or the interval elapses."""
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._pending) < self.max_batch_size and not self._stopped:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(timeout=remaining)
+                stopped = self._stopped
+            self.flush()
+            if stopped:
+                return
+
+    # =====================================================================
+    # Crash spool (caller holds self._cond for the _spool_* helpers)
+    # =====================================================================
+
+    def _get_spool_dir(self) -> str:
+        return self._spool_dir or _spool_dir()
+
+    def _open_spool(self) -> None:
+        try:
+            directory = self._get_spool_dir()
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{os.getpid()}.jsonl")
+            # A leftover file with our PID belongs to a dead earlier process
+            # (PIDs are reused across container restarts) — recover it first.
+            if os.path.exists(path):
+                self._recover_spool(path)
+            for _ in range(SPOOL_OPEN_ATTEMPTS):
+                spool = open(path, "a", encoding="utf-8")
+                try:
+                    # Blocks while another process recovers a leftover file
+                    fcntl.flock(spool.fileno(), fcntl.LOCK_EX)
+                except Exception:
+                    spool.close()
+                    raise
+                # Recovery may have drained and unlinked the file between
+                # our open() and flock(); appending to that inode would lose
+                # every event, so open the path again.
+                if os.fstat(spool.fileno()).st_nlink > 0:
+                    self._spool = spool
+                    return
+                spool.close()
+            raise OSError(f"Spool {path} kept being removed while opening")
+        except Exception as e:
+            logger.debug(f"Cost event spool unavailable (non-critical): {e}")
+            self._spool = None
+
+    def _spool_append(self, row: tuple) -> None:
+        if self._spool is None:
+            return
+        try:
+            self._spool.write(json.dumps(row) + "\n")
+            self._spool.flush()
+        except Exception as e:
+            logger.debug(f"Cost event spool write failed (non-critical): {e}")
+
+    def _spool_truncate(self) -> None:
+        if self._spool is None:
+            return
+        try:
+            self._spool.truncate(0)
+            self._spool.seek(0)
+        except Exception as e:
+            logger.debug(f"Cost event spool truncate failed (non-critical): {e}")
+
+    def _spool_rewrite(self) -> None:
+        """Replace the spool contents with the events still pending."""
+        self._spool_truncate()
+        for row in self._pending:
+            self._spool_append(row)
+
+    def _recover_spool(self, path: str) -> int:
+        with open(path, "r+", encoding="utf-8") as f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0  # Owner is alive (or another process is recovering it)
+            if os.fstat(f.fileno()).st_nlink == 0:
+                return 0  # Already recovered and removed by another process
+            rows = []
+            for line in f:
+                try:
+                    rows.append(tuple(json.loads(line)))
+                except ValueError:
+                    continue  # Torn last line from the crash
+            if rows:
+                import cost_db
+                cost_db.insert_cost_events(rows)
+            os.unlink(path)
+            return len(rows)
+
+
+_writer: Optional[CostEventWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_cost_writer() -> CostEventWriter:
+    """Return the process-wide writer (created on first use)."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = CostEventWriter()
+                atexit.register(_writer.shutdown)
+    return _writer
+
+
+def shutdown() -> None:
+    """Flush and stop the writer if one was created in this process."""
+    if _writer is not None:
+        _writer.shutdown()
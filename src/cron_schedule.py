@@ -0,0 +1,239 @@
+"""Compiled evaluator for 5-field cron expressions.
+
+``scheduled_tasks_db._next_cron`` used to walk forward one minute at a
+time for up to two days, re-parsing every field spec on each step, and
+fell back to "+1 hour" for anything sparser than that (``0 9 1 */3 *``,
+``0 8 29 2 *``).
+
+:class:`CronExpression` parses an expression once into one bitset per
+field (bit *n* set ⇔ value *n* allowed).  :meth:`CronExpression.next_after`
+then jumps field by field — month → day → hour → minute — so a quarterly
+schedule costs a handful of steps instead of ~100k minute probes, and
+there is no search horizon.
+
+Supported syntax per field: ``*``, ``N``, ``A-B``, ``*/S``, ``A-B/S``,
+``A/S`` (``A`` to the field maximum), comma-separated lists, and
+three-letter month/weekday names.  Day-of-week accepts 0–7 (0 and 7 are
+Sunday).  Day matching follows Vixie cron: when both day-of-month and
+day-of-week are restricted a day matches if *either* does, but when
+either field starts with ``*`` (``*``, ``*/2``) a day must match *both*
+(``0 12 */2 * 1`` fires on odd-numbered Mondays only).
+
+Times are wall-clock: ``next_after`` takes and returns naive datetimes in
+the task's timezone, which is how ``next_run_at`` is stored.
+
+Usage::
+
+    from cron_schedule import compile_cron
+    next_run = compile_cron("0 9 1 */3 *").next_after(datetime(2024, 2, 10, 12, 0))
+"""
+
+import calendar
+import functools
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+
+# (name, minimum, maximum) per field, in expression order
+_FIELDS: Tuple[Tuple[str, int, int], ...] = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day of month", 1, 31),
+    ("month", 1, 12),
+    ("day of week", 0, 7),
+)
+
+_MONTH_NAMES = {
+    name: i for i, name in enumerate(
+        ["jan", "feb", "mar", "apr", "may", "jun",
+         "jul", "aug", "sep", "oct", "nov", "dec"],
+        start=1,
+    )
+}
+_DOW_NAMES = {
+    name: i for i, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])
+}
+
+# Weekday pattern repeats every 28 years in the Gregorian calendar between
+# century years, so an expression that has not matched within this many
+# years never will (e.g. "0 0 30 2 *").
+_MAX_YEARS = 30
+
+
+def _next_bit(mask: int, start: int) -> Optional[int]:
+    """Smallest set bit position >= start, or None."""
+    rest = mask >> start
+    if not rest:
+        return None
+    return start + (rest & -rest).bit_length() - 1
+
+
+def _parse_value(token: str, names: Dict[str, int]) -> int:
+    low = token.lower()
+    if low in names:
+        return names[low]
+    return int(token)
+
+
+def _parse_field(spec: str, index: int) -> int:
+    """Parse one field spec into a bitset.
+
+    Raises:
+        ValueError: If the spec is malformed or out of range
+    """
+    name, lo, hi = _FIELDS[index]
+    names = _MONTH_NAMES if index == 3 else _DOW_NAMES if index == 4 else {}
+    mask = 0
+    for part in spec.split(","):
+        if not part:
+            raise ValueError(f"Empty {name} list entry in {spec!r}")
+        base, _, step_str = part.partition("/")
+        step = int(step_str) if step_str else 1
+        if step < 1:
+            raise ValueError(f"Invalid {name} step in {part!r}")
+
+        if base == "*":
+            start, end = lo, hi
+        elif "-" in base:
+            a, b = base.split("-", 1)
+            start, end = _parse_value(a, names), _parse_value(b, names)
+        else:
+            start = _parse_value(base, names)
+            # "A/S" means "from A to the maximum, every S"
+            end = hi if step_str else start
+
+        if not (lo <= start <= hi and lo <= end <= hi) or start > end:
+            raise ValueError(f"{name.capitalize()} out of range ({lo}-{hi}) in {part!r}")
+        for value in range(start, end + 1, step):
+            mask |= 1 << value
+    return mask
+
+
+class CronExpression:
+    """A 5-field cron expression compiled to per-field bitsets."""
+
+    __slots__ = ("expression", "minutes", "hours", "days", "months", "weekdays",
+                 "_dom_or_dow", "_days_only")
+
+    def __init__(self, expression: str) -> None:
+        """Parse the expression.
+
+        Args:
+            expression: ``"minute hour day-of-month month day-of-week"``
+
+        Raises:
+            ValueError: If the expression does not have 5 valid fields
+        """
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Invalid cron expression (expected 5 fields): {expression}")
+        self.expression = " ".join(fields)
+        masks = [_parse_field(spec, i) for i, spec in enumerate(fields)]
+        self.minutes, self.hours, self.days, self.months, weekdays = masks
+        # Fold 7 (Sunday) onto 0
+        if weekdays & (1 << 7):
+            weekdays = (weekdays | 1) & ~(1 << 7)
+        self.weekdays = weekdays
+        # Vixie cron: the OR rule applies only when neither field starts with "*"
+        self._dom_or_dow = not (fields[2].startswith("*") or fields[4].startswith("*"))
+        # AND with every weekday allowed: the day-of-month bitset alone decides
+        self._days_only = not self._dom_or_dow and weekdays == 0x7F
+
+    def __repr__(self) -> str:
+        return f"CronExpression({self.expression!r})"
+
+    # =====================================================================
+    # Matching
+    # =====================================================================
+
+    def _day_matches(self, year: int, month: int, day: int) -> bool:
+        dom = bool(self.days >> day & 1)
+        # cron weekday: 0=Sunday; Python weekday(): 0=Monday
+        dow = bool(self.weekdays >> ((calendar.weekday(year, month, day) + 1) % 7) & 1)
+        if self._dom_or_dow:
+            return dom or dow
+        return dom and dow
+
+    def _next_day(self, year: int, month: int, day: int) -> Optional[int]:
+        """First matching day >= ``day`` in the given month, or None."""
+        last = calendar.monthrange(year, month)[1]
+        if self._days_only:
+            found = _next_bit(self.days, day)
+            return found if found is not None and found <= last else None
+        for d in range(day, last + 1):
+            if self._day_matches(year, month, d):
+                return d
+        return None
+
+    # =====================================================================
+    # Evaluation
+    # =====================================================================
+
+    def next_after(self, now: datetime) -> datetime:
+        """Return the first matching minute strictly after ``now``.
+
+        Args:
+            now: Reference time (wall-clock; tzinfo is preserved if set)
+
+        Returns:
+            The next fire time, with seconds and microseconds zeroed
+
+        Raises:
+            ValueError: If the expression can never match (e.g. Feb 30)
+        """
+        t = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        year, month, day, hour, minute = t.year, t.month, t.day, t.hour, t.minute
+        limit = year + _MAX_YEARS
+
+        while year <= limit:
+            next_month = _next_bit(self.months, month)
+            if next_month is None:
+                year, month, day, hour, minute = year + 1, 1, 1, 0, 0
+                continue
+            if next_month != month:
+                month, day, hour, minute = next_month, 1, 0, 0
+
+            next_day = self._next_day(year, month, day)
+            if next_day is None:
+                month, day, hour, minute = month + 1, 1, 0, 0
+                if month > 12:
+                    year, month = year + 1, 1
+                continue
+            if next_day != day:
+                day, hour, minute = next_day, 0, 0
+
+            next_hour = _next_bit(self.hours, hour)
+            if next_hour is None:
+                day, hour, minute = day + 1, 0, 0
+                if day > calendar.monthrange(year, month)[1]:
+                    month, day = month + 1, 1
+                    if month > 12:
+                        year, month = year + 1, 1
+                continue
+            if next_hour != hour:
+                hour, minute = next_hour, 0
+
+            next_minute = _next_bit(self.minutes, minute)
+            if next_minute is None:
+                hour, minute = hour + 1, 0
+                if hour > 23:
+                    day, hour = day + 1, 0
+                    if day > calendar.monthrange(year, month)[1]:
+                        month, day = month + 1, 1
+                        if month > 12:
+                            year, month = year + 1, 1
+                continue
+
+            return t.replace(year=year, month=month, day=day, hour=hour, minute=next_minute)
+
+        raise ValueError(f"Cron expression never matches: {self.expression}")
+
+
+@functools.lru_cache(maxsize=256)
+def compile_cron(expression: str) -> CronExpression:
+    """Parse (and memoize) a cron expression.
+
+    Raises:
+        ValueError: If the expression is invalid
+    """
+    return CronExpression(expression)
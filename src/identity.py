@@ -33,7 +33,7 @@ Usage::
 from __future__ import annotations
 
 import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Union
 
 from utils.logger import logger
 
@@ -652,7 +652,11 @@ class Identity:
         """
         return self.relationships
 
-    def expand_related(self, max_depth: int = 1) -> List["Identity"]:
+    def expand_related(
+        self,
+        max_depth: int = 1,
+        relationship_types: Optional[Iterable[str]] = None,
+    ) -> List["Identity"]:
         """Expand this person's identity graph via relationships.
 
         Traverses relationships up to ``max_depth`` hops and returns
@@ -660,13 +664,15 @@ class Identity:
 
         Args:
             max_depth: Number of relationship hops to follow.
+            relationship_types: Only follow these relationship types
+                (e.g. ``{"spouse", "parent"}``); ``None`` follows all.
 
         Returns:
             List of ``Identity`` instances (includes self).
         """
         import identity_db
         expanded_ids = identity_db.expand_person_ids_with_relationships(
-            [self._id], max_depth=max_depth,
+            [self._id], max_depth=max_depth, relationship_types=relationship_types,
         )
         return Identity.preload(expanded_ids)
 
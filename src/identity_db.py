@@ -14,10 +14,12 @@ messages, Paperless documents, and other sources. Provides:
 Database location: data/settings.db (shared with settings_db, conversations_db)
 """
 
+import os
 import re
 import sqlite3
+import threading
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
 
 from settings_db import DB_PATH
 from utils.logger import logger
@@ -27,19 +29,124 @@ from utils.logger import logger
 # Database connection helper
 # ---------------------------------------------------------------------------
 
+# Thread-local connection reuse (same approach as settings_db).  A single
+# query resolves names per n-gram and walks relationships per frontier node,
+# so opening a connection and re-running the pragmas on every call used to
+# dominate the cost of these tiny indexed lookups.  Reusing the connection
+# also lets sqlite3's per-connection statement cache skip re-preparing SQL.
+_local = threading.local()
+
+_CACHE_SIZE_KIB = 16384            # 16 MB page cache per connection
+_MMAP_SIZE_BYTES = 256 * 1024 * 1024  # memory-map up to 256 MB of the DB file
+_CACHED_STATEMENTS = 256           # prepared statements kept per connection
+
+
+def _open_connection() -> sqlite3.Connection:
+    """Open a new SQLite connection with the identity store pragmas."""
+    conn = sqlite3.connect(DB_PATH, cached_statements=_CACHED_STATEMENTS)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    # NORMAL is durable across application crashes in WAL mode; only an
+    # OS crash/power loss can roll back the last transactions.
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{_CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA mmap_size={_MMAP_SIZE_BYTES}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
 def _get_connection() -> sqlite3.Connection:
-    """Get a new SQLite connection (connection-per-request for thread safety).
+    """Get the calling thread's SQLite connection (reused across calls).
+
+    Each thread keeps one persistent connection; it is re-opened after a
+    ``fork()`` (Celery prefork workers) since SQLite handles must not be
+    shared across processes.  Every call must be paired with
+    :func:`_release_connection` (nested pairs are fine).
 
     Returns:
         sqlite3.Connection with row_factory set to sqlite3.Row
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA foreign_keys=ON")
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid():
+        conn = _open_connection()
+        _local.conn = conn
+        _local.pid = os.getpid()
+        _local.depth = 0
+    _local.depth += 1
     return conn
 
 
+def _release_connection(conn: sqlite3.Connection) -> None:
+    """Release a connection obtained from :func:`_get_connection`.
+
+    The connection stays open for reuse.  When the outermost caller
+    releases it, any transaction left uncommitted (e.g. after an
+    exception) is rolled back so it cannot leak into the next call.
+    """
+    _local.depth = max(0, getattr(_local, "depth", 1) - 1)
+    if _local.depth == 0 and conn.in_transaction:
+        conn.rollback()
+
+
+# ---------------------------------------------------------------------------
+# Change tracking — identity version counter
+# ---------------------------------------------------------------------------
+
+# Redis counters bumped on every mutation of the corresponding data.
+# Derived caches (the name-expansion index in name_index.py, the alias trie
+# in alias_index.py, the adjacency lists in relationship_graph.py) key their
+# entries on these versions so every process sees invalidations immediately.
+IDENTITY_VERSION_KEY = "identity:version"  # names and aliases
+RELATIONSHIP_VERSION_KEY = "identity:relationships:version"
+
+
+def _bump_version(key: str) -> None:
+    try:
+        from utils.redis_conn import get_redis_client
+        get_redis_client().incr(key)
+    except Exception as e:
+        logger.debug(f"Failed to bump {key} (non-critical): {e}")
+
+
+def _read_version(key: str) -> Optional[str]:
+    try:
+        from utils.redis_conn import get_redis_client
+        return str(get_redis_client().get(key) or "0")
+    except Exception as e:
+        logger.debug(f"Failed to read {key}: {e}")
+        return None
+
+
+def bump_identity_version() -> None:
+    """Mark names/aliases as changed (invalidates derived caches)."""
+    _bump_version(IDENTITY_VERSION_KEY)
+
+
+def get_identity_version() -> Optional[str]:
+    """Return the current identity version.
+
+    Returns:
+        Version string, or None when Redis is unavailable (callers must
+        then treat derived caches as stale)
+    """
+    return _read_version(IDENTITY_VERSION_KEY)
+
+
+def bump_relationship_version() -> None:
+    """Mark the relationship graph as changed (invalidates adjacency caches)."""
+    _bump_version(RELATIONSHIP_VERSION_KEY)
+
+
+def get_relationship_version() -> Optional[str]:
+    """Return the current relationship-graph version.
+
+    Returns:
+        Version string, or None when Redis is unavailable
+    """
+    return _read_version(RELATIONSHIP_VERSION_KEY)
+
+
 # ---------------------------------------------------------------------------
 # Script detection helper
 # ---------------------------------------------------------------------------
@@ -144,13 +251,6 @@ def init_entity_db() -> None:
             conn.execute("ALTER TABLE persons ADD COLUMN email TEXT")
             logger.info("Migration: added email column to persons table")
 
-        # Migration: add source_quote column to person_facts if missing
-        try:
-            conn.execute("SELECT source_quote FROM person_facts LIMIT 1")
-        except sqlite3.OperationalError:
-            conn.execute("ALTER TABLE person_facts ADD COLUMN source_quote TEXT")
-            logger.info("Migration: added source_quote column to person_facts table")
-
         conn.execute("""
             CREATE TABLE IF NOT EXISTS person_aliases (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -179,6 +279,14 @@ def init_entity_db() -> None:
             )
         """)
 
+        # Migration: add source_quote column to person_facts if missing
+        # (runs after CREATE TABLE so fresh databases get it too)
+        try:
+            conn.execute("SELECT source_quote FROM person_facts LIMIT 1")
+        except sqlite3.OperationalError:
+            conn.execute("ALTER TABLE person_facts ADD COLUMN source_quote TEXT")
+            logger.info("Migration: added source_quote column to person_facts table")
+
         conn.execute("""
             CREATE TABLE IF NOT EXISTS person_relationships (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -289,7 +397,7 @@ def init_entity_db() -> None:
         conn.commit()
         logger.info("Identity database tables initialized")
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 # ---------------------------------------------------------------------------
@@ -383,11 +491,12 @@ def update_display_name(person_id: int) -> Optional[str]:
                     (new_name, person_id),
                 )
                 conn.commit()
+                bump_identity_version()
                 logger.info(f"Updated display name for person {person_id}: {new_name}")
                 return new_name
         return None
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 # ---------------------------------------------------------------------------
@@ -442,7 +551,7 @@ def find_person_by_phone(phone: str) -> Optional[int]:
 
         return None
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def find_person_by_email(email: str) -> Optional[int]:
@@ -480,7 +589,7 @@ def find_person_by_email(email: str) -> Optional[int]:
 
         return None
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def get_or_create_person(
@@ -569,13 +678,16 @@ def get_or_create_person(
             existing_name = conn.execute(
                 "SELECT canonical_name FROM persons WHERE id = ?", (person_id,)
             ).fetchone()
+            names_changed = False
             if existing_name and existing_name["canonical_name"] != canonical_name:
-                _safe_add_alias(conn, person_id, canonical_name)
+                names_changed = _safe_add_alias(conn, person_id, canonical_name)
                 conn.commit()
 
             # Try to build bilingual display name
             new_display = _build_display_name(conn, person_id)
-            if new_display:
+            if new_display and not (
+                existing_name and existing_name["canonical_name"] == new_display
+            ):
                 dup = conn.execute(
                     "SELECT id FROM persons WHERE canonical_name = ? AND id != ?",
                     (new_display, person_id),
@@ -586,6 +698,10 @@ def get_or_create_person(
                         (new_display, person_id),
                     )
                     conn.commit()
+                    names_changed = True
+
+            if names_changed:
+                bump_identity_version()
         else:
             # Create new person
             cursor = conn.execute(
@@ -600,23 +716,29 @@ def get_or_create_person(
             if person_id is not None:
                 _auto_create_aliases(conn, person_id, canonical_name)
                 conn.commit()
+            bump_identity_version()
 
         return person_id  # type: ignore[return-value]
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
-def _safe_add_alias(conn: sqlite3.Connection, person_id: int, alias: str) -> None:
-    """Add an alias within an existing connection, ignoring duplicates."""
+def _safe_add_alias(conn: sqlite3.Connection, person_id: int, alias: str) -> bool:
+    """Add an alias within an existing connection, ignoring duplicates.
+
+    Returns:
+        True if a new alias row was inserted
+    """
     script = _detect_script(alias)
     try:
-        conn.execute(
+        cursor = conn.execute(
             """INSERT OR IGNORE INTO person_aliases (person_id, alias, script, source)
                VALUES (?, ?, ?, ?)""",
             (person_id, alias, script, "auto"),
         )
+        return cursor.rowcount > 0
     except sqlite3.IntegrityError:
-        pass
+        return False
 
 
 def _auto_create_aliases(
@@ -719,7 +841,7 @@ def get_person(person_id: int) -> Optional[Dict[str, Any]]:
 
         return person
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def _compute_display_name(canonical_name: str, aliases: List[Dict[str, Any]]) -> str:
@@ -790,7 +912,7 @@ def get_person_by_name(name: str) -> Optional[Dict[str, Any]]:
 
         return None
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def get_person_by_whatsapp_id(whatsapp_id: str) -> Optional[Dict[str, Any]]:
@@ -811,7 +933,7 @@ def get_person_by_whatsapp_id(whatsapp_id: str) -> Optional[Dict[str, Any]]:
             return get_person(row["id"])
         return None
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def delete_person(person_id: int) -> bool:
@@ -827,9 +949,13 @@ def delete_person(person_id: int) -> bool:
     try:
         cursor = conn.execute("DELETE FROM persons WHERE id = ?", (person_id,))
         conn.commit()
-        return cursor.rowcount > 0
+        if cursor.rowcount > 0:
+            bump_identity_version()
+            bump_relationship_version()
+            return True
+        return False
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def rename_person(person_id: int, new_name: str) -> Optional[str]:
@@ -868,10 +994,11 @@ def rename_person(person_id: int, new_name: str) -> Optional[str]:
             (new_name, person_id),
         )
         conn.commit()
+        bump_identity_version()
         logger.info(f"Renamed person {person_id} to '{new_name}'")
         return new_name
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 # ---------------------------------------------------------------------------
@@ -900,15 +1027,18 @@ def add_alias(
 
     conn = _get_connection()
     try:
-        conn.execute(
+        cursor = conn.execute(
             """INSERT OR IGNORE INTO person_aliases (person_id, alias, script, source)
                VALUES (?, ?, ?, ?)""",
             (person_id, alias, script, source),
         )
         conn.commit()
-        return conn.total_changes > 0
+        added = cursor.rowcount > 0
+        if added:
+            bump_identity_version()
+        return added
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def resolve_name(name: str, exact_only: bool = False) -> List[Dict[str, Any]]:
@@ -987,7 +1117,7 @@ def resolve_name(name: str, exact_only: bool = False) -> List[Dict[str, Any]]:
 
         return results
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def search_persons(query: str, limit: int = 20) -> List[Dict[str, Any]]:
@@ -1044,7 +1174,7 @@ def search_persons(query: str, limit: int = 20) -> List[Dict[str, Any]]:
 
         return sorted(results, key=lambda p: p["canonical_name"])
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 # ---------------------------------------------------------------------------
@@ -1108,7 +1238,7 @@ def set_fact(
         )
         conn.commit()
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def get_fact(person_id: int, key: str) -> Optional[str]:
@@ -1129,7 +1259,7 @@ def get_fact(person_id: int, key: str) -> Optional[str]:
         ).fetchone()
         return row["fact_value"] if row else None
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def get_all_facts(person_id: int) -> Dict[str, str]:
@@ -1149,7 +1279,7 @@ def get_all_facts(person_id: int) -> Dict[str, str]:
         ).fetchall()
         return {r["fact_key"]: r["fact_value"] for r in rows}
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def delete_fact(person_id: int, fact_key: str) -> bool:
@@ -1176,7 +1306,7 @@ def delete_fact(person_id: int, fact_key: str) -> bool:
         conn.commit()
         return cursor.rowcount > 0
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def delete_alias(alias_id: int) -> bool:
@@ -1195,9 +1325,12 @@ def delete_alias(alias_id: int) -> bool:
             (alias_id,),
         )
         conn.commit()
-        return cursor.rowcount > 0
+        if cursor.rowcount > 0:
+            bump_identity_version()
+            return True
+        return False
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 # ---------------------------------------------------------------------------
@@ -1225,16 +1358,19 @@ def add_relationship(
     """
     conn = _get_connection()
     try:
-        conn.execute(
+        cursor = conn.execute(
             """INSERT OR IGNORE INTO person_relationships
                (person_id, related_person_id, relationship_type, confidence, source_ref)
                VALUES (?, ?, ?, ?, ?)""",
             (person_id, related_person_id, relationship_type, confidence, source_ref),
         )
         conn.commit()
-        return conn.total_changes > 0
+        added = cursor.rowcount > 0
+        if added:
+            bump_relationship_version()
+        return added
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def get_relationships(person_id: int) -> List[Dict[str, Any]]:
@@ -1258,12 +1394,32 @@ def get_relationships(person_id: int) -> List[Dict[str, Any]]:
         ).fetchall()
         return [dict(r) for r in rows]
     finally:
-        conn.close()
+        _release_connection(conn)
+
+
+def get_all_relationship_edges() -> List[Tuple[int, int, str]]:
+    """Get every relationship edge in a single query.
+
+    Used to build the in-memory adjacency lists in relationship_graph.py.
+
+    Returns:
+        List of (person_id, related_person_id, relationship_type) tuples
+    """
+    conn = _get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT person_id, related_person_id, relationship_type "
+            "FROM person_relationships"
+        ).fetchall()
+        return [(r[0], r[1], r[2]) for r in rows]
+    finally:
+        _release_connection(conn)
 
 
 def expand_person_ids_with_relationships(
     person_ids: List[int],
     max_depth: int = 1,
+    relationship_types: Optional[Iterable[str]] = None,
 ) -> List[int]:
     """Expand a list of person IDs by traversing relationships.
 
@@ -1273,50 +1429,81 @@ def expand_person_ids_with_relationships(
     Useful for queries like "tell me about Shiran's family" where we
     want to also retrieve assets belonging to related persons.
 
+    Relationships are followed in both directions.  The traversal runs
+    against the cached adjacency lists from relationship_graph.py; when
+    the relationship version is unavailable (no Redis) it falls back to a
+    single recursive CTE instead of per-person queries.
+
     Args:
         person_ids: Starting person IDs
         max_depth: How many relationship hops to follow (default: 1)
+        relationship_types: Only follow edges of these types
+            (case-insensitive); None follows every type
 
     Returns:
-        Expanded list of person IDs (includes originals + related)
+        Expanded list of person IDs (originals first, then related
+        persons in hop order)
     """
     if not person_ids or max_depth < 1:
         return list(person_ids)
 
+    from relationship_graph import get_relationship_graph, normalize_types
+
+    types = normalize_types(relationship_types)
+    graph = get_relationship_graph()
+    if graph is not None:
+        return graph.expand(person_ids, max_depth=max_depth, relationship_types=types)
+    return _expand_with_cte(person_ids, max_depth, types)
+
+
+def _expand_with_cte(
+    person_ids: List[int],
+    max_depth: int,
+    relationship_types: Optional[FrozenSet[str]],
+) -> List[int]:
+    """Multi-hop expansion in one recursive query (uncached fallback)."""
+    seeds = list(dict.fromkeys(person_ids))
+    if relationship_types is not None and not relationship_types:
+        return seeds
+
+    type_clause = ""
+    type_params: List[Any] = []
+    if relationship_types is not None:
+        type_clause = (
+            "WHERE LOWER(relationship_type) IN "
+            f"({','.join('?' for _ in relationship_types)})"
+        )
+        type_params = sorted(relationship_types)
+
+    seed_placeholders = ",".join("?" for _ in seeds)
+    sql = f"""
+        WITH RECURSIVE
+          edges(src, dst) AS (
+            SELECT person_id, related_person_id FROM person_relationships {type_clause}
+            UNION ALL
+            SELECT related_person_id, person_id FROM person_relationships {type_clause}
+          ),
+          walk(id, depth) AS (
+            SELECT id, 0 FROM persons WHERE id IN ({seed_placeholders})
+            UNION
+            SELECT e.dst, w.depth + 1
+            FROM walk w JOIN edges e ON e.src = w.id
+            WHERE w.depth < ?
+          )
+        SELECT id, MIN(depth) AS hops FROM walk GROUP BY id ORDER BY hops, id
+    """
+    params = [*type_params, *type_params, *seeds, max_depth]
+
     conn = _get_connection()
     try:
-        expanded: set = set(person_ids)
-        frontier = set(person_ids)
-
-        for _ in range(max_depth):
-            if not frontier:
-                break
-            next_frontier: set = set()
-            for pid in frontier:
-                rows = conn.execute(
-                    "SELECT related_person_id FROM person_relationships WHERE person_id = ?",
-                    (pid,),
-                ).fetchall()
-                for r in rows:
-                    rid = r["related_person_id"]
-                    if rid not in expanded:
-                        expanded.add(rid)
-                        next_frontier.add(rid)
-                # Also check reverse relationships
-                rows_rev = conn.execute(
-                    "SELECT person_id FROM person_relationships WHERE related_person_id = ?",
-                    (pid,),
-                ).fetchall()
-                for r in rows_rev:
-                    rid = r["person_id"]
-                    if rid not in expanded:
-                        expanded.add(rid)
-                        next_frontier.add(rid)
-            frontier = next_frontier
-
-        return list(expanded)
+        rows = conn.execute(sql, params).fetchall()
     finally:
-        conn.close()
+        _release_connection(conn)
+
+    expanded = dict.fromkeys(seeds)
+    for row in rows:
+        expanded.setdefault(row["id"], None)
+    return list(expanded)
 
 
 # ---------------------------------------------------------------------------
@@ -1369,7 +1556,35 @@ def get_all_persons_summary() -> List[Dict[str, Any]]:
 
         return results
     finally:
-        conn.close()
+        _release_connection(conn)
+
+
+def get_all_person_names() -> Dict[int, List[str]]:
+    """Get every person's canonical name and aliases in a single query.
+
+    Lightweight alternative to ``get_all_persons_summary()`` for building
+    name-lookup indexes (no facts, no per-person queries).
+
+    Returns:
+        Dict of person_id → [canonical_name, alias, alias, ...]
+    """
+    conn = _get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT p.id, p.canonical_name, a.alias "
+            "FROM persons p LEFT JOIN person_aliases a ON a.person_id = p.id "
+            "ORDER BY p.id"
+        ).fetchall()
+        names: Dict[int, List[str]] = {}
+        for row in rows:
+            entry = names.get(row["id"])
+            if entry is None:
+                entry = names[row["id"]] = [row["canonical_name"]]
+            if row["alias"]:
+                entry.append(row["alias"])
+        return names
+    finally:
+        _release_connection(conn)
 
 
 def get_person_context(name: str) -> Optional[str]:
@@ -1467,7 +1682,7 @@ def get_all_facts_global(
             ).fetchall()
         return [dict(r) for r in rows]
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def get_fact_keys() -> List[str]:
@@ -1483,7 +1698,7 @@ def get_fact_keys() -> List[str]:
         ).fetchall()
         return [r["fact_key"] for r in rows]
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def get_stats() -> Dict[str, int]:
@@ -1507,7 +1722,7 @@ def get_stats() -> Dict[str, int]:
             "person_assets": assets,
         }
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 # ---------------------------------------------------------------------------
@@ -1573,7 +1788,7 @@ def seed_from_whatsapp_contacts(contacts: List[Dict[str, Any]]) -> Dict[str, int
             else:
                 created += 1
         finally:
-            conn.close()
+            _release_connection(conn)
 
         # get_or_create_person handles upsert logic
         person_id = get_or_create_person(
@@ -1813,6 +2028,8 @@ def merge_persons(
                 )
 
         conn.commit()
+        bump_identity_version()
+        bump_relationship_version()
 
         # Read final display name
         final_row = conn.execute(
@@ -1833,7 +2050,7 @@ def merge_persons(
             "display_name": final_name,
         }
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def find_merge_candidates(limit: int = 50) -> List[Dict[str, Any]]:
@@ -1937,7 +2154,7 @@ def find_merge_candidates(limit: int = 50) -> List[Dict[str, Any]]:
 
         return candidates[:limit]
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def _find_name_similarity_candidates(
@@ -2139,7 +2356,7 @@ def get_graph_data(limit: int = 100) -> Dict[str, Any]:
 
         return {"nodes": nodes, "edges": edges}
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def get_full_graph_data(
@@ -2336,7 +2553,7 @@ def get_full_graph_data(
 
         return {"nodes": nodes, "edges": edges}
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def cleanup_garbage_persons() -> Dict[str, Any]:
@@ -2369,13 +2586,15 @@ def cleanup_garbage_persons() -> Dict[str, Any]:
                 garbage_ids,
             )
             conn.commit()
+            bump_identity_version()
+            bump_relationship_version()
 
         logger.info(
             f"Identity cleanup: removed {len(garbage_ids)} garbage persons"
         )
         return {"deleted": len(garbage_ids), "names": garbage_names}
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 # ---------------------------------------------------------------------------
@@ -2408,16 +2627,16 @@ def link_person_asset(
     """
     conn = _get_connection()
     try:
-        conn.execute(
+        cursor = conn.execute(
             """INSERT OR IGNORE INTO person_assets
                (person_id, asset_type, asset_ref, role, confidence)
                VALUES (?, ?, ?, ?, ?)""",
             (person_id, asset_type, asset_ref, role, confidence),
         )
         conn.commit()
-        return conn.total_changes > 0
+        return cursor.rowcount > 0
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def link_persons_to_asset(
@@ -2447,19 +2666,19 @@ def link_persons_to_asset(
         created = 0
         for pid in person_ids:
             try:
-                conn.execute(
+                cursor = conn.execute(
                     """INSERT OR IGNORE INTO person_assets
                        (person_id, asset_type, asset_ref, role, confidence)
                        VALUES (?, ?, ?, ?, ?)""",
                     (pid, asset_type, asset_ref, role, confidence),
                 )
-                created += conn.total_changes
+                created += cursor.rowcount
             except sqlite3.IntegrityError:
                 pass
         conn.commit()
         return created
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def get_person_asset_refs(
@@ -2497,7 +2716,7 @@ def get_person_asset_refs(
         rows = conn.execute(query, params).fetchall()
         return [dict(r) for r in rows]
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def get_asset_person_ids(asset_ref: str) -> List[Dict[str, Any]]:
@@ -2521,7 +2740,7 @@ def get_asset_person_ids(asset_ref: str) -> List[Dict[str, Any]]:
         ).fetchall()
         return [dict(r) for r in rows]
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def get_person_asset_count(person_id: int) -> Dict[str, int]:
@@ -2543,7 +2762,7 @@ def get_person_asset_count(person_id: int) -> Dict[str, int]:
         ).fetchall()
         return {r["asset_type"]: r["cnt"] for r in rows}
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def delete_person_asset(person_id: int, asset_ref: str, role: Optional[str] = None) -> bool:
@@ -2572,7 +2791,7 @@ def delete_person_asset(person_id: int, asset_ref: str, role: Optional[str] = No
         conn.commit()
         return cursor.rowcount > 0
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 # ---------------------------------------------------------------------------
@@ -2604,16 +2823,16 @@ def link_assets(
     """
     conn = _get_connection()
     try:
-        conn.execute(
+        cursor = conn.execute(
             """INSERT OR IGNORE INTO asset_asset_edges
                (src_asset_ref, dst_asset_ref, relation_type, confidence, provenance)
                VALUES (?, ?, ?, ?, ?)""",
             (src_asset_ref, dst_asset_ref, relation_type, confidence, provenance),
         )
         conn.commit()
-        return conn.total_changes > 0
+        return cursor.rowcount > 0
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def link_assets_batch(
@@ -2638,7 +2857,7 @@ def link_assets_batch(
         created = 0
         for edge in edges:
             try:
-                conn.execute(
+                cursor = conn.execute(
                     """INSERT OR IGNORE INTO asset_asset_edges
                        (src_asset_ref, dst_asset_ref, relation_type, confidence, provenance)
                        VALUES (?, ?, ?, ?, ?)""",
@@ -2650,13 +2869,13 @@ def link_assets_batch(
                         edge.get("provenance"),
                     ),
                 )
-                created += conn.total_changes
+                created += cursor.rowcount
             except (sqlite3.IntegrityError, KeyError):
                 pass
         conn.commit()
         return created
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def get_asset_neighbors(
@@ -2721,7 +2940,7 @@ def get_asset_neighbors(
 
         return results
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def get_thread_members(
@@ -2752,7 +2971,7 @@ def get_thread_members(
         ).fetchall()
         return [r["asset_ref"] for r in rows]
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def delete_asset_edge(
@@ -2785,7 +3004,7 @@ def delete_asset_edge(
         conn.commit()
         return cursor.rowcount > 0
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def get_asset_edge_stats() -> Dict[str, int]:
@@ -2804,7 +3023,7 @@ def get_asset_edge_stats() -> Dict[str, int]:
         ).fetchall()
         return {r["relation_type"]: r["cnt"] for r in rows}
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 # ---------------------------------------------------------------------------
@@ -2831,7 +3050,7 @@ def check_extracted(source_ref: str) -> Optional[int]:
         ).fetchone()
         return row["facts_stored"] if row else None
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 def mark_extracted(
@@ -2864,7 +3083,7 @@ def mark_extracted(
         )
         conn.commit()
     finally:
-        conn.close()
+        _release_connection(conn)
 
 
 # ---------------------------------------------------------------------------
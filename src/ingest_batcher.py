@@ -0,0 +1,509 @@
+"""Micro-batched ingestion queue in front of ``LlamaIndexRAG.ingest_nodes``.
+
+Every WhatsApp message used to go through ``ingest_nodes([node])`` on its
+own — one embedding API call, one Qdrant upsert and one sparse
+``update_vectors`` call per message.  Under a busy group that becomes the
+throughput ceiling.
+
+The callers (``add_message`` from ``tasks.whatsapp`` and the chunk-buffer
+flush from ``tasks.rag``) run in Celery prefork children, one task per
+process, so coalescing has to happen across processes.  ``IngestBatcher``
+does that through Redis:
+
+- Callers serialize their nodes onto a shared Redis list
+  (``rag:ingest_batcher:queue``) and wait for their per-node results on a
+  result list of their own (``rag:ingest_batcher:result:<request>``).
+- Whichever waiting caller takes the flush lock becomes the flusher: it
+  waits until ``max_batch_size`` nodes are queued or the oldest one has
+  waited ``window_ms`` milliseconds, pops the batch and ingests it with one
+  ``flush_fn`` call (``ingest_nodes``) — one batched embedding request, one
+  dense upsert and one sparse ``update_vectors`` request.  It then pushes
+  an :class:`IngestResult` to each node's owner and releases the lock.
+- When a batch fails, the nodes that did not reach the vector store are
+  retried one by one so a single bad node cannot fail its neighbours.
+- Waiting callers retry the lock every ``poll_interval`` seconds, so a
+  flusher that dies only delays the queue until its lock expires.  Nodes it
+  had already popped are lost; their callers get a timeout result.
+- A caller that times out (or hits a Redis error) withdraws its nodes
+  that are still queued before reporting them as failed, so a retry of the
+  same message cannot be ingested twice.
+
+Metrics (queue depth, batch size, flush latency) are kept per process for
+the batches it flushed and mirrored to a Redis hash so they can be read
+from any process.
+
+Usage::
+
+    batcher = IngestBatcher(
+        rag.ingest_nodes,
+        encode_fn=lambda node: node.to_json(),
+        decode_fn=TextNode.from_json,
+        window_ms=50,
+        max_batch_size=64,
+    )
+    results = batcher.ingest([node])
+    if not results[0].ok:
+        logger.warning(results[0].error)
+"""
+
+import json
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from utils.logger import logger
+from utils.redis_conn import get_redis_client
+
+
+QUEUE_KEY = "rag:ingest_batcher:queue"
+LOCK_KEY = "rag:ingest_batcher:lock"
+RESULT_KEY_PREFIX = "rag:ingest_batcher:result:"
+# Redis hash holding aggregate batcher metrics across all processes
+METRICS_KEY = "rag:ingest_batcher:metrics"
+
+LOCK_TTL_MS = 30_000  # refreshed after every batch
+RESULT_TTL = 300  # seconds a result list outlives an abandoned caller
+MAX_BATCHES_PER_TURN = 8  # batches one flusher drains before handing over
+
+# Delete the flush lock only if this flusher still holds it.
+# KEYS[1] = lock, ARGV[1] = token
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass
+class IngestResult:
+    """Outcome of ingesting a single node through the batcher."""
+
+    node_id: str
+    ok: bool
+    error: Optional[str] = None
+    batch_size: int = 0
+
+
+class IngestBatcher:
+    """Cross-process coalescing queue that flushes nodes in batches."""
+
+    def __init__(
+        self,
+        flush_fn: Callable[[List[Any]], int],
+        encode_fn: Callable[[Any], str],
+        decode_fn: Callable[[str], Any],
+        window_ms: int = 50,
+        max_batch_size: int = 64,
+        result_timeout: float = 120.0,
+        poll_interval: float = 0.5,
+        stored_fn: Optional[Callable[[List[str]], Set[str]]] = None,
+    ) -> None:
+        """Initialize the batcher.
+
+        Args:
+            flush_fn: Callable that ingests a list of nodes and returns the
+                number of nodes successfully ingested (``ingest_nodes``).
+            encode_fn: Serializes a node to a string for the Redis queue.
+            decode_fn: Rebuilds a node from ``encode_fn`` output in the
+                flushing process.
+            window_ms: Max time the oldest queued node may wait before
+                its batch is flushed.
+            max_batch_size: Flush as soon as this many nodes are queued.
+            result_timeout: Seconds a caller waits for its result before
+                giving up (the node may still be ingested afterwards).
+            poll_interval: Seconds a waiting caller blocks on its result
+                list before trying to take over the flush.
+            stored_fn: Returns which of the given node IDs are in the
+                vector store; after a partial failure only the others are
+                retried.  Without it every node of the batch is retried.
+        """
+        self._flush_fn = flush_fn
+        self._encode_fn = encode_fn
+        self._decode_fn = decode_fn
+        self._stored_fn = stored_fn
+        self.window_ms = max(0, int(window_ms))
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.result_timeout = result_timeout
+        self.poll_interval = max(0.01, poll_interval)
+        self._release_script: Any = None
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, float] = {
+            "batches": 0,
+            "nodes": 0,
+            "failed_nodes": 0,
+            "flush_ms_total": 0.0,
+            "last_batch_size": 0,
+            "last_flush_ms": 0.0,
+            "max_batch_size_seen": 0,
+            "max_queue_depth": 0,
+        }
+
+    # =====================================================================
+    # Public API
+    # =====================================================================
+
+    def ingest(self, nodes: List[Any]) -> List[IngestResult]:
+        """Queue nodes and block until each one has a result.
+
+        The calling thread flushes batches itself (its own nodes and other
+        callers') whenever no other process holds the flush lock.
+
+        Once the nodes are queued this never raises: errors and timeouts
+        become failed results.  Before giving up, nodes still waiting in the
+        queue are withdrawn, and nodes a flusher already took are waited for
+        while its lock lives, so a failed result never hides a node that
+        will still be ingested.
+
+        Args:
+            nodes: TextNode instances to ingest
+
+        Returns:
+            One :class:`IngestResult` per node, in input order
+
+        Raises:
+            Exception: If the nodes could not be queued (nothing was queued)
+        """
+        if not nodes:
+            return []
+
+        redis = get_redis_client()
+        request_id = uuid.uuid4().hex
+        result_key = f"{RESULT_KEY_PREFIX}{request_id}"
+        enqueued_at = time.time()
+        entries = [
+            json.dumps({
+                "request": request_id,
+                "index": i,
+                "enqueued_at": enqueued_at,
+                "node": self._encode_fn(node),
+            })
+            for i, node in enumerate(nodes)
+        ]
+        depth = redis.rpush(QUEUE_KEY, *entries)
+        with self._lock:
+            if depth > self._metrics["max_queue_depth"]:
+                self._metrics["max_queue_depth"] = depth
+
+        results: Dict[int, IngestResult] = {}
+        error = f"Timed out after {self.result_timeout}s waiting for batch flush"
+        try:
+            self._collect_results(result_key, len(nodes), results, self.result_timeout, lead=True)
+        except Exception as e:
+            logger.warning(f"Ingest batcher failed while waiting for results: {e}")
+            error = f"Ingest batcher failed: {e}"
+
+        if len(results) < len(nodes):
+            error = self._withdraw(entries, result_key, results, error)
+        try:
+            redis.delete(result_key)
+        except Exception:
+            pass  # Expires after RESULT_TTL
+
+        return [
+            results.get(i) or IngestResult(
+                node_id=getattr(node, "id_", ""),
+                ok=False,
+                error=error,
+            )
+            for i, node in enumerate(nodes)
+        ]
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of nodes currently waiting in the shared queue."""
+        try:
+            return int(get_redis_client().llen(QUEUE_KEY))
+        except Exception:
+            return 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return metrics for the batches flushed by this process.
+
+        Returns:
+            Dict with queue depth, batch size and flush latency figures
+        """
+        with self._lock:
+            m = dict(self._metrics)
+        batches = int(m["batches"])
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": int(m["max_queue_depth"]),
+            "batches": batches,
+            "nodes": int(m["nodes"]),
+            "failed_nodes": int(m["failed_nodes"]),
+            "last_batch_size": int(m["last_batch_size"]),
+            "max_batch_size_seen": int(m["max_batch_size_seen"]),
+            "avg_batch_size": round(m["nodes"] / batches, 2) if batches else 0.0,
+            "last_flush_ms": round(m["last_flush_ms"], 1),
+            "avg_flush_ms": round(m["flush_ms_total"] / batches, 1) if batches else 0.0,
+            "window_ms": self.window_ms,
+            "max_batch_size": self.max_batch_size,
+        }
+
+    # =====================================================================
+    # Waiter internals
+    # =====================================================================
+
+    def _collect_results(
+        self,
+        result_key: str,
+        expected: int,
+        results: Dict[int, IngestResult],
+        timeout: float,
+        lead: bool,
+    ) -> None:
+        """Read results from ``result_key`` into ``results`` until complete or timed out."""
+        redis = get_redis_client()
+        deadline = time.monotonic() + timeout
+        while len(results) < expected:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if lead:
+                self._flush_as_leader()
+            # Drain whatever is already there, then block for the rest
+            item = redis.lpop(result_key)
+            if item is None:
+                popped = redis.blpop([result_key], timeout=min(remaining, self.poll_interval))
+                item = popped[1] if popped else None
+            while item is not None:
+                data = json.loads(item)
+                index = data.pop("index")
+                results[index] = IngestResult(**data)
+                item = redis.lpop(result_key) if len(results) < expected else None
+
+    def _withdraw(
+        self,
+        entries: List[str],
+        result_key: str,
+        results: Dict[int, IngestResult],
+        error: str,
+    ) -> str:
+        """Take unfinished entries back out of the queue before failing them.
+
+        Entries a flusher already popped cannot be withdrawn; their results
+        are awaited for as long as the flush lock is held.
+
+        Returns:
+            The error to report for entries that still have no result
+        """
+        redis = get_redis_client()
+        try:
+            pipe = redis.pipeline(transaction=False)
+            pending = [i for i in range(len(entries)) if i not in results]
+            for i in pending:
+                pipe.lrem(QUEUE_KEY, 1, entries[i])
+            removed = pipe.execute()
+            in_flight = sum(1 for i, n in zip(pending, removed) if not n)
+            while in_flight and redis.exists(LOCK_KEY):
+                before = len(results)
+                self._collect_results(
+                    result_key, len(entries), results, LOCK_TTL_MS / 1000.0, lead=False,
+                )
+                if len(results) == before:
+                    break
+                in_flight -= len(results) - before
+        except Exception as e:
+            logger.warning(f"Could not withdraw queued ingest nodes: {e}")
+            return f"{error} (nodes may still be ingested)"
+        return error
+
+    # =====================================================================
+    # Flusher internals
+    # =====================================================================
+
+    def _flush_as_leader(self) -> None:
+        """Flush queued batches if no other process holds the flush lock."""
+        redis = get_redis_client()
+        token = uuid.uuid4().hex
+        if not redis.set(LOCK_KEY, token, nx=True, px=LOCK_TTL_MS):
+            return
+        try:
+            for _ in range(MAX_BATCHES_PER_TURN):
+                self._wait_for_batch()
+                batch = self._take_batch()
+                if not batch:
+                    return
+                self._process_batch(batch)
+                redis.pexpire(LOCK_KEY, LOCK_TTL_MS)
+        finally:
+            try:
+                if self._release_script is None:
+                    self._release_script = redis.register_script(_RELEASE_LUA)
+                self._release_script(keys=[LOCK_KEY], args=[token])
+            except Exception as e:
+                logger.debug(f"Failed to release ingest flush lock (expires on its own): {e}")
+
+    def _wait_for_batch(self) -> None:
+        """Sleep until the queue holds a full batch or its head's window closed."""
+        redis = get_redis_client()
+        window = self.window_ms / 1000.0
+        while True:
+            pipe = redis.pipeline(transaction=False)
+            pipe.llen(QUEUE_KEY)
+            pipe.lindex(QUEUE_KEY, 0)
+            depth, head = pipe.execute()
+            if not head or depth >= self.max_batch_size:
+                return
+            remaining = json.loads(head)["enqueued_at"] + window - time.time()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        """Atomically pop up to ``max_batch_size`` queued entries."""
+        pipe = get_redis_client().pipeline()
+        pipe.lrange(QUEUE_KEY, 0, self.max_batch_size - 1)
+        pipe.ltrim(QUEUE_KEY, self.max_batch_size, -1)
+        raw, _ = pipe.execute()
+        return [json.loads(item) for item in raw]
+
+    def _process_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """Ingest a batch and push each node's result to its caller."""
+        start = time.monotonic()
+        outcomes: List[Optional[Tuple[bool, Optional[str]]]] = [None] * len(batch)
+        nodes: List[Any] = []
+        positions: List[int] = []
+        for pos, entry in enumerate(batch):
+            try:
+                nodes.append(self._decode_fn(entry["node"]))
+                positions.append(pos)
+            except Exception as e:
+                outcomes[pos] = (False, f"Could not decode queued node: {e}")
+
+        for pos, outcome in zip(positions, self._ingest_batch(nodes)):
+            outcomes[pos] = outcome
+
+        elapsed_ms = (time.monotonic() - start) * 1000
+        failed = sum(1 for outcome in outcomes if not outcome or not outcome[0])
+        self._record_metrics(len(batch), failed, elapsed_ms)
+        logger.debug(
+            f"Ingest batch flushed: {len(batch)} nodes, {failed} failed, "
+            f"{elapsed_ms:.0f}ms"
+        )
+
+        node_ids = {pos: getattr(node, "id_", "") for pos, node in zip(positions, nodes)}
+        pipe = get_redis_client().pipeline(transaction=False)
+        for pos, entry in enumerate(batch):
+            ok, err = outcomes[pos] or (False, "Ingestion failed")
+            result_key = f"{RESULT_KEY_PREFIX}{entry['request']}"
+            pipe.rpush(result_key, json.dumps(dict(
+                asdict(IngestResult(
+                    node_id=node_ids.get(pos, ""),
+                    ok=ok,
+                    error=err,
+                    batch_size=len(batch),
+                )),
+                index=entry["index"],
+            )))
+            pipe.expire(result_key, RESULT_TTL)
+        pipe.execute()
+
+    def _ingest_batch(self, nodes: List[Any]) -> List[Tuple[bool, Optional[str]]]:
+        """Ingest nodes together; isolate failures by retrying missing ones alone."""
+        if not nodes:
+            return []
+        error: Optional[str] = None
+        try:
+            count = self._flush_fn(nodes)
+        except Exception as e:
+            count = 0
+            error = str(e)
+
+        if count >= len(nodes):
+            return [(True, None)] * len(nodes)
+        if len(nodes) == 1:
+            return [(False, error or "Ingestion returned 0 nodes")]
+
+        # Retry the nodes that did not reach the store individually, so
+        # stored nodes are not embedded twice.
+        stored = self._stored_ids(nodes)
+        logger.warning(
+            f"Batched ingest of {len(nodes)} nodes ingested {count} "
+            f"({error or 'partial failure'}); retrying "
+            f"{sum(1 for n in nodes if getattr(n, 'id_', '') not in stored)} individually"
+        )
+        outcomes: List[Tuple[bool, Optional[str]]] = []
+        for node in nodes:
+            if getattr(node, "id_", "") in stored:
+                outcomes.append((True, None))
+                continue
+            try:
+                ok = self._flush_fn([node]) >= 1
+                outcomes.append((ok, None if ok else "Ingestion returned 0 nodes"))
+            except Exception as e:
+                outcomes.append((False, str(e)))
+        return outcomes
+
+    def _stored_ids(self, nodes: List[Any]) -> Set[str]:
+        """IDs of the given nodes already in the store (empty if unknown)."""
+        if self._stored_fn is None:
+            return set()
+        try:
+            return self._stored_fn([getattr(node, "id_", "") for node in nodes])
+        except Exception as e:
+            logger.debug(f"Stored-node lookup failed, retrying the whole batch: {e}")
+            return set()
+
+    def _record_metrics(self, batch_size: int, failed: int, elapsed_ms: float) -> None:
+        """Update in-process counters and mirror them to Redis."""
+        with self._lock:
+            m = self._metrics
+            m["batches"] += 1
+            m["nodes"] += batch_size
+            m["failed_nodes"] += failed
+            m["flush_ms_total"] += elapsed_ms
+            m["last_batch_size"] = batch_size
+            m["last_flush_ms"] = elapsed_ms
+            if batch_size > m["max_batch_size_seen"]:
+                m["max_batch_size_seen"] = batch_size
+
+        try:
+            redis = get_redis_client()
+            pipe = redis.pipeline(transaction=False)
+            pipe.hincrby(METRICS_KEY, "batches", 1)
+            pipe.hincrby(METRICS_KEY, "nodes", batch_size)
+            pipe.hincrby(METRICS_KEY, "failed_nodes", failed)
+            pipe.hincrbyfloat(METRICS_KEY, "flush_ms_total", round(elapsed_ms, 3))
+            pipe.hset(METRICS_KEY, mapping={
+                "last_batch_size": batch_size,
+                "last_flush_ms": round(elapsed_ms, 1),
+                "last_queue_depth": redis.llen(QUEUE_KEY),
+                "last_flush_at": int(time.time()),
+            })
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"Failed to publish ingest batcher metrics (non-critical): {e}")
+
+
+def get_global_metrics() -> Dict[str, Any]:
+    """Read the aggregate batcher metrics mirrored to Redis by all processes.
+
+    Returns:
+        Dict with totals and averages, or an empty dict if unavailable
+    """
+    try:
+        raw = get_redis_client().hgetall(METRICS_KEY) or {}
+    except Exception as e:
+        logger.debug(f"Failed to read ingest batcher metrics: {e}")
+        return {}
+    if not raw:
+        return {}
+
+    batches = int(raw.get("batches", 0) or 0)
+    nodes = int(raw.get("nodes", 0) or 0)
+    flush_ms_total = float(raw.get("flush_ms_total", 0) or 0)
+    return {
+        "batches": batches,
+        "nodes": nodes,
+        "failed_nodes": int(raw.get("failed_nodes", 0) or 0),
+        "avg_batch_size": round(nodes / batches, 2) if batches else 0.0,
+        "avg_flush_ms": round(flush_ms_total / batches, 1) if batches else 0.0,
+        "last_batch_size": int(raw.get("last_batch_size", 0) or 0),
+        "last_flush_ms": float(raw.get("last_flush_ms", 0) or 0),
+        "last_queue_depth": int(raw.get("last_queue_depth", 0) or 0),
+        "last_flush_at": int(raw.get("last_flush_at", 0) or 0),
+    }
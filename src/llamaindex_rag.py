@@ -11,16 +11,23 @@ Paperless-NG, etc.) via the plugin architecture.
 Qdrant Dashboard: http://localhost:6333/dashboard
 """
 
+import functools
 import hashlib
 import json
 import os
+import threading
+import time
 import uuid
-from datetime import datetime
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Mapping, Optional
 from zoneinfo import ZoneInfo
 
 if TYPE_CHECKING:
+    from ingest_batcher import IngestBatcher, IngestResult
+    from message_dedup import MessageDedupIndex
     from models.base import BaseRAGDocument
+    from rag_stats import RagStatsService
 
 from llama_index.core import (
     Settings,
@@ -66,6 +73,7 @@ from qdrant_client.models import (
 from config import settings
 from utils.logger import logger
 from utils.redis_conn import get_redis_client
+from query_embedding_cache import get_query_embedding
 
 
 def deterministic_node_id(source: str, source_id: str, chunk_index: int = 0) -> str:
@@ -108,6 +116,33 @@ def format_timestamp(timestamp: str, timezone: str = "") -> str:
         return str(timestamp)
 
 
+# Shared thread pool for concurrent retrieval stages (see ArchiveRetriever._retrieve)
+_retrieval_pool: Optional[ThreadPoolExecutor] = None
+_retrieval_pool_lock = threading.Lock()
+
+
+def _get_retrieval_pool() -> ThreadPoolExecutor:
+    """Get or create the shared retrieval stage thread pool."""
+    global _retrieval_pool
+    if _retrieval_pool is None:
+        with _retrieval_pool_lock:
+            if _retrieval_pool is None:
+                _retrieval_pool = ThreadPoolExecutor(
+                    max_workers=int(settings.get("rag_retrieval_max_workers", "8")),
+                    thread_name_prefix="rag-retrieval",
+                )
+    return _retrieval_pool
+
+
+def _stage_result(future: Future, default: Any, label: str) -> Any:
+    """Wait for a retrieval stage and return its result, or ``default`` on failure."""
+    try:
+        return future.result()
+    except Exception as e:
+        logger.debug(f"Retrieval stage '{label}' failed (non-critical): {e}")
+        return default
+
+
 class ArchiveRetriever(BaseRetriever):
     """Custom retriever that wraps existing hybrid search with metadata filters.
     
@@ -188,7 +223,7 @@ class ArchiveRetriever(BaseRetriever):
             and resolved person IDs
         """
         try:
-            import identity_db
+            from alias_index import get_alias_index
             from identity import Identity
             from datetime import datetime
             from zoneinfo import ZoneInfo
@@ -196,70 +231,28 @@ class ArchiveRetriever(BaseRetriever):
             # Tokenize query to find person name tokens
             tokens = LlamaIndexRAG._tokenize_query(query)
             if not tokens:
-                return []
+                return [], []
             
             injected = []
-            seen_person_ids: set = set()
-            consumed_tokens: set = set()  # Tokens already resolved via n-gram match
-            
-            # Phase 1: Try multi-word combinations (n-grams) as full names.
-            # This ensures "שירן וינטרוב" resolves to a single person via
-            # exact match before individual tokens like "שירן" are tried
-            # (which could match multiple persons via LIKE).
-            # Uses two strategies:
-            #   a) Identity.get_by_name() — exact canonical/alias match
-            #   b) resolve_name() — if exactly 1 result, unambiguous match
-            # Strategy (b) handles bilingual canonical names like
-            # "Shiran Waintrob / שירן וינטרוב" where the Hebrew n-gram
-            # won't exact-match but will LIKE-match uniquely.
-            for n in range(min(4, len(tokens)), 1, -1):  # 4-gram, 3-gram, 2-gram
-                for i in range(len(tokens) - n + 1):
-                    ngram_tokens = tokens[i:i + n]
-                    # Skip if any component token was already consumed
-                    if any(t.lower() in consumed_tokens for t in ngram_tokens):
-                        continue
-                    ngram = " ".join(ngram_tokens)
-                    
-                    # Strategy (a): exact canonical/alias match
-                    ident = Identity.get_by_name(ngram)
-                    pid = ident.id if ident else None
-                    
-                    # Strategy (b): resolve_name — accept only if exactly 1 match
-                    # (unambiguous). Multiple matches → skip, let Phase 2 handle.
-                    if pid is None:
-                        matches = identity_db.resolve_name(ngram)
-                        if len(matches) == 1:
-                            pid = matches[0]["id"]
-                    
-                    if pid is not None and pid not in seen_person_ids:
-                        seen_person_ids.add(pid)
-                        # Mark component tokens as consumed
-                        for t in ngram_tokens:
-                            consumed_tokens.add(t.lower())
-                        logger.debug(
-                            f"Entity n-gram match: '{ngram}' → person {pid}"
-                        )
             
-            # Phase 2: Fall back to individual token resolution for
-            # tokens not consumed by n-gram matches.
-            # Use exact_only=True to prevent common words like "מה"
-            # from substring-matching names like "שלמה" via LIKE.
-            # Only exact alias/canonical matches are allowed for
-            # single tokens — LIKE is reserved for multi-word Phase 1.
-            for token in tokens:
-                if token.lower() in consumed_tokens:
-                    continue
-                matches = identity_db.resolve_name(token, exact_only=True)
-                for match in matches:
-                    pid = match["id"]
-                    if pid in seen_person_ids:
-                        continue
-                    seen_person_ids.add(pid)
+            # Phases 1+2: Resolve every person mention in one pass over the
+            # compiled alias trie (rebuilt when identity_db bumps the
+            # identity version).  Multi-word n-grams win first, so
+            # "שירן וינטרוב" resolves to a single person via exact match
+            # before individual tokens like "שירן" are tried.  An n-gram
+            # that is not an exact canonical/alias match is accepted only
+            # if it is contained in exactly one canonical name — this
+            # handles bilingual names like "Shiran Waintrob / שירן וינטרוב".
+            # Leftover single tokens only match exact names/aliases, so
+            # common words like "מה" never substring-match names like "שלמה".
+            resolved_ids, mentions = get_alias_index().resolve(tokens)
+            for ngram, pid in mentions:
+                logger.debug(f"Entity n-gram match: '{ngram}' → person {pid}")
             
             # Phase 3: Build identity fact nodes for ALL resolved person IDs
             # (from both n-gram and individual token resolution).
             # Uses Identity cache so repeated lookups are free.
-            for pid in seen_person_ids:
+            for pid in resolved_ids:
                 person = Identity.get(pid)
                 if not person:
                     continue
@@ -326,12 +319,81 @@ class ArchiveRetriever(BaseRetriever):
                 # High score so identity facts appear first in context
                 injected.append(NodeWithScore(node=node, score=1.0))
             
-            return injected, list(seen_person_ids)
+            return injected, resolved_ids
         except ImportError:
             return [], []  # entity_db not available
         except Exception:
             return [], []
     
+    def _identity_stage(self, query: str, filter_kwargs: Dict[str, Any]) -> tuple:
+        """Identity branch of the retrieval stage graph.
+        
+        Resolves persons mentioned in the query, builds their fact nodes,
+        and runs the person-scoped supplementary search using the
+        person_ids Qdrant payload filter — catching assets that semantic
+        search missed (e.g., different script spellings).
+        
+        Relationship expansion is intent-gated: related persons (family,
+        colleagues) are only included when the query intent indicates
+        family/team context, preventing over-expansion for simple person
+        queries like "what did Shiran say?".
+        
+        Only depends on the query string, so it runs concurrently with
+        search and rerank.
+        
+        Args:
+            query: The search query string
+            filter_kwargs: Filter kwargs shared with the main search
+            
+        Returns:
+            Tuple of (entity fact nodes, person-scoped results, person IDs searched)
+        """
+        entity_nodes, resolved_person_ids = self._inject_entity_facts(query)
+        if not resolved_person_ids:
+            return entity_nodes, [], []
+        
+        # Classify query intent to control graph expansion depth.
+        # Only expand identity relationships for family/team queries.
+        try:
+            from query_intent import (
+                classify_query_intent,
+                should_expand_relationships,
+            )
+            _intents = classify_query_intent(
+                query,
+                has_resolved_persons=bool(resolved_person_ids),
+            )
+            _expand_rels = should_expand_relationships(_intents)
+            logger.debug(f"Query intents: {[i.value for i in _intents]}")
+        except Exception:
+            _expand_rels = True  # Fallback: always expand (backward compat)
+        
+        expanded_ids = resolved_person_ids
+        if _expand_rels:
+            # Expand all resolved persons at once via the cached
+            # relationship graph (depth and edge types are configurable)
+            try:
+                import identity_db
+                _depth = int(settings.get("rag_relationship_expansion_depth", "1"))
+                _types_raw = settings.get("rag_relationship_expansion_types", "")
+                _types = [t for t in _types_raw.split(",") if t.strip()] or None
+                expanded_ids = sorted(identity_db.expand_person_ids_with_relationships(
+                    resolved_person_ids, max_depth=_depth, relationship_types=_types,
+                ))
+                if len(expanded_ids) > len(resolved_person_ids):
+                    logger.info(
+                        f"Relationship expansion: {resolved_person_ids} → {expanded_ids}"
+                    )
+            except Exception:
+                expanded_ids = resolved_person_ids
+        
+        person_supplement = self._rag._person_scoped_search(
+            person_ids=expanded_ids,
+            k=5,
+            **filter_kwargs,
+        )
+        return entity_nodes, person_supplement, expanded_ids
+    
     def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
         """Retrieve relevant messages/documents using hybrid search.
         
@@ -348,6 +410,11 @@ class ArchiveRetriever(BaseRetriever):
         Reranking before expansion means only high-quality seed results
         get expanded, reducing noise and saving Qdrant queries.
         
+        Independent stages run concurrently: identity resolution overlaps
+        with search + rerank, and steps 3–5 fan out over the reranked seeds.
+        Results are merged in the fixed order above, so the output is
+        deterministic.
+        
         Always returns at least one node so the chat engine's synthesizer
         can generate a proper response (it returns "Empty Response" on empty input).
         
@@ -382,6 +449,36 @@ class ArchiveRetriever(BaseRetriever):
                 results = [NodeWithScore(node=placeholder, score=0.0)]
             return results
         
+        pool = _get_retrieval_pool()
+        
+        # Early budget tracking: compute budget once and skip expansions
+        # if we're already close to the limit, avoiding wasteful Qdrant
+        # queries for context that will just be trimmed away.
+        max_context_chars = self._rag.MAX_CONTEXT_TOKENS * 4  # ~12000 chars default
+        
+        def _current_chars(nodes: List[NodeWithScore]) -> int:
+            return sum(len(getattr(n.node, "text", "") or "") for n in nodes if n.node)
+        
+        # =====================================================================
+        # Stage graph (independent stages run concurrently on a shared pool):
+        #
+        #   search ──► rerank ──┬─► context expansion ────────┐
+        #                       ├─► document chunk expansion ─┤
+        #                       ├─► asset neighborhood ───────┼─► merge ─► trim
+        #                       └─► recency (one per chat) ───┤
+        #   identity facts ──► intent ──► person-scoped search┘
+        #
+        # The identity branch only needs the query string, so it starts
+        # immediately and overlaps with search + rerank.  Expansion stages
+        # only read the reranked seeds.  Pool tasks never wait on other pool
+        # tasks (the caller thread coordinates), so the shared pool cannot
+        # deadlock.  Results are merged in a fixed stage order, so output
+        # does not depend on which stage finishes first.
+        # =====================================================================
+        identity_future = pool.submit(
+            self._identity_stage, query_bundle.query_str, _fkw
+        )
+        
         results = self._rag.search(
             query=query_bundle.query_str,
             k=self._k,
@@ -398,19 +495,13 @@ class ArchiveRetriever(BaseRetriever):
         try:
             cohere_key = settings.get("cohere_api_key", "")
             if cohere_key and results:
-                from llama_index.postprocessor.cohere_rerank import CohereRerank
+                from rerank_cache import rerank_nodes
                 
-                rerank_top_n = int(settings.get("rag_rerank_top_n", "10"))
-                rerank_model = settings.get("rag_rerank_model", "rerank-v3.5")
-                reranker = CohereRerank(
+                results = rerank_nodes(
+                    results,
+                    query_bundle.query_str,
+                    top_n=int(settings.get("rag_rerank_top_n", "10")),
                     api_key=cohere_key,
-                    top_n=rerank_top_n,
-                    model=rerank_model,
-                )
-                pre_rerank = len(results)
-                results = reranker.postprocess_nodes(results, query_bundle)
-                logger.info(
-                    f"Cohere rerank ({rerank_model}): {pre_rerank} → {len(results)} results"
                 )
         except ImportError:
             logger.warning(
@@ -420,76 +511,101 @@ class ArchiveRetriever(BaseRetriever):
         except Exception as e:
             logger.debug(f"Cohere reranking failed (non-critical): {e}")
         
-        # Early budget tracking: compute budget once and skip expansions
-        # if we're already close to the limit, avoiding wasteful Qdrant
-        # queries for context that will just be trimmed away.
-        max_context_chars = self._rag.MAX_CONTEXT_TOKENS * 4  # ~12000 chars default
-        
-        def _current_chars(nodes: List[NodeWithScore]) -> int:
-            return sum(len(getattr(n.node, "text", "") or "") for n in nodes if n.node)
-        
         # =====================================================================
-        # Step 2: Context expansion (on reranked results only)
+        # Steps 2–4: fan out expansions of the reranked seeds concurrently
         # =====================================================================
-        # Fetch surrounding messages from the same chats so that replies
-        # and nearby messages are included as context.
-        if results and _current_chars(results) < max_context_chars * 0.8:
-            results = self._rag.expand_context(results, max_total=self._k * 2)
+        seeds = list(results)
+        expand = bool(seeds) and _current_chars(seeds) < max_context_chars * 0.8
+        
+        # Step 2: Context expansion — surrounding messages from the same
+        # chats so that replies and nearby messages are included.
+        # Step 3: Document chunk expansion — ALL sibling chunks of matched
+        # Paperless documents / call recordings.
+        # Step 3b: Asset neighborhood expansion (parents, attachments,
+        # threads) when asset_neighborhood_expansion_enabled=true.
+        # Step 4: Per-chat recency supplement — recent messages only from
+        # chats that appear in the reranked results, so unrelated recent
+        # messages don't pollute the context.  Chats are visited in sorted
+        # order for deterministic output.
+        #
+        # Context windows (step 2) and per-chat recency (step 4) go to
+        # Qdrant as a single batched request.
+        chat_names_in_results: List[str] = []
+        per_chat_limit = 0
+        if seeds:
+            chat_names_in_results = sorted({
+                nws.node.metadata.get("chat_name")
+                for nws in seeds
+                if nws.node and getattr(nws.node, "metadata", {}).get("chat_name")
+            })
+            per_chat_limit = max(2, self.RECENCY_SUPPLEMENT_COUNT // max(len(chat_names_in_results), 1))
         
-        # =====================================================================
-        # Step 3: Document chunk expansion (on reranked results only)
-        # =====================================================================
-        # When a Paperless document chunk is found, fetch ALL sibling chunks
-        # from the same document so the LLM sees the complete content.
-        if results and _current_chars(results) < max_context_chars * 0.8:
-            results = self._rag.expand_document_chunks(results, max_total=self._k * 3)
+        chats_future = None
+        if expand or chat_names_in_results:
+            chats_future = pool.submit(
+                self._rag.expand_chats_batched,
+                seeds if expand else [],
+                max_total=self._k * 2,
+                recency_chat_names=chat_names_in_results,
+                recency_k=per_chat_limit,
+                recency_filters={
+                    "filter_sender": self._filter_sender,
+                    "filter_days": self._filter_days,
+                    "filter_sources": self._filter_sources,
+                    "filter_date_from": self._filter_date_from,
+                    "filter_date_to": self._filter_date_to,
+                    "filter_content_types": self._filter_content_types,
+                },
+            )
         
-        # =====================================================================
-        # Step 3b: Asset neighborhood expansion (parents, attachments, threads)
-        # =====================================================================
-        # When asset_neighborhood_expansion_enabled=true, follows structural
-        # edges (parent_asset_id, thread_id, attachment_of) to fetch related
-        # assets. This enables cross-channel coherence: a call transcript
-        # chunk can pull in the related email, an attachment pulls in its
-        # parent email body.
-        if results and _current_chars(results) < max_context_chars * 0.8:
-            results = self._rag.expand_asset_neighborhood(results, max_total=self._k * 3)
+        expansion_futures = []
+        if expand:
+            expansion_futures = [
+                (self._k * 3, pool.submit(self._rag.expand_document_chunks, seeds, max_total=self._k * 3)),
+                (self._k * 3, pool.submit(self._rag.expand_asset_neighborhood, seeds, max_total=self._k * 3)),
+            ]
         
         # =====================================================================
-        # Step 4: Per-chat recency supplement
+        # Merge in fixed stage order: seeds → context → document chunks →
+        # asset neighborhood → recency → person-scoped, deduplicated by id.
+        # Each expansion keeps its original max_total cap, and is only merged
+        # while the context is still below 80% of the budget — the same
+        # check the sequential pipeline made before running each stage.
         # =====================================================================
-        # Fetch recent messages only from chats that appear in the
-        # (now reranked) search results.  This prevents unrelated recent
-        # messages from polluting the context.
-        if results:
-            chat_names_in_results: set = set()
-            for nws in results:
-                if nws.node:
-                    cn = getattr(nws.node, "metadata", {}).get("chat_name")
-                    if cn:
-                        chat_names_in_results.add(cn)
-            
-            existing_ids = {nws.node.id_ for nws in results if nws.node}
-            per_chat_limit = max(2, self.RECENCY_SUPPLEMENT_COUNT // max(len(chat_names_in_results), 1))
-            
-            for chat_name in chat_names_in_results:
-                chat_recent = self._rag.recency_search(
-                    k=per_chat_limit,
-                    filter_chat_name=chat_name,
-                    filter_sender=self._filter_sender,
-                    filter_days=self._filter_days,
-                    filter_sources=self._filter_sources,
-                    filter_date_from=self._filter_date_from,
-                    filter_date_to=self._filter_date_to,
-                    filter_content_types=self._filter_content_types,
-                )
-                for nws in chat_recent:
-                    if nws.node and nws.node.id_ not in existing_ids:
-                        # Tag recency supplement nodes for source filtering
-                        meta = getattr(nws.node, "metadata", {})
-                        meta["source_role"] = "recency_supplement"
-                        existing_ids.add(nws.node.id_)
-                        results.append(nws)
+        existing_ids = {nws.node.id_ for nws in results if nws.node}
+        
+        def _append_new(nodes: List[NodeWithScore], cap: Optional[int] = None, role: str = "") -> int:
+            added = 0
+            for nws in nodes:
+                if cap is not None and len(results) >= cap:
+                    break
+                if nws.node and nws.node.id_ not in existing_ids:
+                    if role:
+                        nws.node.metadata["source_role"] = role
+                    existing_ids.add(nws.node.id_)
+                    results.append(nws)
+                    added += 1
+            return added
+        
+        def _within_budget() -> bool:
+            return bool(results) and _current_chars(results) < max_context_chars * 0.8
+        
+        context_results, recency_by_chat = seeds, {}
+        if chats_future is not None:
+            context_results, recency_by_chat = _stage_result(
+                chats_future, (seeds, {}), "context/recency expansion"
+            )
+        if _within_budget():
+            _append_new(context_results, cap=self._k * 2)
+        
+        for cap, future in expansion_futures:
+            expansion = _stage_result(future, seeds, "expansion")
+            if _within_budget():
+                _append_new(expansion, cap=cap)
+        
+        for chat_name in chat_names_in_results:
+            # Tag recency supplement nodes for source filtering
+            _append_new(recency_by_chat.get(chat_name, []), role="recency_supplement")
         
         # =====================================================================
         # Step 5: Identity fact injection + person-scoped search
@@ -497,83 +613,21 @@ class ArchiveRetriever(BaseRetriever):
         # When the query mentions a known person, inject their stored facts
         # as a high-priority context node so the LLM can answer factual
         # questions (age, birth date, etc.) directly.
-        # Also do a supplementary person-scoped search using the person_ids
-        # Qdrant filter for higher-precision results.
-        try:
-            entity_nodes, resolved_person_ids = self._inject_entity_facts(query_bundle.query_str)
-            if entity_nodes:
-                results = entity_nodes + results
-                logger.info(f"Injected {len(entity_nodes)} identity fact node(s)")
-            
-            # Classify query intent to control graph expansion depth.
-            # Only expand identity relationships for family/team queries;
-            # only expand asset neighborhood for thread/attachment queries.
-            try:
-                from query_intent import (
-                    classify_query_intent,
-                    should_expand_relationships,
-                )
-                _intents = classify_query_intent(
-                    query_bundle.query_str,
-                    has_resolved_persons=bool(resolved_person_ids),
-                )
-                _expand_rels = should_expand_relationships(_intents)
-                logger.debug(f"Query intents: {[i.value for i in _intents]}")
-            except Exception:
-                _intents = []
-                _expand_rels = True  # Fallback: always expand (backward compat)
-            
-            # Person-scoped supplementary search: when we identify specific
-            # persons in the query, fetch additional results filtered by
-            # person_ids for higher precision. This catches assets that
-            # semantic search missed (e.g., different script spellings).
-            #
-            # Relationship expansion is now intent-gated: only expands to
-            # related persons (family, colleagues) when the query intent
-            # indicates family/team context. This prevents over-expansion
-            # for simple person queries like "what did Shiran say?"
-            if resolved_person_ids and _current_chars(results) < max_context_chars * 0.8:
-                # Expand person IDs via relationship graph (1 hop)
-                # only when intent calls for it
-                if _expand_rels:
-                    try:
-                        from identity import Identity as _Identity
-                        # Use the first resolved person to expand via Identity cache
-                        _all_expanded: set = set(resolved_person_ids)
-                        for _rpid in resolved_person_ids:
-                            _ident = _Identity.get(_rpid)
-                            if _ident:
-                                for _rel_ident in _ident.expand_related(max_depth=1):
-                                    _all_expanded.add(_rel_ident.id)
-                        expanded_ids = list(_all_expanded)
-                        if len(expanded_ids) > len(resolved_person_ids):
-                            logger.info(
-                                f"Relationship expansion: {resolved_person_ids} → {expanded_ids}"
-                            )
-                    except Exception:
-                        expanded_ids = resolved_person_ids
-                else:
-                    expanded_ids = resolved_person_ids
-                
-                existing_ids = {nws.node.id_ for nws in results if nws.node}
-                person_supplement = self._rag._person_scoped_search(
-                    person_ids=expanded_ids,
-                    k=5,
-                    **_fkw,
+        # The supplementary person-scoped results are only kept while the
+        # context is below 80% of the budget.
+        entity_nodes, person_supplement, expanded_ids = _stage_result(
+            identity_future, ([], [], []), "identity"
+        )
+        if entity_nodes:
+            results = entity_nodes + results
+            logger.info(f"Injected {len(entity_nodes)} identity fact node(s)")
+        if person_supplement and _current_chars(results) < max_context_chars * 0.8:
+            added_person_results = _append_new(person_supplement)
+            if added_person_results:
+                logger.info(
+                    f"Person-scoped search added {added_person_results} "
+                    f"results for person_ids={expanded_ids}"
                 )
-                added_person_results = 0
-                for nws in person_supplement:
-                    if nws.node and nws.node.id_ not in existing_ids:
-                        existing_ids.add(nws.node.id_)
-                        results.append(nws)
-                        added_person_results += 1
-                if added_person_results:
-                    logger.info(
-                        f"Person-scoped search added {added_person_results} "
-                        f"results for person_ids={expanded_ids}"
-                    )
-        except Exception as e:
-            logger.debug(f"Identity fact injection failed (non-critical): {e}")
         
         # Ensure at least one node so the synthesizer doesn't return "Empty Response"
         if not results:
@@ -651,6 +705,28 @@ _MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
 }
 
 
+@functools.lru_cache(maxsize=1)
+def _local_day_names() -> tuple:
+    """Weekday names (Monday first) in the OS locale (e.g. ``he_IL``).
+
+    Switching ``LC_TIME`` is process-global and not thread-safe, so it is
+    done once per process here rather than on every system-prompt build.
+    Falls back to English day names.
+    """
+    monday = datetime(2024, 1, 1)  # a Monday
+    english = tuple((monday + timedelta(days=i)).strftime("%A") for i in range(7))
+    try:
+        import locale as _locale
+        saved = _locale.getlocale(_locale.LC_TIME)
+        try:
+            _locale.setlocale(_locale.LC_TIME, "")  # Use system locale
+            return tuple((monday + timedelta(days=i)).strftime("%A") for i in range(7))
+        finally:
+            _locale.setlocale(_locale.LC_TIME, saved)
+    except Exception:
+        return english
+
+
 def _get_model_context_window(model_name: str) -> int:
     """Look up the context window for a model, with conservative default.
 
@@ -717,6 +793,9 @@ class LlamaIndexRAG:
     _vector_store = None
     _chat_store = None
     _ingestion_pipeline = None
+    _ingest_batcher = None
+    _dedup_index = None
+    _stats_service = None
     
     COLLECTION_NAME = settings.rag_collection_name
     VECTOR_SIZE = int(settings.get("rag_vector_size", "1024"))
@@ -1009,14 +1088,141 @@ class LlamaIndexRAG:
             if self.HYBRID_ENABLED:
                 self._upsert_sparse_vectors(nodes)
             
+            self._record_ingested(nodes, count)
             return count
         except Exception as e:
             logger.warning(f"IngestionPipeline failed, falling back to add_nodes(): {e}")
             count = self.add_nodes(nodes)
             if self.HYBRID_ENABLED and count > 0:
                 self._upsert_sparse_vectors(nodes)
+            self._record_ingested(nodes, count)
             return count
     
+    def _record_ingested(self, nodes: List[TextNode], count: int) -> None:
+        """Update the cached per-source stats after a successful ingest.
+        
+        Partial ingests can't be attributed to sources and are left to the
+        periodic reconciliation.
+        """
+        if count < len(nodes):
+            return
+        source_counts: Dict[str, int] = {}
+        for node in nodes:
+            source = (node.metadata or {}).get("source") or "unknown"
+            source_counts[source] = source_counts.get(source, 0) + 1
+        self.stats_service.record_ingest(source_counts)
+    
+    def _stored_node_ids(self, node_ids: List[str]) -> set:
+        """Return which of the given node IDs exist as points in Qdrant.
+        
+        Args:
+            node_ids: Node IDs (the point IDs used by the vector store)
+            
+        Returns:
+            Set of the IDs that are stored
+        """
+        points = self.qdrant_client.retrieve(
+            collection_name=self.COLLECTION_NAME,
+            ids=node_ids,
+            with_payload=False,
+            with_vectors=False,
+        )
+        return {str(point.id) for point in points}
+    
+    # Micro-batched ingestion: coalesce nodes from concurrent Celery tasks (via a
+    # shared Redis queue) into a single embed + dense upsert + sparse
+    # update_vectors round (see ingest_batcher.py)
+    INGEST_BATCH_ENABLED = settings.get("rag_ingest_batch_enabled", "true").lower() == "true"
+    INGEST_BATCH_WINDOW_MS = int(settings.get("rag_ingest_batch_window_ms", "50"))
+    INGEST_BATCH_MAX_SIZE = int(settings.get("rag_ingest_batch_max_size", "64"))
+    
+    @property
+    def ingest_batcher(self) -> "IngestBatcher":
+        """Get or create the shared micro-batching ingestion queue."""
+        if LlamaIndexRAG._ingest_batcher is None:
+            from ingest_batcher import IngestBatcher
+            LlamaIndexRAG._ingest_batcher = IngestBatcher(
+                self.ingest_nodes,
+                encode_fn=lambda node: node.to_json(),
+                decode_fn=TextNode.from_json,
+                window_ms=self.INGEST_BATCH_WINDOW_MS,
+                max_batch_size=self.INGEST_BATCH_MAX_SIZE,
+                stored_fn=self._stored_node_ids,
+            )
+            logger.info(
+                f"IngestBatcher initialized (window={self.INGEST_BATCH_WINDOW_MS}ms, "
+                f"max_size={self.INGEST_BATCH_MAX_SIZE})"
+            )
+        return LlamaIndexRAG._ingest_batcher
+    
+    def submit_nodes(self, nodes: List[TextNode]) -> List["IngestResult"]:
+        """Ingest nodes through the micro-batching queue.
+        
+        Nodes submitted by other processes (concurrent Celery tasks) within
+        the batching window are embedded and upserted together with these
+        ones.  Blocks until the batch containing these nodes has been
+        flushed — possibly by this caller.
+        
+        When ``rag_ingest_batch_enabled`` is false, or the nodes cannot be
+        queued, ingests directly via :meth:`ingest_nodes`.  Once queued,
+        nodes are never ingested directly as well — errors and timeouts
+        come back as failed results.
+        
+        Args:
+            nodes: List of TextNode instances to ingest
+            
+        Returns:
+            One :class:`IngestResult` per node, in input order
+        """
+        from ingest_batcher import IngestResult
+        
+        if not nodes:
+            return []
+        
+        if self.INGEST_BATCH_ENABLED:
+            try:
+                return self.ingest_batcher.ingest(nodes)
+            except Exception as e:
+                # Raised only when nothing was queued
+                logger.warning(f"Ingest batcher unavailable, ingesting directly: {e}")
+        
+        try:
+            count = self.ingest_nodes(nodes)
+            error = None
+        except Exception as e:
+            count, error = 0, str(e)
+        ok = count >= len(nodes)
+        return [
+            IngestResult(
+                node_id=node.id_,
+                ok=ok,
+                error=None if ok else (error or "Ingestion failed"),
+                batch_size=len(nodes),
+            )
+            for node in nodes
+        ]
+    
+    def get_ingest_metrics(self) -> Dict[str, Any]:
+        """Return ingestion batcher metrics for this process and all processes.
+        
+        Returns:
+            Dict with ``local`` (batches flushed by this process: batch
+            sizes, flush latency; plus the shared queue depth), ``global``
+            (aggregated via Redis) and ``dedup``
+            (this process: LRU/Bloom hit, miss and false-positive counters)
+            sections
+        """
+        from ingest_batcher import get_global_metrics
+        
+        local = self.ingest_batcher.stats() if LlamaIndexRAG._ingest_batcher else {}
+        dedup = self.dedup_index.stats() if LlamaIndexRAG._dedup_index else {}
+        return {
+            "enabled": self.INGEST_BATCH_ENABLED,
+            "local": local,
+            "global": get_global_metrics(),
+            "dedup": dedup,
+        }
+    
     def _upsert_sparse_vectors(self, nodes: List[TextNode]) -> None:
         """Compute and upsert BM25-style sparse vectors for ingested nodes.
         
@@ -1027,22 +1233,39 @@ class LlamaIndexRAG:
         Only runs when ``rag_hybrid_enabled=true`` and the collection has
         a sparse vector configuration.
         
+        Document lengths are normalized by the corpus average length, and
+        the batch is added to the corpus statistics (document frequencies)
+        that weight query terms by IDF — see ``utils.corpus_stats``.
+        
         Args:
             nodes: List of TextNode instances that were just ingested
         """
         try:
-            from utils.sparse_vectors import compute_sparse_vector
+            from utils.corpus_stats import get_corpus_stats
+            from utils.sparse_vectors import encode_documents
             from qdrant_client.models import PointVectors
             
+            corpus_stats = get_corpus_stats()
+            try:
+                avg_doc_length = corpus_stats.avg_doc_length()
+            except Exception as e:
+                logger.debug(f"Corpus stats unavailable, using default doc length: {e}")
+                avg_doc_length = None
+            
+            # Encode the whole batch in one pass (large backfill batches can
+            # fan out across processes)
+            encoded = encode_documents(
+                [getattr(node, "text", "") or "" for node in nodes],
+                avg_doc_length=avg_doc_length,
+                processes=int(settings.get("rag_sparse_encoder_processes", "1")),
+            )
+            
             points_to_update = []
-            for node in nodes:
-                text = getattr(node, "text", "") or ""
-                if not text:
-                    continue
-                
-                indices, values = compute_sparse_vector(text)
+            documents = []
+            for node, (indices, values, doc_length) in zip(nodes, encoded):
                 if not indices:
                     continue
+                documents.append((indices, doc_length))
                 
                 points_to_update.append(
                     PointVectors(
@@ -1064,6 +1287,10 @@ class LlamaIndexRAG:
                 logger.debug(
                     f"Upserted sparse vectors for {len(points_to_update)} nodes"
                 )
+                try:
+                    corpus_stats.record_documents(documents)
+                except Exception as e:
+                    logger.debug(f"Corpus stats update failed (non-critical): {e}")
         except ImportError:
             logger.debug("sparse_vectors module not available — skipping sparse upsert")
         except Exception as e:
@@ -1094,11 +1321,14 @@ class LlamaIndexRAG:
             List of NodeWithScore from hybrid search
         """
         try:
+            from utils.corpus_stats import query_idf_weights
             from utils.sparse_vectors import compute_query_sparse_vector
             
             # Compute both dense and sparse query vectors
-            query_embedding = Settings.embed_model.get_query_embedding(query)
-            sparse_indices, sparse_values = compute_query_sparse_vector(query)
+            query_embedding = get_query_embedding(query)
+            sparse_indices, sparse_values = compute_query_sparse_vector(
+                query, use_idf=False,
+            )
             
             if not sparse_indices:
                 # No sparse tokens — fall back to dense-only
@@ -1108,6 +1338,17 @@ class LlamaIndexRAG:
             # Qdrant hybrid query with prefetch + RRF fusion
             prefetch_limit = k * 3  # Fetch more candidates for fusion
             
+            # IDF-weighted sparse queries rank rare terms first, so the
+            # sparse leg reaches the same recall with fewer candidates.
+            sparse_prefetch_limit = prefetch_limit
+            if settings.get("rag_sparse_idf_enabled", "true").lower() == "true":
+                idf_weights = query_idf_weights(sparse_indices)
+                if idf_weights:
+                    sparse_values = idf_weights
+                    sparse_prefetch_limit = k * int(
+                        settings.get("rag_hybrid_sparse_prefetch_factor", "2")
+                    )
+            
             search_results = self.qdrant_client.query_points(
                 collection_name=self.COLLECTION_NAME,
                 prefetch=[
@@ -1123,7 +1364,7 @@ class LlamaIndexRAG:
                             values=sparse_values,
                         ),
                         using=self.SPARSE_VECTOR_NAME,
-                        limit=prefetch_limit,
+                        limit=sparse_prefetch_limit,
                         filter=qdrant_filters,
                     ),
                 ],
@@ -1313,10 +1554,53 @@ class LlamaIndexRAG:
             except Exception as e:
                 logger.debug(f"Could not create {description} (may exist): {e}")
     
+    @property
+    def dedup_index(self) -> "MessageDedupIndex":
+        """Get or create the tiered (LRU → Bloom → Qdrant) dedup index."""
+        if LlamaIndexRAG._dedup_index is None:
+            from message_dedup import MessageDedupIndex
+            LlamaIndexRAG._dedup_index = MessageDedupIndex(
+                exists_fn=self._qdrant_message_exists,
+                iter_source_ids_fn=self._iter_source_ids,
+                lru_size=int(settings.get("rag_dedup_lru_size", "10000")),
+                bloom_capacity=int(settings.get("rag_dedup_bloom_capacity", "1000000")),
+            )
+        return LlamaIndexRAG._dedup_index
+    
+    @property
+    def stats_service(self) -> "RagStatsService":
+        """Get or create the cached vector-store stats service."""
+        if LlamaIndexRAG._stats_service is None:
+            from rag_stats import RagStatsService
+            LlamaIndexRAG._stats_service = RagStatsService(self._exact_source_counts)
+        return LlamaIndexRAG._stats_service
+    
     def _message_exists(self, source_id: str) -> bool:
-        """Check if a message with the given source_id already exists in Qdrant.
+        """Check if a message or document with the given source_id is already stored.
+        
+        Used for deduplication to prevent duplicate messages from webhook
+        retries and re-ingesting plugin documents on every sync.  Goes
+        through the tiered dedup index: in-process LRU, then a Redis Bloom
+        filter, and Qdrant only when the Bloom filter reports a probable hit
+        (see ``message_dedup.py``).  Callers must report every successful
+        ingest with ``dedup_index.add(source_id)``.
+        
+        Args:
+            source_id: The source identifier (format: '{chat_id}:{timestamp}'
+                for WhatsApp, '{source}:{id}' for plugins)
+            
+        Returns:
+            True if a document with this source_id already exists
+        """
+        try:
+            return self.dedup_index.exists(source_id)
+        except Exception as e:
+            logger.debug(f"Tiered dedup check failed, querying Qdrant directly: {e}")
+            return self._qdrant_message_exists(source_id)
+    
+    def _qdrant_message_exists(self, source_id: str) -> bool:
+        """Authoritative existence check against Qdrant.
         
-        Used for deduplication to prevent duplicate messages from webhook retries.
         Requires a keyword index on the source_id field for efficient lookups.
         
         Args:
@@ -1340,6 +1624,31 @@ class LlamaIndexRAG:
             logger.debug(f"Dedup check failed (proceeding with insert): {e}")
             return False
     
+    def _iter_source_ids(self, batch_size: int = 1000):
+        """Yield the source_id of every stored point (dedup rebuild).
+        
+        Args:
+            batch_size: Points fetched per scroll page
+            
+        Yields:
+            source_id strings
+        """
+        offset = None
+        while True:
+            points, offset = self.qdrant_client.scroll(
+                collection_name=self.COLLECTION_NAME,
+                limit=batch_size,
+                offset=offset,
+                with_payload=["source_id"],
+                with_vectors=False,
+            )
+            for point in points:
+                source_id = (point.payload or {}).get("source_id")
+                if source_id:
+                    yield source_id
+            if offset is None:
+                break
+    
     # =========================================================================
     # Conversation Chunking (sliding window)
     # =========================================================================
@@ -1358,17 +1667,80 @@ class LlamaIndexRAG:
         int(settings.get("rag_chunk_buffer_ttl", "120")) // 4,
     )
     
-    def _flush_expiring_buffers(self) -> int:
-        """Scan for chunk buffers near TTL expiry and flush them.
+    # Sorted set tracking every chunk buffer's expiry deadline
+    # (member = chat_id, score = Unix time at which the buffer's TTL fires).
+    # Lets the periodic flusher find due buffers with one ZRANGEBYSCORE
+    # instead of SCANning every buffer key.
+    CHUNK_BUFFER_DEADLINES_KEY = "rag:chunk_buffer_deadlines"
+    
+    # Atomic chunk-buffer scripts.  Both pop the whole window while keeping
+    # the last ``overlap`` messages for the next chunk (LTRIM), refresh the
+    # TTL and keep the deadline ZSET in sync — all in one round-trip.
+    #
+    # KEYS[1] = buffer list, KEYS[2] = deadline ZSET
+    # ARGV    = chat_id, ttl, overlap, deadline, [max_messages, message]
+    _CHUNK_TAKE_WINDOW_LUA = """
+local function take_window()
+    local window = redis.call('LRANGE', KEYS[1], 0, -1)
+    local overlap = tonumber(ARGV[3])
+    if overlap > 0 and #window > overlap then
+        redis.call('LTRIM', KEYS[1], -overlap, -1)
+        redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+        redis.call('ZADD', KEYS[2], ARGV[4], ARGV[1])
+    else
+        redis.call('DEL', KEYS[1])
+        redis.call('ZREM', KEYS[2], ARGV[1])
+    end
+    return window
+end
+"""
+    _CHUNK_APPEND_LUA = _CHUNK_TAKE_WINDOW_LUA + """
+local len = redis.call('RPUSH', KEYS[1], ARGV[6])
+if len >= tonumber(ARGV[5]) then
+    return take_window()
+end
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+redis.call('ZADD', KEYS[2], ARGV[4], ARGV[1])
+return {}
+"""
+    _CHUNK_TAKE_LUA = _CHUNK_TAKE_WINDOW_LUA + """
+return take_window()
+"""
+    _chunk_scripts: Dict[str, Any] = {}
+    
+    def _chunk_script(self, name: str) -> Any:
+        """Get a registered (EVALSHA-cached) chunk-buffer Lua script."""
+        script = LlamaIndexRAG._chunk_scripts.get(name)
+        if script is None:
+            source = self._CHUNK_APPEND_LUA if name == "append" else self._CHUNK_TAKE_LUA
+            script = get_redis_client().register_script(source)
+            LlamaIndexRAG._chunk_scripts[name] = script
+        return script
+    
+    def _chunk_script_args(self, chat_id: str) -> List[Any]:
+        """Common ARGV prefix for the chunk-buffer scripts."""
+        return [
+            chat_id,
+            self.CHUNK_BUFFER_TTL,
+            self.CHUNK_OVERLAP_MESSAGES,
+            time.time() + self.CHUNK_BUFFER_TTL,
+        ]
+    
+    def flush_expiring_buffers(self) -> int:
+        """Flush chunk buffers that are near TTL expiry.
         
         Without this, low-volume chats that never reach CHUNK_MAX_MESSAGES
         have their buffered messages silently deleted when the Redis TTL
-        fires.  This method is called on every new message arrival and
-        uses SCAN to find active buffers whose TTL is below the flush
-        threshold.
+        fires.  Runs periodically from the ``tasks.rag.flush_expiring_chunk_buffers``
+        beat task (not on the ingest path), and uses the deadline ZSET to
+        find only the buffers whose TTL is below the flush threshold —
+        cost is proportional to the number of *due* buffers, not to the
+        number of active chats.
         
         Only buffers with ≥ 2 messages are flushed (single messages don't
-        benefit from conversation chunking).
+        benefit from conversation chunking).  Due entries whose buffer is
+        empty or holds a single message are dropped from the index; the
+        next append re-registers them.
         
         Returns:
             Number of buffers flushed
@@ -1376,45 +1748,41 @@ class LlamaIndexRAG:
         flushed = 0
         try:
             redis = get_redis_client()
-            cursor = 0
-            pattern = f"{self.CHUNK_BUFFER_KEY_PREFIX}*"
+            now = time.time()
+            due = redis.zrangebyscore(
+                self.CHUNK_BUFFER_DEADLINES_KEY,
+                "-inf",
+                now + self.CHUNK_BUFFER_FLUSH_THRESHOLD,
+            )
             
-            while True:
-                cursor, keys = redis.scan(
-                    cursor=cursor,
-                    match=pattern,
-                    count=50,
-                )
-                
-                for key in keys:
-                    # Decode key if bytes
-                    key_str = key if isinstance(key, str) else key.decode("utf-8", errors="replace")
+            for chat_id in due:
+                buffer_key = f"{self.CHUNK_BUFFER_KEY_PREFIX}{chat_id}"
+                try:
+                    buf_len = redis.llen(buffer_key)
+                    if buf_len >= 2:
+                        if self._flush_chunk_buffer(chat_id):
+                            flushed += 1
+                            logger.info(
+                                f"Flushed near-expiry buffer for chat {chat_id} "
+                                f"({buf_len} msgs)"
+                            )
+                        continue
                     
-                    try:
-                        ttl = redis.ttl(key_str)
-                        # ttl returns -1 if no expiry, -2 if key doesn't exist
-                        if ttl < 0:
-                            continue
-                        
-                        if ttl <= self.CHUNK_BUFFER_FLUSH_THRESHOLD:
-                            buf_len = redis.llen(key_str)
-                            if buf_len >= 2:
-                                # Extract chat_id from the key
-                                chat_id = key_str[len(self.CHUNK_BUFFER_KEY_PREFIX):]
-                                if self._flush_chunk_buffer(chat_id):
-                                    flushed += 1
-                                    logger.info(
-                                        f"Flushed near-expiry buffer for chat {chat_id} "
-                                        f"(TTL={ttl}s, {buf_len} msgs)"
-                                    )
-                    except Exception as e:
-                        logger.debug(f"Error checking buffer TTL for {key_str}: {e}")
-                
-                if cursor == 0:
-                    break
+                    redis.zrem(self.CHUNK_BUFFER_DEADLINES_KEY, chat_id)
+                    # A message may have landed between LLEN and ZREM —
+                    # re-register the buffer if it now needs flushing.
+                    if redis.llen(buffer_key) >= 2:
+                        ttl = redis.ttl(buffer_key)
+                        if ttl > 0:
+                            redis.zadd(
+                                self.CHUNK_BUFFER_DEADLINES_KEY,
+                                {chat_id: time.time() + ttl},
+                            )
+                except Exception as e:
+                    logger.debug(f"Error flushing due buffer for {chat_id}: {e}")
             
         except Exception as e:
-            logger.debug(f"Expiring buffer scan failed (non-critical): {e}")
+            logger.debug(f"Expiring buffer flush failed (non-critical): {e}")
         
         return flushed
     
@@ -1433,9 +1801,9 @@ class LlamaIndexRAG:
         CHUNK_MAX_MESSAGES, the buffer is flushed as a single conversation chunk
         that gets its own embedding in Qdrant.
         
-        Before buffering, scans for other chats' buffers that are near TTL
-        expiry and flushes them proactively.  This prevents low-volume chats
-        from silently losing buffered messages when the Redis TTL fires.
+        Each append records the buffer's expiry deadline in a ZSET so the
+        periodic :meth:`flush_expiring_buffers` task can flush low-volume
+        chats before the Redis TTL silently drops their messages.
         
         This gives isolated messages (like "yes", "me too") conversational context
         in the embedding, dramatically improving retrieval quality.
@@ -1449,9 +1817,6 @@ class LlamaIndexRAG:
             timestamp: Unix timestamp as string
         """
         try:
-            # Proactively flush any buffers about to expire (prevents data loss)
-            self._flush_expiring_buffers()
-            
             redis = get_redis_client()
             buffer_key = f"{self.CHUNK_BUFFER_KEY_PREFIX}{chat_id}"
             
@@ -1463,53 +1828,52 @@ class LlamaIndexRAG:
                 "chat_name": chat_name,
                 "is_group": is_group,
             })
-            redis.rpush(buffer_key, msg_data)
-            redis.expire(buffer_key, self.CHUNK_BUFFER_TTL)
-            
-            # Check if buffer is full → flush
-            buffer_len = redis.llen(buffer_key)
-            if buffer_len >= self.CHUNK_MAX_MESSAGES:
-                self._flush_chunk_buffer(chat_id)
+            # Append, refresh TTL/deadline and — if the buffer is now full —
+            # pop the window (keeping the overlap) in a single atomic call.
+            window = self._chunk_script("append")(
+                keys=[buffer_key, self.CHUNK_BUFFER_DEADLINES_KEY],
+                args=self._chunk_script_args(chat_id) + [self.CHUNK_MAX_MESSAGES, msg_data],
+            )
+            if window:
+                self._flush_chunk_buffer(chat_id, raw_messages=window)
                 
         except Exception as e:
             logger.debug(f"Chunk buffering failed (non-critical): {e}")
     
-    def _flush_chunk_buffer(self, chat_id: str) -> bool:
+    def _flush_chunk_buffer(
+        self,
+        chat_id: str,
+        raw_messages: Optional[List[str]] = None,
+    ) -> bool:
         """Flush the message buffer for a chat as a conversation chunk.
         
-        Reads all buffered messages, concatenates them into a single chunk text,
-        and stores it as an additional point in Qdrant with source_type='conversation_chunk'.
+        Concatenates the buffered messages into a single chunk text and
+        stores it as an additional point in Qdrant with
+        source_type='conversation_chunk'.
+        
+        The window is popped atomically by a Lua script that keeps the last
+        CHUNK_OVERLAP_MESSAGES in the buffer for context continuity between
+        consecutive chunks.
         
         Args:
             chat_id: The chat ID whose buffer to flush
+            raw_messages: Window already popped by the append script.  When
+                None, the current buffer contents are popped here.
             
         Returns:
             True if a chunk was created, False otherwise
         """
         try:
-            redis = get_redis_client()
-            buffer_key = f"{self.CHUNK_BUFFER_KEY_PREFIX}{chat_id}"
-            
-            # Get all messages from the buffer
-            raw_messages = redis.lrange(buffer_key, 0, -1)
+            if raw_messages is None:
+                buffer_key = f"{self.CHUNK_BUFFER_KEY_PREFIX}{chat_id}"
+                raw_messages = self._chunk_script("take")(
+                    keys=[buffer_key, self.CHUNK_BUFFER_DEADLINES_KEY],
+                    args=self._chunk_script_args(chat_id),
+                )
             
             if not raw_messages:
-                redis.delete(buffer_key)
                 return False  # Nothing to flush
             
-            # Keep the last N messages as overlap for the next chunk.
-            # This ensures context continuity between consecutive chunks.
-            overlap = self.CHUNK_OVERLAP_MESSAGES
-            if overlap > 0 and len(raw_messages) > overlap:
-                # Delete all, then re-push the overlap messages
-                redis.delete(buffer_key)
-                overlap_messages = raw_messages[-overlap:]
-                for msg in overlap_messages:
-                    redis.rpush(buffer_key, msg)
-                redis.expire(buffer_key, self.CHUNK_BUFFER_TTL)
-            else:
-                redis.delete(buffer_key)
-            
             # Parse buffered messages
             messages = []
             for raw in raw_messages:
@@ -1572,7 +1936,10 @@ class LlamaIndexRAG:
                 ),
             )
             
-            self.ingest_nodes([chunk_node])
+            result = self.submit_nodes([chunk_node])[0]
+            if not result.ok:
+                logger.error(f"Failed to ingest conversation chunk for {chat_id}: {result.error}")
+                return False
             logger.info(
                 f"Created conversation chunk: {chat_name} ({len(messages)} msgs, "
                 f"{first_ts}→{last_ts})"
@@ -1692,9 +2059,14 @@ class LlamaIndexRAG:
             # Convert to LlamaIndex TextNode with standardized schema
             node = doc.to_llama_index_node()
             
-            # Use IngestionPipeline for embedding cache + sparse vectors.
+            # Use IngestionPipeline for embedding cache + sparse vectors,
+            # micro-batched with messages arriving concurrently.
             # Falls back to direct insert if pipeline is unavailable.
-            self.ingest_nodes([node])
+            result = self.submit_nodes([node])[0]
+            if not result.ok:
+                logger.error(f"Failed to ingest message {source_id}: {result.error}")
+                return False
+            self.dedup_index.add(source_id)
             
             # Buffer for conversation chunking (creates context-rich chunks)
             self._buffer_message_for_chunking(
@@ -2085,55 +2457,23 @@ class LlamaIndexRAG:
             logger.debug(f"Cross-script name expansion failed (non-critical): {e}")
             return tokens
     
-    def _build_entity_name_map(self) -> Dict[str, set]:
-        """Build a name→name_parts map from the Identity Store aliases.
+    def _build_entity_name_map(self) -> Mapping[str, Iterable[str]]:
+        """Return the name→name_parts map built from the Identity Store aliases.
         
         For each person, all aliases are cross-linked so that ANY alias
         token maps to ALL other alias parts. This is much richer than the
         sender list approach because it handles multi-script aliases directly.
         
+        The map is precomputed once per identity version and shared across
+        processes via Redis (see ``name_index``), so this is a dict lookup
+        on the hot path rather than a full identity-store scan.
+        
         Returns:
-            Dict of lowercased-alias → set of all name parts for that person
+            Mapping of lowercased-alias → all name parts for that person
         """
         try:
-            from identity import Identity
-            identities = Identity.all_summary()
-            if not identities:
-                return {}
-            
-            import re
-            _NUMERIC_RE = re.compile(r"^[\d+\-#().]+$")
-            # Short tokens that are common Hebrew words but also match names
-            # (e.g. "בן"=son/Ben, "על"=on, "שם"=name, "גן"=garden, "אור"=light)
-            _MIN_NAME_PART_LEN = 3  # Skip 1-2 char parts as map keys (too ambiguous)
-            
-            name_map: Dict[str, set] = {}
-            for person in identities:
-                # Collect all name parts from canonical name + all aliases
-                all_parts: set = set()
-                canonical = person.name
-                if canonical:
-                    all_parts.update(canonical.split())
-                
-                for alias in person.aliases:
-                    alias_text = alias.get("alias", "") if isinstance(alias, dict) else str(alias)
-                    if alias_text:
-                        all_parts.update(alias_text.split())
-                
-                # Filter out phone numbers, group IDs, and other numeric-only parts
-                all_parts = {p for p in all_parts if not _NUMERIC_RE.match(p)}
-                
-                if not all_parts:
-                    continue
-                
-                # Map each part (lowercased) → all parts for that person,
-                # but only use parts with enough length as map keys to avoid
-                # common short Hebrew words triggering massive expansions.
-                for part in list(all_parts):
-                    if len(part) >= _MIN_NAME_PART_LEN:
-                        name_map.setdefault(part.lower(), set()).update(all_parts)
-            
-            return name_map
+            from name_index import get_name_index
+            return get_name_index()
         except Exception:
             return {}
     
@@ -2369,51 +2709,68 @@ class LlamaIndexRAG:
             return []
         
         try:
-            # Build OR conditions: match ANY of the tokens in this field.
-            # Keyword array fields (e.g., numbers) use exact MatchValue;
-            # text-indexed fields use tokenized MatchText.
-            if field_name in self._KEYWORD_ARRAY_FIELDS:
-                should_conditions = [
-                    FieldCondition(key=field_name, match=MatchValue(value=token))
-                    for token in tokens
-                ]
-            else:
-                should_conditions = [
-                    FieldCondition(key=field_name, match=MatchText(text=token))
-                    for token in tokens
-                ]
-            
-            qdrant_filter = Filter(
-                must=must_conditions or None,
-                should=should_conditions,
-            )
-            
             results, _ = self.qdrant_client.scroll(
                 collection_name=self.COLLECTION_NAME,
-                scroll_filter=qdrant_filter,
+                scroll_filter=self._fulltext_field_filter(field_name, tokens, must_conditions),
                 limit=k,
                 with_payload=True,
                 with_vectors=False,
             )
-            
-            nodes = []
-            for record in results:
-                payload = record.payload or {}
-                text = self._extract_text_from_payload(payload)
-                
-                if text:
-                    node = TextNode(
-                        text=text,
-                        metadata={mk: mv for mk, mv in payload.items() if not mk.startswith("_")},
-                        id_=str(record.id),
-                    )
-                    nodes.append(NodeWithScore(node=node, score=score))
-            
-            return nodes
+            return self._fulltext_records_to_nodes(results, score)
         except Exception as e:
             logger.debug(f"Full-text search on '{field_name}' failed: {e}")
             return []
     
+    def _fulltext_field_filter(
+        self,
+        field_name: str,
+        tokens: List[str],
+        must_conditions: Optional[List] = None,
+    ) -> Filter:
+        """Build the OR-of-tokens filter for a single fulltext field.
+        
+        Keyword array fields (e.g., numbers) use exact ``MatchValue``;
+        text-indexed fields use tokenized ``MatchText``.
+        
+        Args:
+            field_name: Qdrant payload field to search
+            tokens: Keyword tokens to match (OR logic)
+            must_conditions: Additional filter conditions (AND logic)
+            
+        Returns:
+            Qdrant Filter matching any token in the field
+        """
+        if field_name in self._KEYWORD_ARRAY_FIELDS:
+            should_conditions = [
+                FieldCondition(key=field_name, match=MatchValue(value=token))
+                for token in tokens
+            ]
+        else:
+            should_conditions = [
+                FieldCondition(key=field_name, match=MatchText(text=token))
+                for token in tokens
+            ]
+        return Filter(
+            must=must_conditions or None,
+            should=should_conditions,
+        )
+    
+    def _fulltext_records_to_nodes(self, records: List[Any], score: float) -> List[NodeWithScore]:
+        """Convert Qdrant records from a fulltext field search to scored nodes."""
+        nodes = []
+        for record in records:
+            payload = record.payload or {}
+            text = self._extract_text_from_payload(payload)
+            
+            if text:
+                node = TextNode(
+                    text=text,
+                    metadata={mk: mv for mk, mv in payload.items() if not mk.startswith("_")},
+                    id_=str(record.id),
+                )
+                nodes.append(NodeWithScore(node=node, score=score))
+        return nodes
+    
     def _build_filter_conditions(
         self,
         filter_chat_name: Optional[str] = None,
@@ -2529,7 +2886,9 @@ class LlamaIndexRAG:
         Runs one query per field (sender, chat_name, message) with
         different scores to prioritize sender matches over message
         content matches.  Results are deduplicated by node ID, keeping
-        the highest score.
+        the highest score.  When ``rag_fulltext_batched`` is enabled (the
+        default), all field queries go to Qdrant as a single
+        ``query_batch_points`` request instead of one round-trip per field.
         
         When ``filter_sender`` is provided, the sender field fulltext search
         is skipped (exact match already applied via filter conditions) but
@@ -2595,26 +2954,48 @@ class LlamaIndexRAG:
             if numeric_tokens:
                 field_searches.append(("numbers", self.FULLTEXT_SCORE_NUMBERS))
             
+            # Use contact-expanded tokens for sender/chat_name (cross-script),
+            # numeric tokens for numbers field, original tokens for message.
+            field_tokens = {
+                "sender": contact_tokens,
+                "chat_name": contact_tokens,
+                "message": tokens,
+                "numbers": numeric_tokens,
+            }
+            
+            if settings.get("rag_fulltext_batched", "true").lower() == "true":
+                # One round-trip for all fields; each sub-request keeps its
+                # own filter and limit, so scoring is identical per field.
+                records_per_field = self._scroll_batch([
+                    {
+                        "filter": self._fulltext_field_filter(
+                            field_name, field_tokens[field_name], must_conditions,
+                        ),
+                        "limit": k,
+                    }
+                    for field_name, _ in field_searches
+                ])
+                field_results = [
+                    self._fulltext_records_to_nodes(records, field_score)
+                    for records, (_, field_score) in zip(records_per_field, field_searches)
+                ]
+            else:
+                field_results = [
+                    self._fulltext_search_by_field(
+                        field_name=field_name,
+                        tokens=field_tokens[field_name],
+                        score=field_score,
+                        k=k,
+                        must_conditions=must_conditions if must_conditions else None,
+                    )
+                    for field_name, field_score in field_searches
+                ]
+            
             # Collect all results, dedup by node ID keeping highest score
             best_scores: Dict[str, float] = {}
             best_nodes: Dict[str, NodeWithScore] = {}
             
-            for field_name, field_score in field_searches:
-                # Use contact-expanded tokens for sender/chat_name (cross-script),
-                # numeric tokens for numbers field, original tokens for message.
-                if field_name == "numbers":
-                    search_tokens = numeric_tokens
-                elif field_name in ("sender", "chat_name"):
-                    search_tokens = contact_tokens
-                else:
-                    search_tokens = tokens
-                results = self._fulltext_search_by_field(
-                    field_name=field_name,
-                    tokens=search_tokens,
-                    score=field_score,
-                    k=k,
-                    must_conditions=must_conditions if must_conditions else None,
-                )
+            for results in field_results:
                 for nws in results:
                     node_id = nws.node.id_ if nws.node else None
                     if not node_id:
@@ -2739,80 +3120,174 @@ class LlamaIndexRAG:
             logger.debug(f"Person-scoped search failed (non-critical): {e}")
             return []
     
+    # Payload fields holding identity person IDs (remapped after merges)
+    PERSON_ID_FIELDS = ("person_ids", "mentioned_person_ids")
+    
     def update_person_ids_after_merge(
         self,
         target_id: int,
         source_ids: List[int],
+        checkpoint: Optional[Dict[str, Any]] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        page_size: int = 512,
     ) -> Dict[str, int]:
         """Update person_ids in Qdrant payloads after an identity merge.
         
         Finds all points where ``person_ids`` or ``mentioned_person_ids``
         contain any of the source IDs and replaces them with the target ID.
         
-        Called from the ``/entities/merge`` API endpoint after
+        Pages through every matching point (scroll offsets, no cap) and
+        groups each page by the resulting ID list, so one
+        ``batch_update_points`` call re-points a whole page.  After each
+        page the progress state is passed to ``on_progress``; passing that
+        state back as ``checkpoint`` resumes where the previous run stopped
+        (re-running a page is harmless — already remapped points no longer
+        change).
+        
+        Runs from the ``tasks.rag.remap_person_ids_after_merge`` Celery
+        task dispatched by the ``/identities/merge`` API endpoint after
         ``identity_db.merge_persons()`` completes.
         
         Args:
             target_id: The surviving person ID (merge target)
             source_ids: The deleted person IDs (merge sources)
+            checkpoint: Progress state from a previous ``on_progress`` call
+            on_progress: Called after every page with the progress state
+                (``field_index``, ``offset``, ``points_scanned``,
+                ``points_updated``, ``batches``)
+            page_size: Points scrolled (and updated) per batch
             
         Returns:
-            Dict with 'points_updated' count
+            Dict with 'points_updated', 'points_scanned' and 'batches' counts
+            
+        Raises:
+            Exception: Qdrant errors propagate so the caller can retry from
+                the last checkpoint
         """
+        state: Dict[str, Any] = {
+            "field_index": 0,
+            "offset": None,
+            "points_scanned": 0,
+            "points_updated": 0,
+            "batches": 0,
+        }
+        if checkpoint:
+            state.update({k: checkpoint[k] for k in state if k in checkpoint})
         if not source_ids:
-            return {"points_updated": 0}
+            return {k: state[k] for k in ("points_updated", "points_scanned", "batches")}
         
-        updated = 0
+        from qdrant_client.models import MatchAny, SetPayload, SetPayloadOperation
         
-        try:
-            for field in ("person_ids", "mentioned_person_ids"):
-                for old_id in source_ids:
-                    # Find all points that contain this old person ID
-                    points, _ = self.qdrant_client.scroll(
-                        collection_name=self.COLLECTION_NAME,
-                        scroll_filter=Filter(must=[
-                            FieldCondition(key=field, match=MatchValue(value=old_id))
-                        ]),
-                        limit=500,
-                        with_payload=True,
-                        with_vectors=False,
-                    )
-                    
-                    for point in points:
-                        payload = point.payload or {}
-                        current_ids = payload.get(field, [])
-                        if not isinstance(current_ids, list):
-                            continue
-                        
-                        # Replace old_id with target_id, dedup
-                        new_ids = []
-                        seen = set()
-                        for pid in current_ids:
-                            resolved = target_id if pid == old_id else pid
-                            if resolved not in seen:
-                                seen.add(resolved)
-                                new_ids.append(resolved)
-                        
-                        # Only update if something changed
-                        if new_ids != current_ids:
-                            self.qdrant_client.set_payload(
-                                collection_name=self.COLLECTION_NAME,
-                                payload={field: new_ids},
-                                points=[point.id],
-                            )
-                            updated += 1
+        source_set = set(source_ids)
+        while state["field_index"] < len(self.PERSON_ID_FIELDS):
+            field = self.PERSON_ID_FIELDS[state["field_index"]]
+            points, next_offset = self.qdrant_client.scroll(
+                collection_name=self.COLLECTION_NAME,
+                scroll_filter=Filter(must=[
+                    FieldCondition(key=field, match=MatchAny(any=list(source_ids)))
+                ]),
+                limit=page_size,
+                offset=state["offset"],
+                with_payload=[field],
+                with_vectors=False,
+            )
             
-            if updated:
-                logger.info(
-                    f"Post-merge: updated person_ids on {updated} Qdrant points "
-                    f"(source_ids={source_ids} → target_id={target_id})"
+            # Group points by their remapped ID list: one SetPayload
+            # operation per distinct result instead of one call per point
+            groups: Dict[tuple, List[Any]] = {}
+            for point in points:
+                current_ids = (point.payload or {}).get(field, [])
+                if not isinstance(current_ids, list):
+                    continue
+                new_ids = list(dict.fromkeys(
+                    target_id if pid in source_set else pid for pid in current_ids
+                ))
+                if new_ids != current_ids:
+                    groups.setdefault(tuple(new_ids), []).append(point.id)
+            
+            if groups:
+                self.qdrant_client.batch_update_points(
+                    collection_name=self.COLLECTION_NAME,
+                    update_operations=[
+                        SetPayloadOperation(set_payload=SetPayload(
+                            payload={field: list(new_ids)}, points=point_ids,
+                        ))
+                        for new_ids, point_ids in groups.items()
+                    ],
+                    wait=True,
                 )
+                state["batches"] += 1
+                state["points_updated"] += sum(len(ids) for ids in groups.values())
+            state["points_scanned"] += len(points)
             
-            return {"points_updated": updated}
+            if next_offset is None:
+                state["field_index"] += 1
+                state["offset"] = None
+            else:
+                state["offset"] = next_offset
+            if on_progress:
+                on_progress(dict(state))
+        
+        if state["points_updated"]:
+            logger.info(
+                f"Post-merge: updated person_ids on {state['points_updated']} Qdrant "
+                f"points in {state['batches']} batch(es) "
+                f"(source_ids={source_ids} → target_id={target_id})"
+            )
+        return {k: state[k] for k in ("points_updated", "points_scanned", "batches")}
+    
+    def rebuild_sparse_corpus_stats(self, page_size: int = 512) -> Dict[str, Any]:
+        """Recompute the sparse-vector corpus statistics from the collection.
+        
+        Scrolls every point, re-tokenizes its text and rebuilds document
+        frequencies and the average document length under temporary Redis
+        keys, then swaps them in.  Backfills statistics for a corpus
+        ingested before they existed and removes drift from deleted points
+        (incremental updates only ever add).
+        
+        Args:
+            page_size: Points scrolled per page
             
-        except Exception as e:
-            logger.error(f"Post-merge Qdrant update failed: {e}")
-            return {"points_updated": updated, "error": str(e)}
+        Returns:
+            Corpus summary (docs, vocabulary, avg_doc_length, rebuilt_at)
+        """
+        from utils.corpus_stats import get_corpus_stats
+        from utils.sparse_vectors import encode_documents
+        
+        live = get_corpus_stats()
+        # Batches ingested during the scroll are mirrored into the staging keys
+        staging = live.begin_rebuild()
+        try:
+            offset = None
+            while True:
+                points, offset = self.qdrant_client.scroll(
+                    collection_name=self.COLLECTION_NAME,
+                    limit=page_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=False,
+                )
+                encoded = encode_documents([
+                    self._extract_text_from_payload(point.payload or {}) or ""
+                    for point in points
+                ])
+                staging.record_documents(
+                    (indices, doc_length) for indices, _, doc_length in encoded if indices
+                )
+                if offset is None:
+                    break
+            staging.mark_rebuilt()
+            live.replace_with(staging)
+        except Exception:
+            live.abort_rebuild(staging)
+            raise
+        
+        summary = live.summary()
+        logger.info(
+            f"Rebuilt sparse corpus stats: {summary['docs']} docs, "
+            f"{summary['vocabulary']} terms, avg length {summary['avg_doc_length']}"
+        )
+        return summary
     
     def _metadata_search(
         self,
@@ -2925,7 +3400,7 @@ class LlamaIndexRAG:
             List of NodeWithScore ordered by timestamp (most recent first)
         """
         try:
-            must_conditions = self._build_filter_conditions(
+            scroll_filter = self._recency_filter(
                 filter_chat_name=filter_chat_name,
                 filter_sender=filter_sender,
                 filter_days=filter_days,
@@ -2935,22 +3410,6 @@ class LlamaIndexRAG:
                 filter_content_types=filter_content_types,
             )
             
-            # Require a valid timestamp (>0) and exclude conversation chunks —
-            # we want individual messages for recency, not synthetic multi-message
-            # chunks which would duplicate content.
-            must_conditions.append(
-                FieldCondition(key="timestamp", range=Range(gt=0))
-            )
-            
-            must_not_conditions = [
-                FieldCondition(key="source_type", match=MatchValue(value="conversation_chunk"))
-            ]
-            
-            scroll_filter = Filter(
-                must=must_conditions if must_conditions else None,
-                must_not=must_not_conditions,
-            )
-            
             # Use order_by to sort by timestamp descending (most recent first)
             records, _ = self.qdrant_client.scroll(
                 collection_name=self.COLLECTION_NAME,
@@ -2961,48 +3420,7 @@ class LlamaIndexRAG:
                 order_by=OrderBy(key="timestamp", direction=Direction.DESC),
             )
             
-            nodes = []
-            for record in records:
-                payload = record.payload or {}
-                text = self._extract_text_from_payload(payload)
-                
-                if text:
-                    node = TextNode(
-                        text=text,
-                        metadata={mk: mv for mk, mv in payload.items() if not mk.startswith("_")},
-                        id_=str(record.id),
-                    )
-                    # Store raw timestamp temporarily; we'll normalize below
-                    ts = payload.get("timestamp", 0)
-                    nodes.append(NodeWithScore(node=node, score=float(ts) if ts else 0.0))
-            
-            # ---------------------------------------------------------------
-            # Normalize recency scores to the 0.3–0.5 band using linear
-            # interpolation.  This replaces the previous raw-timestamp
-            # scoring which produced values like 1708012345.0 that broke
-            # any downstream score comparison (e.g. SimilarityPostprocessor
-            # cutoffs, Cohere rerank score merging).
-            #
-            # Most recent message → 0.5, oldest in batch → 0.3.
-            # These scores sit *below* typical dense-vector cosine
-            # similarities (~0.5–0.9) and fulltext heuristic scores
-            # (0.75–0.95), so recency supplements don't outrank semantic
-            # matches, but above the minimum score threshold (default 0.2)
-            # so they aren't filtered out.
-            # ---------------------------------------------------------------
-            if nodes:
-                raw_scores = [n.score for n in nodes if n.score is not None]
-                if raw_scores:
-                    max_ts = max(raw_scores)
-                    min_ts = min(raw_scores)
-                    ts_range = max_ts - min_ts if max_ts != min_ts else 1.0
-                    for nws in nodes:
-                        if nws.score is not None and nws.score > 0:
-                            # Linear interpolation: newest=0.5, oldest=0.3
-                            nws.score = 0.3 + 0.2 * ((nws.score - min_ts) / ts_range)
-                        else:
-                            nws.score = 0.3  # Default for missing timestamps
-            
+            nodes = self._recency_nodes(records)
             logger.info(f"Recency search returned {len(nodes)} messages (most recent first)")
             return nodes
             
@@ -3010,6 +3428,168 @@ class LlamaIndexRAG:
             logger.error(f"Recency search failed: {e}")
             return []
     
+    def _recency_filter(self, **filter_kwargs: Any) -> Filter:
+        """Build the Qdrant filter used by recency lookups.
+        
+        Args:
+            **filter_kwargs: Keyword arguments for ``_build_filter_conditions``
+            
+        Returns:
+            Filter requiring a valid timestamp and excluding conversation chunks
+        """
+        must_conditions = self._build_filter_conditions(**filter_kwargs)
+        
+        # Require a valid timestamp (>0) and exclude conversation chunks —
+        # we want individual messages for recency, not synthetic multi-message
+        # chunks which would duplicate content.
+        must_conditions.append(
+            FieldCondition(key="timestamp", range=Range(gt=0))
+        )
+        
+        must_not_conditions = [
+            FieldCondition(key="source_type", match=MatchValue(value="conversation_chunk"))
+        ]
+        
+        return Filter(
+            must=must_conditions if must_conditions else None,
+            must_not=must_not_conditions,
+        )
+    
+    def _recency_nodes(self, records: List[Any]) -> List[NodeWithScore]:
+        """Convert timestamp-ordered Qdrant records into scored recency nodes.
+        
+        Args:
+            records: Qdrant records/points, most recent first
+            
+        Returns:
+            List of NodeWithScore with scores normalized to the 0.3–0.5 band
+        """
+        nodes = []
+        for record in records:
+            payload = record.payload or {}
+            text = self._extract_text_from_payload(payload)
+            
+            if text:
+                node = TextNode(
+                    text=text,
+                    metadata={mk: mv for mk, mv in payload.items() if not mk.startswith("_")},
+                    id_=str(record.id),
+                )
+                # Store raw timestamp temporarily; we'll normalize below
+                ts = payload.get("timestamp", 0)
+                nodes.append(NodeWithScore(node=node, score=float(ts) if ts else 0.0))
+        
+        # ---------------------------------------------------------------
+        # Normalize recency scores to the 0.3–0.5 band using linear
+        # interpolation.  This replaces the previous raw-timestamp
+        # scoring which produced values like 1708012345.0 that broke
+        # any downstream score comparison (e.g. SimilarityPostprocessor
+        # cutoffs, Cohere rerank score merging).
+        #
+        # Most recent message → 0.5, oldest in batch → 0.3.
+        # These scores sit *below* typical dense-vector cosine
+        # similarities (~0.5–0.9) and fulltext heuristic scores
+        # (0.75–0.95), so recency supplements don't outrank semantic
+        # matches, but above the minimum score threshold (default 0.2)
+        # so they aren't filtered out.
+        # ---------------------------------------------------------------
+        if nodes:
+            raw_scores = [n.score for n in nodes if n.score is not None]
+            if raw_scores:
+                max_ts = max(raw_scores)
+                min_ts = min(raw_scores)
+                ts_range = max_ts - min_ts if max_ts != min_ts else 1.0
+                for nws in nodes:
+                    if nws.score is not None and nws.score > 0:
+                        # Linear interpolation: newest=0.5, oldest=0.3
+                        nws.score = 0.3 + 0.2 * ((nws.score - min_ts) / ts_range)
+                    else:
+                        nws.score = 0.3  # Default for missing timestamps
+        
+        return nodes
+    
+    def _scroll_batch(self, requests: List[Dict[str, Any]]) -> List[List[Any]]:
+        """Run several filtered scrolls as one ``query_batch_points`` request.
+        
+        Each request dict has ``filter`` (Filter), ``limit`` (int) and an
+        optional ``order_by`` (OrderBy).  Falls back to sequential
+        ``scroll`` calls if the batch endpoint is unavailable (older
+        Qdrant server/client).
+        
+        Args:
+            requests: Scroll request specs
+            
+        Returns:
+            One list of points (with ``id`` and ``payload``) per request,
+            in request order
+        """
+        if not requests:
+            return []
+        
+        try:
+            from qdrant_client.models import OrderByQuery, QueryRequest
+            
+            batch = [
+                QueryRequest(
+                    query=OrderByQuery(order_by=req["order_by"]) if req.get("order_by") else None,
+                    filter=req["filter"],
+                    limit=req["limit"],
+                    with_payload=True,
+                    with_vector=False,
+                )
+                for req in requests
+            ]
+            responses = self.qdrant_client.query_batch_points(
+                collection_name=self.COLLECTION_NAME,
+                requests=batch,
+            )
+            return [resp.points for resp in responses]
+        except Exception as e:
+            logger.debug(f"query_batch_points failed, falling back to sequential scrolls: {e}")
+        
+        results: List[List[Any]] = []
+        for req in requests:
+            try:
+                records, _ = self.qdrant_client.scroll(
+                    collection_name=self.COLLECTION_NAME,
+                    scroll_filter=req["filter"],
+                    limit=req["limit"],
+                    with_payload=True,
+                    with_vectors=False,
+                    order_by=req.get("order_by"),
+                )
+                results.append(records)
+            except Exception as e:
+                logger.debug(f"Batched scroll fallback failed for one request: {e}")
+                results.append([])
+        return results
+    
+    def recency_search_batch(
+        self,
+        chat_names: List[str],
+        k: int = 5,
+        **filter_kwargs: Any,
+    ) -> Dict[str, List[NodeWithScore]]:
+        """Per-chat recency search for many chats in a single Qdrant request.
+        
+        Equivalent to calling :meth:`recency_search` once per chat with
+        ``filter_chat_name=chat_name``, but batched into one round-trip.
+        
+        Args:
+            chat_names: Chats to fetch recent messages from
+            k: Number of recent messages per chat
+            **filter_kwargs: Additional filters (sender, days, sources, ...)
+            
+        Returns:
+            Dict mapping each chat name to its most recent messages
+        """
+        return self.expand_chats_batched(
+            results=[],
+            recency_chat_names=chat_names,
+            recency_k=k,
+            recency_filters=filter_kwargs,
+        )[1]
+    
     # =========================================================================
     # Context expansion (fetch surrounding messages from same chats)
     # =========================================================================
@@ -3034,6 +3614,9 @@ class LlamaIndexRAG:
         this will also fetch Ori's reply "Thanks 🙏 won't happen again" from
         the same chat within the time window.
         
+        All chat windows are fetched in one batched Qdrant request (see
+        :meth:`expand_chats_batched`).
+        
         Args:
             results: Original search results to expand
             max_total: Maximum total nodes to return (original + expanded)
@@ -3041,110 +3624,160 @@ class LlamaIndexRAG:
         Returns:
             Merged list of original results + surrounding context, deduplicated
         """
-        if not results:
-            return results
+        return self.expand_chats_batched(results, max_total=max_total)[0]
+    
+    def expand_chats_batched(
+        self,
+        results: List[NodeWithScore],
+        max_total: int = 20,
+        recency_chat_names: Optional[List[str]] = None,
+        recency_k: int = 5,
+        recency_filters: Optional[Dict[str, Any]] = None,
+    ) -> tuple:
+        """Fetch context windows and per-chat recency supplements in one request.
+        
+        Builds one scroll request per chat window around the matched
+        messages (context expansion) plus one timestamp-ordered request per
+        chat in ``recency_chat_names``, sends them all as a single
+        ``query_batch_points`` call, and demultiplexes the responses.
+        A query touching 8 chats costs one round-trip instead of 16.
         
-        try:
-            # Collect unique chat identifiers and timestamps from results.
-            # Prefer chat_id (unique, e.g. '972501234567@c.us') over chat_name
-            # (display name, can be duplicated across different chats like "Family").
-            # Falls back to chat_name for sources without chat_id (e.g. Paperless).
-            chat_windows: Dict[str, Dict] = {}  # key -> {timestamps, filter_field, filter_value}
-            existing_ids: set = set()
-            
-            for nws in results:
-                node = nws.node
-                if not node:
-                    continue
-                existing_ids.add(node.id_)
-                metadata = getattr(node, "metadata", {})
-                chat_id = metadata.get("chat_id")
-                chat_name = metadata.get("chat_name")
-                timestamp = metadata.get("timestamp")
-                if not timestamp or not isinstance(timestamp, (int, float)):
-                    continue
-                # Use chat_id when available (WhatsApp), fall back to chat_name (Paperless)
-                if chat_id:
-                    key = f"id:{chat_id}"
-                    chat_windows.setdefault(key, {
-                        "timestamps": [], "filter_field": "chat_id", "filter_value": chat_id
-                    })["timestamps"].append(int(timestamp))
-                elif chat_name:
-                    key = f"name:{chat_name}"
-                    chat_windows.setdefault(key, {
-                        "timestamps": [], "filter_field": "chat_name", "filter_value": chat_name
-                    })["timestamps"].append(int(timestamp))
-            
-            if not chat_windows:
-                return results
-            
-            # For each chat, fetch messages in a time window around the matches
-            expanded_nodes: List[NodeWithScore] = []
-            budget = max_total - len(results)  # How many more nodes we can add
-            
-            if budget <= 0:
-                return results
+        Args:
+            results: Search results to expand with surrounding messages
+            max_total: Maximum total nodes for the context expansion
+                (original + expanded)
+            recency_chat_names: Chats to fetch recent messages from
+            recency_k: Number of recent messages per chat
+            recency_filters: Extra filters for the recency requests
             
+        Returns:
+            Tuple of (expanded results as returned by :meth:`expand_context`,
+            dict mapping chat name → recency nodes)
+        """
+        recency_chat_names = list(recency_chat_names or [])
+        requests: List[Dict[str, Any]] = []
+        
+        # --- Context window requests ---------------------------------------
+        # Collect unique chat identifiers and timestamps from results.
+        # Prefer chat_id (unique, e.g. '972501234567@c.us') over chat_name
+        # (display name, can be duplicated across different chats like "Family").
+        # Falls back to chat_name for sources without chat_id (e.g. Paperless).
+        chat_windows: Dict[str, Dict] = {}  # key -> {timestamps, filter_field, filter_value}
+        existing_ids: set = set()
+        
+        for nws in results:
+            node = nws.node
+            if not node:
+                continue
+            existing_ids.add(node.id_)
+            metadata = getattr(node, "metadata", {})
+            chat_id = metadata.get("chat_id")
+            chat_name = metadata.get("chat_name")
+            timestamp = metadata.get("timestamp")
+            if not timestamp or not isinstance(timestamp, (int, float)):
+                continue
+            # Use chat_id when available (WhatsApp), fall back to chat_name (Paperless)
+            if chat_id:
+                key = f"id:{chat_id}"
+                chat_windows.setdefault(key, {
+                    "timestamps": [], "filter_field": "chat_id", "filter_value": chat_id
+                })["timestamps"].append(int(timestamp))
+            elif chat_name:
+                key = f"name:{chat_name}"
+                chat_windows.setdefault(key, {
+                    "timestamps": [], "filter_field": "chat_name", "filter_value": chat_name
+                })["timestamps"].append(int(timestamp))
+        
+        budget = max_total - len(results)  # How many more nodes we can add
+        if budget <= 0:
+            chat_windows = {}
+        
+        if chat_windows:
             per_chat_limit = max(3, budget // len(chat_windows))
-            
-            for chat_key, window_info in chat_windows.items():
+            for window_info in chat_windows.values():
                 timestamps = window_info["timestamps"]
-                filter_field = window_info["filter_field"]
-                filter_value = window_info["filter_value"]
                 min_ts = min(timestamps) - self.CONTEXT_WINDOW_SECONDS
                 max_ts = max(timestamps) + self.CONTEXT_WINDOW_SECONDS
-                
-                must_conditions = [
-                    FieldCondition(key=filter_field, match=MatchValue(value=filter_value)),
-                    FieldCondition(key="timestamp", range=Range(gte=min_ts, lte=max_ts)),
-                ]
-                
-                try:
-                    records, _ = self.qdrant_client.scroll(
-                        collection_name=self.COLLECTION_NAME,
-                        scroll_filter=Filter(must=must_conditions),
-                        limit=per_chat_limit,
-                        with_payload=True,
-                        with_vectors=False,
-                        order_by=OrderBy(key="timestamp", direction=Direction.DESC),
-                    )
-                    
-                    for record in records:
-                        record_id = str(record.id)
-                        if record_id in existing_ids:
-                            continue  # Skip duplicates
-                        existing_ids.add(record_id)
-                        
-                        payload = record.payload or {}
-                        text = self._extract_text_from_payload(payload)
-                        if text:
-                            _meta = {mk: mv for mk, mv in payload.items() if not mk.startswith("_")}
-                            _meta["source_role"] = "context_expansion"
-                            node = TextNode(
-                                text=text,
-                                metadata=_meta,
-                                id_=record_id,
-                            )
-                            # Score slightly below original results so they rank after
-                            expanded_nodes.append(NodeWithScore(node=node, score=0.5))
-                            
-                except Exception as e:
-                    logger.debug(f"Context expansion for chat '{chat_key}' failed: {e}")
-                    continue
-            
-            if expanded_nodes:
-                logger.info(
-                    f"Context expansion added {len(expanded_nodes)} surrounding messages "
-                    f"from {len(chat_windows)} chat(s)"
+                requests.append({
+                    "filter": Filter(must=[
+                        FieldCondition(
+                            key=window_info["filter_field"],
+                            match=MatchValue(value=window_info["filter_value"]),
+                        ),
+                        FieldCondition(key="timestamp", range=Range(gte=min_ts, lte=max_ts)),
+                    ]),
+                    "limit": per_chat_limit,
+                    "order_by": OrderBy(key="timestamp", direction=Direction.DESC),
+                })
+        
+        # --- Recency requests ----------------------------------------------
+        # A chat whose filter cannot be built gets no request (and an empty
+        # result) — an unfiltered request would return other chats' messages.
+        recency_requested: List[str] = []
+        for chat_name in recency_chat_names:
+            try:
+                recency_filter = self._recency_filter(
+                    **{**(recency_filters or {}), "filter_chat_name": chat_name}
                 )
-                # Merge: original results first, then expanded context
-                results = results + expanded_nodes
-            
-            return results[:max_total]
-            
+            except Exception as e:
+                logger.debug(f"Recency filter for chat '{chat_name}' failed, skipping: {e}")
+                continue
+            recency_requested.append(chat_name)
+            requests.append({
+                "filter": recency_filter,
+                "limit": recency_k,
+                "order_by": OrderBy(key="timestamp", direction=Direction.DESC),
+            })
+        
+        try:
+            responses = self._scroll_batch(requests)
         except Exception as e:
-            logger.debug(f"Context expansion failed (non-critical): {e}")
-            return results
+            logger.debug(f"Batched chat expansion failed (non-critical): {e}")
+            return results, {name: [] for name in recency_chat_names}
+        
+        # --- Demultiplex: context windows ----------------------------------
+        expanded_nodes: List[NodeWithScore] = []
+        for records in responses[:len(chat_windows)]:
+            for record in records:
+                record_id = str(record.id)
+                if record_id in existing_ids:
+                    continue  # Skip duplicates
+                existing_ids.add(record_id)
+                
+                payload = record.payload or {}
+                text = self._extract_text_from_payload(payload)
+                if text:
+                    _meta = {mk: mv for mk, mv in payload.items() if not mk.startswith("_")}
+                    _meta["source_role"] = "context_expansion"
+                    node = TextNode(
+                        text=text,
+                        metadata=_meta,
+                        id_=record_id,
+                    )
+                    # Score slightly below original results so they rank after
+                    expanded_nodes.append(NodeWithScore(node=node, score=0.5))
+        
+        expanded = results
+        if expanded_nodes:
+            logger.info(
+                f"Context expansion added {len(expanded_nodes)} surrounding messages "
+                f"from {len(chat_windows)} chat(s)"
+            )
+            # Merge: original results first, then expanded context
+            expanded = (results + expanded_nodes)[:max_total]
+        
+        # --- Demultiplex: recency ------------------------------------------
+        recency: Dict[str, List[NodeWithScore]] = {name: [] for name in recency_chat_names}
+        for chat_name, records in zip(recency_requested, responses[len(chat_windows):]):
+            recency[chat_name] = self._recency_nodes(records)
+        if recency_chat_names:
+            logger.info(
+                f"Batched recency search returned "
+                f"{sum(len(v) for v in recency.values())} messages "
+                f"from {len(recency_chat_names)} chat(s)"
+            )
+        
+        return expanded, recency
     
     # Sources whose multi-chunk documents should be expanded to include
     # all sibling chunks when any single chunk matches.  Each entry maps
@@ -3641,7 +4274,7 @@ class LlamaIndexRAG:
                     logger.info(f"HyDE generated hypothetical answer for query: {query[:50]}...")
                 elif hasattr(hyde_bundle, 'query_str') and hyde_bundle.query_str:
                     # Embed the hypothetical document text
-                    hyde_embedding = Settings.embed_model.get_query_embedding(hyde_bundle.query_str)
+                    hyde_embedding = get_query_embedding(hyde_bundle.query_str)
                     logger.info(f"HyDE transformed query: {hyde_bundle.query_str[:80]}...")
             except ImportError:
                 logger.debug("HyDE query transform not available")
@@ -3653,7 +4286,7 @@ class LlamaIndexRAG:
             # Fetch more candidates (k * 2) to compensate for score-threshold filtering,
             # especially for morphologically rich languages like Hebrew where semantic
             # similarity may be lower for inflected query forms.
-            query_embedding = hyde_embedding if hyde_embedding is not None else Settings.embed_model.get_query_embedding(query)
+            query_embedding = hyde_embedding if hyde_embedding is not None else get_query_embedding(query)
             vector_fetch_limit = k * 2
             
             search_results = self.qdrant_client.query_points(
@@ -3718,13 +4351,28 @@ class LlamaIndexRAG:
             logger.info(f"RedisChatStore initialized at {redis_url} (TTL={ttl_seconds}s)")
         return LlamaIndexRAG._chat_store
     
-    def _build_system_prompt(self) -> str:
+    def _build_system_prompt(
+        self,
+        query: Optional[str] = None,
+        history: Optional[List[str]] = None,
+    ) -> str:
         """Build the system prompt with current date/time and known contacts.
         
         Injects:
         - Current date/time ({current_datetime}, {hebrew_date})
-        - Dynamic list of all known sender/contact names from the archive
-          so the LLM can disambiguate when a name matches multiple people
+        - Known contacts from the cached roster (see contact_roster.py) so
+          the LLM can disambiguate when a name matches multiple people.
+          ``rag_system_prompt_contacts`` selects the whole roster
+          (``full``, default), only contacts matching the conversation
+          (``relevant``), or none (``none``).
+        
+        Args:
+            query: The user's question; enables ``relevant`` contact
+                selection (without it the full roster is used)
+            history: Earlier user turns of the conversation.  In
+                ``relevant`` mode their names are matched too, so follow-ups
+                ("what else did he say?", "2") keep the contacts of the
+                person being discussed.
         
         Returns:
             System prompt string with dynamic date and contact list injection
@@ -3733,19 +4381,9 @@ class LlamaIndexRAG:
         tz = ZoneInfo(timezone)
         now = datetime.now(tz)
         current_datetime = now.strftime("%A, %B %d, %Y at %H:%M")
-        # Build a locale-aware local date string.  Uses the OS locale
-        # (e.g. ``he_IL``) when available so day names are not hardcoded.
-        # Falls back to a numeric-only format that works for any language.
-        try:
-            import locale as _locale
-            saved = _locale.getlocale(_locale.LC_TIME)
-            try:
-                _locale.setlocale(_locale.LC_TIME, "")  # Use system locale
-                local_day = now.strftime("%A")           # Localized day name
-            finally:
-                _locale.setlocale(_locale.LC_TIME, saved)
-        except Exception:
-            local_day = now.strftime("%A")  # Fallback to English day name
+        # Locale-aware local day name (e.g. ``he_IL``), resolved once per
+        # process so the process-global locale is not toggled per query.
+        local_day = _local_day_names()[now.weekday()]
         hebrew_date = f"{local_day}, {now.day}/{now.month}/{now.year} {now.strftime('%H:%M')}"
         
         # Read system prompt template from settings, with runtime placeholder injection
@@ -3787,60 +4425,56 @@ class LlamaIndexRAG:
             hebrew_date=hebrew_date,
         )
         
-        # Append the dynamic known contacts list and disambiguation instruction.
-        # Strategy: use Identity Store (rich aliases) when available, fall back
-        # to the flat Redis-cached sender list.
+        # Append the known contacts list and disambiguation instruction.
+        # Strategy: use the cached Identity Store roster (rich aliases) when
+        # available, fall back to the flat Redis-cached sender list.
+        # In "relevant" mode only contacts sharing a name part with the query
+        # or an earlier user turn are injected — the set the disambiguation
+        # rule needs.
+        contacts_mode = settings.get("rag_system_prompt_contacts", "full").lower()
+        match_tokens: List[str] = []
+        if contacts_mode == "relevant" and query is not None:
+            for text in [query, *(history or [])]:
+                match_tokens.extend(LlamaIndexRAG._tokenize_query(text))
         try:
             contacts_str = ""
             contact_count = 0
+            roster_count = 0
             
-            # Strategy 1: Identity Store with aliases (richer disambiguation)
-            try:
-                from identity import Identity
-                identities = Identity.all_summary()
-                if identities:
-                    contact_entries = []
-                    for p in identities:
-                        if p.is_group:
-                            continue
-                        name = p.name
-                        aliases = [
-                            a for a in p.alias_names
-                            if a != name
-                        ]
-                        if aliases:
-                            alias_str = "/".join(aliases[:3])
-                            contact_entries.append(f"{name} ({alias_str})")
-                        else:
-                            contact_entries.append(name)
-                    contacts_str = ", ".join(contact_entries)
-                    contact_count = len(contact_entries)
-            except Exception:
-                pass  # Fall back to sender list
+            # Strategy 1: Identity Store roster (rebuilt only on identity changes)
+            if contacts_mode != "none":
+                try:
+                    from contact_roster import get_contact_roster
+                    roster = get_contact_roster()
+                    roster_count = roster.count
+                    if contacts_mode == "relevant" and query is not None:
+                        contacts_str, contact_count = roster.relevant(match_tokens)
+                    else:
+                        contacts_str, contact_count = roster.full_text, roster.count
+                except Exception:
+                    pass  # Fall back to sender list
             
             # Strategy 2: Flat sender list from Redis (fallback)
-            if not contacts_str:
+            if contacts_mode != "none" and not roster_count:
+                from contact_roster import join_contacts
                 sender_list = self.get_sender_list()
+                if sender_list and contacts_mode == "relevant" and query is not None:
+                    wanted = {t.lower() for t in match_tokens}
+                    sender_list = [
+                        n for n in sender_list
+                        if wanted & {w.lower() for w in n.split()}
+                    ]
                 if sender_list:
-                    contacts_str = ", ".join(sender_list)
+                    contacts_str = join_contacts(sender_list, len(sender_list))
                     contact_count = len(sender_list)
             
-            # Cap contacts string to ~6000 chars (~1500 tokens) to prevent
-            # the system prompt from exceeding LLM token limits.
-            MAX_CONTACTS_CHARS = 6000
-            if len(contacts_str) > MAX_CONTACTS_CHARS:
-                # Truncate at the last complete entry before the limit
-                truncated = contacts_str[:MAX_CONTACTS_CHARS]
-                last_comma = truncated.rfind(", ")
-                if last_comma > 0:
-                    contacts_str = truncated[:last_comma]
-                else:
-                    contacts_str = truncated
-                contacts_str += f" ... (and more, {contact_count} total)"
-            
             if contacts_str:
+                contacts_scope = (
+                    " matching this conversation"
+                    if contacts_mode == "relevant" and query is not None else ""
+                )
                 prompt += (
-                    f"\n\nKnown Contacts ({contact_count} people):\n"
+                    f"\n\nKnown Contacts{contacts_scope} ({contact_count} people):\n"
                     f"{contacts_str}\n\n"
                     "CRITICAL DISAMBIGUATION RULE (MUST FOLLOW):\n"
                     "BEFORE answering any question that mentions a person by first name only, "
@@ -3873,7 +4507,11 @@ class LlamaIndexRAG:
                     "Only skip disambiguation if the user provided a full name (first + last) "
                     "or enough context to uniquely identify the person."
                 )
-                logger.debug(f"Injected {contact_count} contacts + disambiguation rule into system prompt")
+                logger.debug(
+                    f"Injected {contact_count}/{roster_count or contact_count} contacts "
+                    f"({contacts_mode}, ~{len(contacts_str) // 4} tokens) + disambiguation "
+                    f"rule into system prompt"
+                )
         except Exception as e:
             logger.debug(f"Failed to inject contacts into system prompt (non-fatal): {e}")
         
@@ -3943,6 +4581,7 @@ class LlamaIndexRAG:
         filter_content_types: Optional[List[str]] = None,
         sort_order: str = "relevance",
         k: int = 10,
+        query: Optional[str] = None,
     ) -> CondensePlusContextChatEngine:
         """Create a chat engine with memory and filters for a conversation.
         
@@ -3963,6 +4602,8 @@ class LlamaIndexRAG:
             filter_content_types: Optional list of content type values
             sort_order: "relevance" (default) or "newest"
             k: Number of context documents to retrieve
+            query: The question about to be asked (selects the contacts
+                injected into the system prompt)
             
         Returns:
             CondensePlusContextChatEngine ready for .chat() calls
@@ -4001,8 +4642,19 @@ class LlamaIndexRAG:
             sort_order=sort_order,
         )
         
-        # Build system prompt with current datetime
-        system_prompt = self._build_system_prompt()
+        # Build system prompt with current datetime.  In "relevant" contacts
+        # mode, earlier user turns are matched too so follow-ups keep the
+        # contacts of the person under discussion.
+        history: List[str] = []
+        if query is not None and settings.get("rag_system_prompt_contacts", "full").lower() == "relevant":
+            try:
+                history = [
+                    str(m.content) for m in memory.get_all()
+                    if m.role == "user" and m.content
+                ]
+            except Exception as e:
+                logger.debug(f"Failed to read chat history for contact selection (non-fatal): {e}")
+        system_prompt = self._build_system_prompt(query=query, history=history)
         
         # Context prompt template — handles both populated and empty context.
         # Explicitly instructs the LLM to leverage chat history for follow-up
@@ -4165,6 +4817,75 @@ class LlamaIndexRAG:
     # Insight Execution (bypasses chat engine for analytical queries)
     # =========================================================================
     
+    def _run_insight_sub_queries(
+        self,
+        queries: List[str],
+        k: int,
+        filter_kwargs: Dict[str, Any],
+    ) -> List[List[NodeWithScore]]:
+        """Run insight sub-query retrievals concurrently.
+        
+        Sub-queries are independent, so they run in a bounded thread pool and
+        the wall time follows the slowest one instead of the sum.  Sub-queries
+        that normalize to the same text (see ``query_embedding_cache``) are
+        retrieved once — concurrent duplicates would otherwise all miss the
+        embedding cache and embed and expand the same text in parallel.
+        
+        A dedicated per-call pool is used rather than the shared retrieval
+        pool, so a scheduled insight cannot starve chat retrieval stages.
+        
+        Args:
+            queries: Sub-queries in the caller's order
+            k: Number of documents per sub-query
+            filter_kwargs: Filter keyword arguments passed through to ``search()``
+            
+        Returns:
+            One result list per unique sub-query, in first-occurrence order
+            (a failed sub-query contributes an empty list)
+        """
+        from query_embedding_cache import normalize_query
+        
+        unique: Dict[str, str] = {}
+        for query in queries:
+            unique.setdefault(normalize_query(query), query)
+        unique_queries = list(unique.values())
+        if len(unique_queries) < len(queries):
+            logger.info(
+                f"[insight] Collapsed {len(queries)} sub-queries to "
+                f"{len(unique_queries)} unique"
+            )
+        
+        def _run(query: str) -> List[NodeWithScore]:
+            start = time.time()
+            results = self.search(query=query, k=k, **filter_kwargs)
+            logger.info(
+                f"[insight] Sub-query '{query[:50]}...' returned {len(results)} results "
+                f"in {time.time() - start:.2f}s"
+            )
+            return results
+        
+        max_workers = max(1, min(
+            int(settings.get("insight_max_parallel_sub_queries", "4")),
+            len(unique_queries),
+        ))
+        start = time.time()
+        results: List[List[NodeWithScore]] = []
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="insight-subquery"
+        ) as pool:
+            futures = [pool.submit(_run, query) for query in unique_queries]
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    logger.warning(f"[insight] Sub-query failed: {e}")
+                    results.append([])
+        logger.info(
+            f"[insight] {len(unique_queries)} sub-queries retrieved in "
+            f"{time.time() - start:.2f}s ({max_workers} parallel)"
+        )
+        return results
+    
     def execute_insight_query(
         self,
         prompt: str,
@@ -4227,36 +4948,36 @@ class LlamaIndexRAG:
         # =====================================================================
         queries = sub_queries if sub_queries else [prompt]
         all_nodes: List[NodeWithScore] = []
-        
-        for query in queries:
-            try:
-                results = self.search(query=query, k=k, **_fkw)
-                all_nodes.extend(results)
-                logger.info(
-                    f"[insight] Sub-query '{query[:50]}...' returned {len(results)} results"
-                )
-            except Exception as e:
-                logger.warning(f"[insight] Sub-query failed: {e}")
+        for results in self._run_insight_sub_queries(queries, k, _fkw):
+            all_nodes.extend(results)
         
         # =====================================================================
         # Step 2: Deduplicate by node ID, keep highest score
         # =====================================================================
+        # all_nodes is in sub-query order then rank order, so the position of
+        # a node's first occurrence is a stable tie-breaker for equal scores
+        # (RRF scores tie often) — the merged order no longer depends on
+        # which sub-query finished first.
         best_scores: Dict[str, float] = {}
         best_nodes: Dict[str, NodeWithScore] = {}
-        for nws in all_nodes:
+        first_seen: Dict[str, int] = {}
+        for position, nws in enumerate(all_nodes):
             node_id = nws.node.id_ if nws.node else None
             if not node_id:
                 continue
+            first_seen.setdefault(node_id, position)
             score = nws.score or 0.0
             if node_id not in best_scores or score > best_scores[node_id]:
                 best_scores[node_id] = score
                 best_nodes[node_id] = nws
         
-        merged = sorted(
-            best_nodes.values(),
-            key=lambda n: n.score or 0.0,
-            reverse=True,
-        )
+        merged = [
+            best_nodes[node_id]
+            for node_id in sorted(
+                best_nodes,
+                key=lambda nid: (-best_scores[nid], first_seen[nid]),
+            )
+        ]
         
         logger.info(
             f"[insight] {len(all_nodes)} total results → {len(merged)} after dedup "
@@ -4269,25 +4990,18 @@ class LlamaIndexRAG:
         try:
             cohere_key = settings.get("cohere_api_key", "")
             if cohere_key and merged:
-                from llama_index.postprocessor.cohere_rerank import CohereRerank
-                from llama_index.core.schema import QueryBundle
+                from rerank_cache import rerank_nodes
                 
                 rerank_top_n = min(
                     int(settings.get("rag_rerank_top_n", "10")) * 2,
                     len(merged),
                 )
-                rerank_model = settings.get("rag_rerank_model", "rerank-v3.5")
-                reranker = CohereRerank(
-                    api_key=cohere_key,
+                merged = rerank_nodes(
+                    merged,
+                    prompt,
                     top_n=rerank_top_n,
-                    model=rerank_model,
-                )
-                pre_rerank = len(merged)
-                merged = reranker.postprocess_nodes(
-                    merged, QueryBundle(query_str=prompt)
-                )
-                logger.info(
-                    f"[insight] Cohere rerank: {pre_rerank} → {len(merged)} results"
+                    api_key=cohere_key,
+                    label="[insight] ",
                 )
         except ImportError:
             logger.debug("Cohere rerank not available for insights")
@@ -4463,33 +5177,63 @@ class LlamaIndexRAG:
             "quality_metrics": quality_metrics,
         }
     
-    def get_stats(self) -> Dict[str, Any]:
+    # Sources broken out individually in get_stats()
+    STATS_SOURCES = ("whatsapp", "paperless", "gmail", "call_recording")
+    
+    def _exact_source_counts(self) -> Dict[str, int]:
+        """Count points per source with exact Qdrant scans (slow on large collections).
+        
+        Returns:
+            Dict of source → count plus ``rag_stats.TOTAL_FIELD`` → total points
+        """
+        from rag_stats import TOTAL_FIELD
+        
+        collection_info = self.qdrant_client.get_collection(self.COLLECTION_NAME)
+        counts: Dict[str, int] = {TOTAL_FIELD: collection_info.points_count or 0}
+        for source_value in self.STATS_SOURCES:
+            try:
+                count_result = self.qdrant_client.count(
+                    collection_name=self.COLLECTION_NAME,
+                    count_filter=Filter(must=[
+                        FieldCondition(key="source", match=MatchValue(value=source_value))
+                    ]),
+                    exact=True,
+                )
+                counts[source_value] = count_result.count
+            except Exception:
+                counts[source_value] = 0
+        return counts
+    
+    def get_stats(self, exact: bool = False) -> Dict[str, Any]:
         """Get statistics about the vector store.
         
         Returns total point count plus per-source breakdowns so the UI
         can show WhatsApp messages vs documents separately.
         
+        By default serves the cached snapshot kept by :class:`RagStatsService`
+        (incrementally updated, periodically reconciled), so no Qdrant scan
+        happens on the request path.
+        
+        Args:
+            exact: Count directly in Qdrant instead of using the cache
+        
         Returns:
             Dictionary with collection stats including source_counts
         """
         try:
-            collection_info = self.qdrant_client.get_collection(self.COLLECTION_NAME)
-            total = collection_info.points_count or 0
-
-            # Count points by source type using Qdrant scroll with filters
-            source_counts: Dict[str, int] = {}
-            for source_value in ("whatsapp", "paperless", "gmail", "call_recording"):
-                try:
-                    count_result = self.qdrant_client.count(
-                        collection_name=self.COLLECTION_NAME,
-                        count_filter=Filter(must=[
-                            FieldCondition(key="source", match=MatchValue(value=source_value))
-                        ]),
-                        exact=True,
-                    )
-                    source_counts[source_value] = count_result.count
-                except Exception:
-                    source_counts[source_value] = 0
+            from rag_stats import TOTAL_FIELD
+            
+            snapshot = None if exact else self.stats_service.snapshot(wait=True)
+            if snapshot is not None:
+                counts = snapshot["counts"]
+                total = snapshot["total"]
+                reconciled_at = snapshot["reconciled_at"]
+            else:
+                counts = self._exact_source_counts()
+                total = counts.pop(TOTAL_FIELD, 0)
+                reconciled_at = time.time()
+            
+            source_counts = {src: counts.get(src, 0) for src in self.STATS_SOURCES}
 
             return {
                 "total_documents": total,
@@ -4498,6 +5242,7 @@ class LlamaIndexRAG:
                 "gmail_emails": source_counts.get("gmail", 0),
                 "call_recordings": source_counts.get("call_recording", 0),
                 "source_counts": source_counts,
+                "stats_reconciled_at": datetime.fromtimestamp(reconciled_at).isoformat(),
                 "qdrant_server": f"{self.qdrant_host}:{self.qdrant_port}",
                 "collection_name": self.COLLECTION_NAME,
                 "dashboard_url": f"http://{self.qdrant_host}:{self.qdrant_port}/dashboard"
@@ -4603,6 +5348,9 @@ class LlamaIndexRAG:
 
             # Invalidate caches since data changed
             self.invalidate_list_caches()
+            self.stats_service.record_delete(source_value, count_before)
+            # Deleted source_ids must not be reported as stored
+            self.dedup_index.clear()
 
             logger.info(f"Deleted {count_before} points with source='{source_value}'")
             return count_before
@@ -4670,6 +5418,13 @@ class LlamaIndexRAG:
             
             # Invalidate Redis caches
             self.invalidate_list_caches()
+            self.dedup_index.clear()
+            self.stats_service.reset()
+            try:
+                from utils.corpus_stats import get_corpus_stats
+                get_corpus_stats().clear()
+            except Exception as e:
+                logger.debug(f"Corpus stats clear failed (non-critical): {e}")
             
             logger.info("Collection reset complete — all embeddings dropped")
             return True
@@ -4837,7 +5592,7 @@ class VectorOnlyRetriever(BaseRetriever):
     def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
         """Run vector similarity search only."""
         try:
-            query_embedding = Settings.embed_model.get_query_embedding(query_bundle.query_str)
+            query_embedding = get_query_embedding(query_bundle.query_str)
             
             query_kwargs = {
                 "collection_name": self._rag.COLLECTION_NAME,
@@ -0,0 +1,311 @@
+"""Tiered deduplication index for incoming messages.
+
+``LlamaIndexRAG.add_message`` must skip messages that are already stored
+(webhook retries, re-syncs).  Checking Qdrant for every message costs a
+network round-trip on the hottest path, so lookups go through three tiers:
+
+1. **In-process LRU** of recently seen ``source_id`` values — catches
+   webhook retries without any I/O.
+2. **Redis Bloom filter** (plain bitmap + ``GETBIT``, no RedisBloom module
+   needed) holding the ``source_id`` of every stored point — WhatsApp
+   messages and plugin documents (Paperless, Gmail, call recordings) alike.
+   A negative answer is definitive, so brand-new items never touch Qdrant.
+3. **Qdrant** — consulted only when the Bloom filter reports a probable hit.
+
+Every successful ingest must call :meth:`MessageDedupIndex.add`
+(``add_message`` and each plugin sync do), otherwise the stored item gets a
+definitive "not present" until the next rebuild.
+
+Deleting points (``delete_by_source``, collection reset) calls
+:meth:`MessageDedupIndex.clear`, which drops the Bloom filter and bumps a
+generation counter; every process drops its LRU when it notices the new
+generation (checked at most every ``GENERATION_CHECK_SECONDS``).
+
+The Bloom filter is rebuilt from Qdrant in a background thread when it is
+missing (first start, Redis eviction, collection reset).  Until the rebuild
+finishes, lookups fall through to Qdrant as before.
+
+Counters (LRU hits, Bloom negatives, probable hits, confirmed duplicates,
+false positives) are exposed via :meth:`MessageDedupIndex.stats`.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from utils.logger import logger
+from utils.redis_conn import get_redis_client
+
+
+BLOOM_KEY = "rag:dedup:bloom"
+BLOOM_READY_KEY = "rag:dedup:bloom:ready"
+BLOOM_REBUILD_LOCK_KEY = "rag:dedup:bloom:rebuild_lock"
+BLOOM_REBUILD_LOCK_TTL = 1800  # seconds
+BLOOM_REBUILD_RETRY_SECONDS = 60.0  # min gap between rebuild attempts per process
+GENERATION_KEY = "rag:dedup:generation"
+GENERATION_CHECK_SECONDS = 5.0  # max staleness of a process's LRU after clear()
+
+# Set a source_id's bits only on a live filter.  If Redis evicted the
+# bitmap, SETBIT would recreate it almost empty and the surviving ready
+# marker would make it look authoritative; leave it missing so the next
+# lookup falls through to Qdrant and triggers a rebuild instead.
+# KEYS[1] = Bloom bitmap, ARGV = bit positions
+_ADD_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 1, #ARGV do
+    redis.call('SETBIT', KEYS[1], ARGV[i], 1)
+end
+return 1
+"""
+
+
+class MessageDedupIndex:
+    """LRU → Redis Bloom filter → Qdrant tiered existence check."""
+
+    def __init__(
+        self,
+        exists_fn: Callable[[str], bool],
+        iter_source_ids_fn: Callable[[], Iterable[str]],
+        lru_size: int = 10_000,
+        bloom_capacity: int = 1_000_000,
+        bloom_error_rate: float = 0.01,
+    ) -> None:
+        """Initialize the index.
+
+        Args:
+            exists_fn: Authoritative existence check (Qdrant lookup).
+            iter_source_ids_fn: Yields every stored source_id (Qdrant scroll),
+                used to rebuild the Bloom filter.
+            lru_size: Max source_ids kept in the in-process LRU.
+            bloom_capacity: Expected number of stored source_ids.
+            bloom_error_rate: Target false-positive rate at capacity.
+        """
+        self._exists_fn = exists_fn
+        self._iter_source_ids_fn = iter_source_ids_fn
+        self._lru: "OrderedDict[str, None]" = OrderedDict()
+        self._lru_size = max(1, lru_size)
+        self._lock = threading.Lock()
+        self._rebuild_thread: Optional[threading.Thread] = None
+        self._last_rebuild_attempt = 0.0
+        self._add_script: Any = None
+        self._generation: Optional[str] = None
+        self._generation_checked_at = 0.0
+
+        # Optimal Bloom parameters: m = -n·ln(p) / ln(2)², k = (m/n)·ln(2)
+        capacity = max(1, bloom_capacity)
+        self.num_bits = int(math.ceil(-capacity * math.log(bloom_error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+
+        self._counters: Dict[str, int] = {
+            "checks": 0,
+            "lru_hits": 0,
+            "bloom_negatives": 0,
+            "bloom_probable_hits": 0,
+            "confirmed_duplicates": 0,
+            "false_positives": 0,
+            "bloom_unavailable": 0,
+        }
+
+    # =====================================================================
+    # Public API
+    # =====================================================================
+
+    def exists(self, source_id: str) -> bool:
+        """Return True if a message with this source_id is already stored."""
+        self._incr("checks")
+        self._sync_generation()
+        if self._lru_contains(source_id):
+            self._incr("lru_hits")
+            return True
+
+        maybe = self._bloom_might_contain(source_id)
+        if maybe is False:
+            self._incr("bloom_negatives")
+            return False
+
+        if maybe is None:
+            self._incr("bloom_unavailable")
+            self._ensure_rebuild()
+        else:
+            self._incr("bloom_probable_hits")
+
+        found = self._exists_fn(source_id)
+        if found:
+            self._lru_add(source_id)
+            if maybe:
+                self._incr("confirmed_duplicates")
+        elif maybe:
+            self._incr("false_positives")
+        return found
+
+    def add(self, source_id: str) -> None:
+        """Record a newly stored source_id in the LRU and the Bloom filter."""
+        self._lru_add(source_id)
+        try:
+            if self._add_script is None:
+                self._add_script = get_redis_client().register_script(_ADD_LUA)
+            self._add_script(keys=[BLOOM_KEY], args=self._positions(source_id))
+        except Exception as e:
+            logger.debug(f"Dedup Bloom filter add failed (non-critical): {e}")
+
+    def clear(self) -> None:
+        """Drop the LRU and the Bloom filter after points were deleted.
+
+        Other processes drop their LRU once they see the bumped generation.
+        """
+        with self._lock:
+            self._lru.clear()
+        try:
+            pipe = get_redis_client().pipeline()
+            pipe.delete(BLOOM_KEY, BLOOM_READY_KEY)
+            pipe.incr(GENERATION_KEY)
+            self._generation = str(pipe.execute()[1])
+        except Exception as e:
+            logger.debug(f"Dedup Bloom filter clear failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/false-positive counters and filter parameters."""
+        with self._lock:
+            counters = dict(self._counters)
+            lru_len = len(self._lru)
+        probable = counters["bloom_probable_hits"]
+        counters.update({
+            "lru_size": lru_len,
+            "bloom_bits": self.num_bits,
+            "bloom_hashes": self.num_hashes,
+            "false_positive_rate": (
+                round(counters["false_positives"] / probable, 4) if probable else 0.0
+            ),
+        })
+        return counters
+
+    def rebuild(self) -> int:
+        """Rebuild the Bloom filter from the authoritative store.
+
+        Bits are set on the live key (Bloom filters only grow), so concurrent
+        ``add()`` calls during the rebuild are never lost.  The ready marker
+        is dropped first so a partially refilled filter is never trusted.
+        Only one process rebuilds at a time (Redis ``SET NX`` lock).
+
+        Returns:
+            Number of source_ids loaded, or -1 if another process holds the lock
+        """
+        redis = get_redis_client()
+        if not redis.set(BLOOM_REBUILD_LOCK_KEY, "1", nx=True, ex=BLOOM_REBUILD_LOCK_TTL):
+            return -1
+
+        start = time.monotonic()
+        loaded = 0
+        try:
+            # Create the bitmap up front so add() calls racing the scroll
+            # land; bit ``num_bits`` is never a hash position.
+            pipe = redis.pipeline()
+            pipe.delete(BLOOM_READY_KEY)
+            pipe.setbit(BLOOM_KEY, self.num_bits, 0)
+            pipe.execute()
+            pipe = redis.pipeline(transaction=False)
+            for source_id in self._iter_source_ids_fn():
+                for pos in self._positions(source_id):
+                    pipe.setbit(BLOOM_KEY, pos, 1)
+                loaded += 1
+                if loaded % 1000 == 0:
+                    pipe.execute()
+            pipe.execute()
+            redis.set(BLOOM_READY_KEY, str(int(time.time())))
+            logger.info(
+                f"Dedup Bloom filter rebuilt: {loaded} source_ids in "
+                f"{time.monotonic() - start:.1f}s"
+            )
+            return loaded
+        finally:
+            redis.delete(BLOOM_REBUILD_LOCK_KEY)
+
+    # =====================================================================
+    # Internals
+    # =====================================================================
+
+    def _incr(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _sync_generation(self) -> None:
+        """Drop the LRU if another process cleared the index since the last check."""
+        now = time.monotonic()
+        if now - self._generation_checked_at < GENERATION_CHECK_SECONDS:
+            return
+        self._generation_checked_at = now
+        try:
+            generation = get_redis_client().get(GENERATION_KEY)
+        except Exception as e:
+            logger.debug(f"Dedup generation check failed: {e}")
+            return
+        with self._lock:
+            if self._generation is not None and generation != self._generation:
+                self._lru.clear()
+            self._generation = generation
+
+    def _lru_contains(self, source_id: str) -> bool:
+        with self._lock:
+            if source_id in self._lru:
+                self._lru.move_to_end(source_id)
+                return True
+            return False
+
+    def _lru_add(self, source_id: str) -> None:
+        with self._lock:
+            self._lru[source_id] = None
+            self._lru.move_to_end(source_id)
+            while len(self._lru) > self._lru_size:
+                self._lru.popitem(last=False)
+
+    def _positions(self, source_id: str) -> List[int]:
+        """Bit positions for a key via double hashing (Kirsch–Mitzenmacher)."""
+        digest = hashlib.blake2b(source_id.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def _bloom_might_contain(self, source_id: str) -> Optional[bool]:
+        """Query the Bloom filter in one round-trip.
+
+        Returns:
+            False if definitely absent, True if probably present, or None
+            when the filter is not ready (missing, evicted, or rebuilding)
+        """
+        try:
+            pipe = get_redis_client().pipeline(transaction=False)
+            pipe.exists(BLOOM_READY_KEY, BLOOM_KEY)
+            for pos in self._positions(source_id):
+                pipe.getbit(BLOOM_KEY, pos)
+            result = pipe.execute()
+        except Exception as e:
+            logger.debug(f"Dedup Bloom filter lookup failed: {e}")
+            return None
+        if result[0] < 2:
+            return None
+        return all(result[1:])
+
+    def _ensure_rebuild(self) -> None:
+        """Start a background rebuild unless one ran or started recently."""
+        with self._lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return
+            now = time.monotonic()
+            if now - self._last_rebuild_attempt < BLOOM_REBUILD_RETRY_SECONDS:
+                return
+            self._last_rebuild_attempt = now
+            self._rebuild_thread = threading.Thread(
+                target=self._rebuild_safe, name="dedup-bloom-rebuild", daemon=True
+            )
+            self._rebuild_thread.start()
+
+    def _rebuild_safe(self) -> None:
+        try:
+            self.rebuild()
+        except Exception as e:
+            logger.warning(f"Dedup Bloom filter rebuild failed: {e}")
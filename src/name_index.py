@@ -0,0 +1,169 @@
+"""Precomputed cross-script name-expansion index.
+
+``LlamaIndexRAG._expand_tokens_with_contact_names`` maps a query token like
+``שירן`` to every name part of the matching person (``Shiran``,
+``Waintrob``, ...).  The map used to be rebuilt from the identity store on
+every fulltext search, which costs tens of milliseconds with thousands of
+identities.
+
+The index is now built once per *identity version* and shared:
+
+1. **In-process** — an immutable ``MappingProxyType`` of
+   ``lowercased part → tuple of name parts``, reused while the version holds.
+2. **Redis** — the serialized index under ``identity:name_index:<version>``,
+   so a gunicorn/Celery worker that sees a new version loads the index
+   another process already built instead of rebuilding it.
+
+``identity_db.bump_identity_version()`` is called by every mutation that
+changes names or aliases (alias add/delete, rename, merge, delete), so a
+new version simply selects a new key; stale entries expire via TTL.  When
+Redis is unavailable the index is rebuilt per call, as before.
+
+Usage::
+
+    from name_index import get_name_index
+    parts = get_name_index().get("shiran", ())
+"""
+
+import json
+import re
+import threading
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from utils.logger import logger
+from utils.redis_conn import get_redis_client
+
+
+REDIS_KEY_PREFIX = "identity:name_index:"
+REDIS_TTL = 86400  # seconds — old versions are never read again
+
+# Phone numbers, group IDs and other numeric-only parts
+_NUMERIC_RE = re.compile(r"^[\d+\-#().]+$")
+# Short tokens that are common Hebrew words but also match names
+# (e.g. "בן"=son/Ben, "על"=on, "שם"=name, "גן"=garden, "אור"=light)
+_MIN_NAME_PART_LEN = 3  # Skip 1-2 char parts as map keys (too ambiguous)
+
+NameIndex = Mapping[str, Tuple[str, ...]]
+
+_EMPTY: NameIndex = MappingProxyType({})
+
+_cache: Tuple[Optional[str], NameIndex] = (None, _EMPTY)
+_build_lock = threading.Lock()
+
+
+def build_name_map(names_by_person: Dict[int, List[str]]) -> Dict[str, List[str]]:
+    """Cross-link every name part of each person.
+
+    Args:
+        names_by_person: person_id → [canonical_name, alias, ...]
+
+    Returns:
+        Dict of lowercased part → sorted list of all name parts of every
+        person that part belongs to
+    """
+    name_map: Dict[str, set] = {}
+    for names in names_by_person.values():
+        all_parts = {
+            part
+            for name in names if name
+            for part in name.split()
+            if not _NUMERIC_RE.match(part)
+        }
+        if not all_parts:
+            continue
+        for part in all_parts:
+            if len(part) >= _MIN_NAME_PART_LEN:
+                name_map.setdefault(part.lower(), set()).update(all_parts)
+    return {key: sorted(parts) for key, parts in name_map.items()}
+
+
+def _freeze(raw: Dict[str, List[str]]) -> NameIndex:
+    """Convert a plain map to an immutable index, sharing identical tuples."""
+    interned: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+    frozen: Dict[str, Tuple[str, ...]] = {}
+    for key, parts in raw.items():
+        value = tuple(parts)
+        frozen[key] = interned.setdefault(value, value)
+    return MappingProxyType(frozen)
+
+
+def _load_from_redis(version: str) -> Optional[NameIndex]:
+    try:
+        raw = get_redis_client().get(f"{REDIS_KEY_PREFIX}{version}")
+    except Exception as e:
+        logger.debug(f"Name index Redis read failed (non-critical): {e}")
+        return None
+    if not raw:
+        return None
+    try:
+        return _freeze(json.loads(raw))
+    except (ValueError, TypeError) as e:
+        logger.debug(f"Discarding corrupt name index for version {version}: {e}")
+        return None
+
+
+def _store_in_redis(version: str, raw: Dict[str, List[str]]) -> None:
+    try:
+        get_redis_client().set(
+            f"{REDIS_KEY_PREFIX}{version}",
+            json.dumps(raw, ensure_ascii=False, separators=(",", ":")),
+            ex=REDIS_TTL,
+        )
+    except Exception as e:
+        logger.debug(f"Name index Redis write failed (non-critical): {e}")
+
+
+def get_name_index() -> NameIndex:
+    """Return the name-expansion index for the current identity version.
+
+    Returns:
+        Immutable mapping of lowercased name part → tuple of all name parts
+        for the matching person(s); empty if the identity store is empty
+        or unavailable
+    """
+    global _cache
+    import identity_db
+
+    version = identity_db.get_identity_version()
+    if version is None:
+        # No shared version counter — cannot tell whether a cached index is
+        # stale, so build a fresh one (the pre-index behaviour).
+        try:
+            return _freeze(build_name_map(identity_db.get_all_person_names()))
+        except Exception as e:
+            logger.debug(f"Name index build failed (non-critical): {e}")
+            return _EMPTY
+
+    cached_version, index = _cache
+    if cached_version == version:
+        return index
+
+    with _build_lock:
+        cached_version, index = _cache
+        if cached_version == version:
+            return index
+
+        index = _load_from_redis(version)
+        source = "redis"
+        if index is None:
+            try:
+                raw = build_name_map(identity_db.get_all_person_names())
+            except Exception as e:
+                logger.debug(f"Name index build failed (non-critical): {e}")
+                return _EMPTY
+            _store_in_redis(version, raw)
+            index = _freeze(raw)
+            source = "identity store"
+
+        _cache = (version, index)
+        logger.debug(
+            f"Name index v{version} loaded from {source}: {len(index)} keys"
+        )
+        return index
+
+
+def invalidate() -> None:
+    """Drop the in-process index (the next lookup re-checks the version)."""
+    global _cache
+    _cache = (None, _EMPTY)
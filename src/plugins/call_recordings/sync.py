@@ -659,6 +659,8 @@ class CallRecordingSyncer:
 
             # Ingest into Qdrant
             added = self.rag.ingest_nodes(nodes)
+            if added:
+                self.rag.dedup_index.add(source_id)
             if added != len(nodes):
                 logger.warning(
                     f"Partial ingest for {filename}: {added}/{len(nodes)} nodes"
@@ -702,6 +702,7 @@ class EmailSyncer:
                         chunk_ok = added == len(chunk_nodes)
 
                         if chunk_ok:
+                            self.rag.dedup_index.add(source_id)
                             synced += 1
                             if len(chunks) > 1:
                                 logger.info(
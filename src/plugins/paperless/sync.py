@@ -539,6 +539,8 @@ class DocumentSyncer:
                         chunk_ok = added == len(chunk_nodes)
                         
                         if chunk_ok:
+                            self.rag.dedup_index.add(source_id)
+                            
                             # Create chunk_of edges for multi-chunk documents
                             if len(chunks) > 1:
                                 try:
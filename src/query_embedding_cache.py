@@ -0,0 +1,193 @@
+"""Content-addressed cache for query embeddings.
+
+Every retrieval path (``search``, ``_hybrid_search``, ``VectorOnlyRetriever``,
+HyDE, each ``execute_insight_query`` sub-query, each QueryFusion variant)
+used to call ``Settings.embed_model.get_query_embedding`` unconditionally,
+so repeated questions from the UI and scheduled insights re-running the
+same sub-queries every day paid for the same embedding again and again.
+
+Lookups go through two tiers keyed by ``(model, dimensions, normalized text)``:
+
+1. **In-process LRU** — no I/O at all.
+2. **Redis** — shared across the API and Celery workers, with TTL eviction.
+   Vectors are stored as base64-encoded float32 arrays (~4 KB at 1024 dims).
+
+Cache hits are recorded on the CostMeter as zero-cost embedding events so
+they show up in usage reporting alongside real embedding calls.
+
+Usage::
+
+    from query_embedding_cache import get_query_embedding
+    vector = get_query_embedding("what did Dana say about the trip?")
+"""
+
+import base64
+import hashlib
+import re
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+from utils.logger import logger
+from utils.redis_conn import get_redis_client
+
+
+REDIS_KEY_PREFIX = "rag:qemb:"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_lru: "OrderedDict[str, List[float]]" = OrderedDict()
+_lock = threading.Lock()
+_counters: Dict[str, int] = {"memory_hits": 0, "redis_hits": 0, "misses": 0}
+
+
+def normalize_query(text: str) -> str:
+    """Normalize query text for cache keying (NFC, trimmed, single spaces)."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+def _model_identity(embed_model: Any) -> Tuple[str, int]:
+    """Return the (model name, dimensions) pair identifying an embed model."""
+    model = getattr(embed_model, "model_name", None) or getattr(embed_model, "model", "") or ""
+    dims = getattr(embed_model, "dimensions", None) or 0
+    return str(model), int(dims)
+
+
+def _embed_provider(embed_model: Any, handler: Any = None) -> str:
+    """Return the provider name ("openai", "gemini") of an embed model.
+
+    Derived from the model class (``GeminiEmbedding`` → "gemini"), falling
+    back to the provider configured on the cost tracking handler.
+    """
+    class_name = type(embed_model).__name__.lower()
+    for provider in ("gemini", "openai"):
+        if provider in class_name:
+            return provider
+    return getattr(handler, "embed_provider", None) or "openai"
+
+
+def _cache_key(model: str, dims: int, text: str) -> str:
+    digest = hashlib.sha256(f"{model}\x1f{dims}\x1f{text}".encode("utf-8")).hexdigest()
+    return f"{REDIS_KEY_PREFIX}{digest}"
+
+
+def _encode(vector: List[float]) -> str:
+    return base64.b64encode(array("f", vector).tobytes()).decode("ascii")
+
+
+def _decode(raw: str) -> List[float]:
+    values = array("f")
+    values.frombytes(base64.b64decode(raw))
+    return values.tolist()
+
+
+def _lru_get(key: str) -> Optional[List[float]]:
+    with _lock:
+        vector = _lru.get(key)
+        if vector is not None:
+            _lru.move_to_end(key)
+        return vector
+
+
+def _lru_put(key: str, vector: List[float]) -> None:
+    max_size = int(settings.get("rag_query_embedding_cache_size", "512"))
+    with _lock:
+        _lru[key] = vector
+        _lru.move_to_end(key)
+        while len(_lru) > max_size:
+            _lru.popitem(last=False)
+
+
+def _record_hit(tier: str, model: str, embed_model: Any) -> None:
+    """Count a cache hit and record it on the CostMeter as a zero-cost event.
+
+    The event carries the provider and model of the embed model that would
+    have been called, so Gemini and OpenAI hits are reported separately.
+    """
+    with _lock:
+        _counters[f"{tier}_hits"] += 1
+    try:
+        from cost_meter import METER
+        from cost_callbacks import get_cost_handler
+
+        handler = get_cost_handler()
+        METER.record_embed(
+            provider=_embed_provider(embed_model, handler),
+            model=model,
+            total_tokens=0,
+            conversation_id=handler.conversation_id if handler else "",
+            request_context="query_embedding",
+            cached=True,
+            meta={"cache_tier": tier},
+        )
+    except Exception as e:
+        logger.debug(f"Failed to record query embedding cache hit: {e}")
+
+
+def get_query_embedding(query: str, embed_model: Any = None) -> List[float]:
+    """Return the query embedding for ``query``, using the cache when possible.
+
+    Args:
+        query: Query text
+        embed_model: Embedding model to use on a miss (defaults to
+            ``Settings.embed_model``)
+
+    Returns:
+        The embedding vector
+    """
+    if embed_model is None:
+        from llama_index.core import Settings
+        embed_model = Settings.embed_model
+
+    if settings.get("rag_query_embedding_cache_enabled", "true").lower() != "true":
+        return embed_model.get_query_embedding(query)
+
+    model, dims = _model_identity(embed_model)
+    key = _cache_key(model, dims, normalize_query(query))
+
+    vector = _lru_get(key)
+    if vector is not None:
+        _record_hit("memory", model, embed_model)
+        return vector
+
+    try:
+        raw = get_redis_client().get(key)
+        if raw:
+            vector = _decode(raw)
+            _lru_put(key, vector)
+            _record_hit("redis", model, embed_model)
+            return vector
+    except Exception as e:
+        logger.debug(f"Query embedding cache read failed (non-critical): {e}")
+
+    with _lock:
+        _counters["misses"] += 1
+    vector = embed_model.get_query_embedding(query)
+    _lru_put(key, vector)
+    try:
+        ttl = int(settings.get("rag_query_embedding_cache_ttl", "604800"))
+        get_redis_client().set(key, _encode(vector), ex=ttl)
+    except Exception as e:
+        logger.debug(f"Query embedding cache write failed (non-critical): {e}")
+    return vector
+
+
+def get_stats() -> Dict[str, Any]:
+    """Return in-process cache hit/miss counters."""
+    with _lock:
+        stats = dict(_counters)
+        stats["memory_size"] = len(_lru)
+    lookups = stats["memory_hits"] + stats["redis_hits"] + stats["misses"]
+    stats["hit_rate"] = (
+        round((stats["memory_hits"] + stats["redis_hits"]) / lookups, 4) if lookups else 0.0
+    )
+    return stats
+
+
+def clear() -> None:
+    """Drop the in-process LRU (Redis entries expire via TTL)."""
+    with _lock:
+        _lru.clear()
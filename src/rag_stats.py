@@ -0,0 +1,182 @@
+"""Cached vector-store statistics.
+
+``LlamaIndexRAG.get_stats()`` used to run ``get_collection`` plus one
+``count(exact=True)`` filtered scan per source on every call — including
+every ``/rag/query`` response — which is slow on large collections.
+
+:class:`RagStatsService` keeps the counts in a Redis hash instead:
+
+- **Incremental updates** — ``record_ingest`` increments per-source counts
+  after each ingest, ``record_delete`` decrements after ``delete_by_source``
+  and ``reset`` zeroes them when the collection is recreated.
+- **Periodic reconciliation** — ``reconcile`` replaces the counters with
+  exact Qdrant counts.  It runs from Celery Beat
+  (``tasks.rag.reconcile_rag_stats``) and, as a fallback, in a background
+  thread when the snapshot is missing or older than
+  ``STALE_AFTER_SECONDS``.  Re-upserts of already-stored points make the
+  incremental counts drift upwards slightly between reconciliations.
+
+Readers get the cached snapshot without touching Qdrant.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from utils.logger import logger
+from utils.redis_conn import get_redis_client
+
+
+COUNTS_KEY = "rag:stats:counts"
+META_KEY = "rag:stats:meta"
+RECONCILE_LOCK_KEY = "rag:stats:reconcile_lock"
+RECONCILE_LOCK_TTL = 600  # seconds
+STALE_AFTER_SECONDS = 900  # background reconcile if Beat hasn't run for this long
+RECONCILE_RETRY_SECONDS = 60.0  # min gap between fallback attempts per process
+
+TOTAL_FIELD = "_total"
+
+
+class RagStatsService:
+    """Redis-cached per-source point counts with periodic exact reconciliation."""
+
+    def __init__(self, exact_counts_fn: Callable[[], Dict[str, int]]) -> None:
+        """Initialize the service.
+
+        Args:
+            exact_counts_fn: Returns exact counts from Qdrant as a dict of
+                source → count plus ``TOTAL_FIELD`` → total points.
+        """
+        self._exact_counts_fn = exact_counts_fn
+        self._lock = threading.Lock()
+        self._reconcile_thread: Optional[threading.Thread] = None
+        self._last_reconcile_attempt = 0.0
+
+    # =====================================================================
+    # Public API
+    # =====================================================================
+
+    def snapshot(self, wait: bool = False) -> Optional[Dict[str, Any]]:
+        """Return the cached counts.
+
+        Args:
+            wait: When no snapshot exists yet, reconcile synchronously
+                instead of in the background.
+
+        Returns:
+            Dict with ``counts`` (source → count), ``total`` and
+            ``reconciled_at`` (unix time), or None if nothing is cached yet
+        """
+        try:
+            pipe = get_redis_client().pipeline(transaction=False)
+            pipe.hgetall(COUNTS_KEY)
+            pipe.hget(META_KEY, "reconciled_at")
+            raw, reconciled_at = pipe.execute()
+        except Exception as e:
+            logger.debug(f"RAG stats snapshot read failed: {e}")
+            raw, reconciled_at = {}, None
+
+        if not reconciled_at:
+            if wait:
+                self.reconcile()
+                return self.snapshot(wait=False)
+            self._ensure_reconcile()
+            return None
+
+        if time.time() - float(reconciled_at) > STALE_AFTER_SECONDS:
+            self._ensure_reconcile()
+
+        counts = {k: max(0, int(v)) for k, v in (raw or {}).items() if k != TOTAL_FIELD}
+        return {
+            "counts": counts,
+            "total": max(0, int((raw or {}).get(TOTAL_FIELD, 0) or 0)),
+            "reconciled_at": float(reconciled_at),
+        }
+
+    def record_ingest(self, source_counts: Dict[str, int]) -> None:
+        """Increment counts for newly ingested points.
+
+        Args:
+            source_counts: source → number of points ingested
+        """
+        self._incr(source_counts, sign=1)
+
+    def record_delete(self, source: str, count: int) -> None:
+        """Decrement counts after deleting ``count`` points of ``source``."""
+        self._incr({source: count}, sign=-1)
+
+    def reset(self) -> None:
+        """Zero all counts (the collection was dropped and recreated)."""
+        try:
+            pipe = get_redis_client().pipeline()
+            pipe.delete(COUNTS_KEY)
+            pipe.hset(META_KEY, "reconciled_at", time.time())
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"RAG stats reset failed (non-critical): {e}")
+
+    def reconcile(self) -> Optional[Dict[str, int]]:
+        """Replace the cached counts with exact counts from Qdrant.
+
+        Only one process reconciles at a time (Redis ``SET NX`` lock).
+
+        Returns:
+            The exact counts, or None if another process holds the lock
+        """
+        redis = get_redis_client()
+        if not redis.set(RECONCILE_LOCK_KEY, "1", nx=True, ex=RECONCILE_LOCK_TTL):
+            return None
+
+        start = time.monotonic()
+        try:
+            exact = self._exact_counts_fn()
+            pipe = redis.pipeline()
+            pipe.delete(COUNTS_KEY)
+            pipe.hset(COUNTS_KEY, mapping=exact)
+            pipe.hset(META_KEY, "reconciled_at", time.time())
+            pipe.execute()
+            logger.info(
+                f"RAG stats reconciled in {time.monotonic() - start:.1f}s: "
+                f"{exact.get(TOTAL_FIELD, 0)} points"
+            )
+            return exact
+        finally:
+            redis.delete(RECONCILE_LOCK_KEY)
+
+    # =====================================================================
+    # Internals
+    # =====================================================================
+
+    def _incr(self, source_counts: Dict[str, int], sign: int) -> None:
+        total = sum(source_counts.values())
+        if not total:
+            return
+        try:
+            pipe = get_redis_client().pipeline()
+            for source, count in source_counts.items():
+                if count:
+                    pipe.hincrby(COUNTS_KEY, source, sign * count)
+            pipe.hincrby(COUNTS_KEY, TOTAL_FIELD, sign * total)
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"RAG stats update failed (non-critical): {e}")
+
+    def _ensure_reconcile(self) -> None:
+        """Start a background reconcile unless one ran or started recently."""
+        with self._lock:
+            if self._reconcile_thread is not None and self._reconcile_thread.is_alive():
+                return
+            now = time.monotonic()
+            if now - self._last_reconcile_attempt < RECONCILE_RETRY_SECONDS:
+                return
+            self._last_reconcile_attempt = now
+            self._reconcile_thread = threading.Thread(
+                target=self._reconcile_safe, name="rag-stats-reconcile", daemon=True
+            )
+            self._reconcile_thread.start()
+
+    def _reconcile_safe(self) -> None:
+        try:
+            self.reconcile()
+        except Exception as e:
+            logger.warning(f"RAG stats reconcile failed: {e}")
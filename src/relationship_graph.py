@@ -0,0 +1,138 @@
+"""In-memory relationship graph for multi-hop person expansion.
+
+``identity_db.expand_person_ids_with_relationships`` (and through it
+``Identity.expand_related``) used to walk the relationship graph one
+person at a time, issuing a forward and a reverse query per node per hop.
+
+:class:`RelationshipGraph` holds undirected adjacency lists for the whole
+``person_relationships`` table, loaded with a single query once per
+*relationship version* (see ``identity_db.bump_relationship_version``,
+called by ``add_relationship``, ``merge_persons`` and person deletions).
+Expansion is then a plain BFS in memory, with arbitrary depth and optional
+relationship-type filters.
+
+When Redis is unavailable there is no version to key the cache on, so
+:func:`get_relationship_graph` returns None and ``identity_db`` runs the
+traversal as one recursive CTE instead.
+
+Usage::
+
+    from relationship_graph import get_relationship_graph
+    ids = get_relationship_graph().expand([42], max_depth=2,
+                                          relationship_types={"parent", "spouse"})
+"""
+
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from utils.logger import logger
+
+
+def normalize_types(relationship_types: Optional[Iterable[str]]) -> Optional[FrozenSet[str]]:
+    """Lowercase a relationship-type filter (None means "all types")."""
+    if relationship_types is None:
+        return None
+    if isinstance(relationship_types, str):
+        relationship_types = [relationship_types]
+    return frozenset(t.strip().lower() for t in relationship_types if t and t.strip())
+
+
+class RelationshipGraph:
+    """Undirected adjacency lists over ``person_relationships``."""
+
+    def __init__(self, edges: Iterable[Tuple[int, int, str]]) -> None:
+        """Build the adjacency lists.
+
+        Args:
+            edges: (person_id, related_person_id, relationship_type) tuples
+                as returned by ``identity_db.get_all_relationship_edges()``
+        """
+        adjacency: Dict[int, List[Tuple[int, str]]] = {}
+        interned: Dict[str, str] = {}
+        self.edge_count = 0
+        for src, dst, rel_type in edges:
+            rel = (rel_type or "").lower()
+            rel = interned.setdefault(rel, rel)
+            adjacency.setdefault(src, []).append((dst, rel))
+            adjacency.setdefault(dst, []).append((src, rel))
+            self.edge_count += 1
+        self._adjacency: Dict[int, Tuple[Tuple[int, str], ...]] = {
+            pid: tuple(neighbors) for pid, neighbors in adjacency.items()
+        }
+
+    def expand(
+        self,
+        person_ids: Iterable[int],
+        max_depth: int = 1,
+        relationship_types: Optional[FrozenSet[str]] = None,
+    ) -> List[int]:
+        """Breadth-first expansion from ``person_ids``.
+
+        Args:
+            person_ids: Starting person IDs
+            max_depth: Number of relationship hops to follow
+            relationship_types: Lowercased types to follow (see
+                :func:`normalize_types`); None follows every type
+
+        Returns:
+            Starting IDs followed by related persons in hop order
+        """
+        expanded: Dict[int, None] = dict.fromkeys(person_ids)
+        frontier = list(expanded)
+        for _ in range(max_depth):
+            if not frontier:
+                break
+            next_frontier: List[int] = []
+            for pid in frontier:
+                for related_id, rel_type in self._adjacency.get(pid, ()):
+                    if relationship_types is not None and rel_type not in relationship_types:
+                        continue
+                    if related_id not in expanded:
+                        expanded[related_id] = None
+                        next_frontier.append(related_id)
+            frontier = next_frontier
+        return list(expanded)
+
+
+_cache: Tuple[Optional[str], Optional[RelationshipGraph]] = (None, None)
+_build_lock = threading.Lock()
+
+
+def get_relationship_graph() -> Optional[RelationshipGraph]:
+    """Return the graph for the current relationship version.
+
+    Returns:
+        The cached graph, or None when Redis (and with it the version
+        counter) is unavailable or the graph could not be loaded
+    """
+    global _cache
+    import identity_db
+
+    version = identity_db.get_relationship_version()
+    if version is None:
+        return None
+
+    cached_version, graph = _cache
+    if cached_version == version and graph is not None:
+        return graph
+
+    with _build_lock:
+        cached_version, graph = _cache
+        if cached_version == version and graph is not None:
+            return graph
+        try:
+            graph = RelationshipGraph(identity_db.get_all_relationship_edges())
+        except Exception as e:
+            logger.debug(f"Relationship graph load failed (non-critical): {e}")
+            return None
+        _cache = (version, graph)
+        logger.debug(
+            f"Relationship graph v{version} loaded: {graph.edge_count} edges"
+        )
+        return graph
+
+
+def invalidate() -> None:
+    """Drop the in-process graph (the next lookup re-checks the version)."""
+    global _cache
+    _cache = (None, None)
@@ -0,0 +1,178 @@
+"""Pooled Cohere reranker clients and rerank-result memoization.
+
+``ArchiveRetriever._retrieve`` and ``execute_insight_query`` used to build a
+new ``CohereRerank`` (and with it a new Cohere HTTP client) on every query,
+and re-ranked identical candidate sets whenever a question was repeated.
+
+- **Client pool** — one ``CohereRerank`` per ``(api key, model, top_n)``,
+  reused across queries and threads.
+- **Memo cache** — the ranking for ``(model, top_n, query, sorted candidate
+  node IDs)`` is kept in an in-process LRU and in Redis (shared across
+  workers, TTL eviction).  When the candidate set is unchanged the remote
+  call is skipped and the cached order and relevance scores are re-applied
+  to the current nodes.  The latency of the original call is stored with
+  the entry so hits can log the time saved.
+
+Usage::
+
+    from rerank_cache import rerank_nodes
+    nodes = rerank_nodes(nodes, query_str, top_n=10)
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from llama_index.core.schema import NodeWithScore, QueryBundle
+
+from config import settings
+from utils.logger import logger
+from utils.redis_conn import get_redis_client
+
+
+REDIS_KEY_PREFIX = "rag:rerank:"
+_MEMO_MAX_SIZE = 256
+
+_clients: Dict[Tuple[str, str, int], Any] = {}
+_memo: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_lock = threading.Lock()
+_counters: Dict[str, float] = {"calls": 0, "memory_hits": 0, "redis_hits": 0, "saved_ms": 0.0}
+
+
+def _get_reranker(api_key: str, model: str, top_n: int) -> Any:
+    """Return the pooled ``CohereRerank`` for this configuration."""
+    from llama_index.postprocessor.cohere_rerank import CohereRerank
+
+    key_id = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    pool_key = (key_id, model, top_n)
+    with _lock:
+        reranker = _clients.get(pool_key)
+        if reranker is None:
+            reranker = CohereRerank(api_key=api_key, top_n=top_n, model=model)
+            _clients[pool_key] = reranker
+        return reranker
+
+
+def _memo_key(model: str, top_n: int, query: str, nodes: List[NodeWithScore]) -> str:
+    node_ids = sorted(nws.node.node_id for nws in nodes)
+    payload = "\x1f".join([model, str(top_n), query.strip(), *node_ids])
+    return f"{REDIS_KEY_PREFIX}{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def _memo_get(key: str) -> Tuple[Optional[Dict[str, Any]], str]:
+    """Look up a memoized ranking: in-process LRU first, then Redis."""
+    with _lock:
+        entry = _memo.get(key)
+        if entry is not None:
+            _memo.move_to_end(key)
+            return entry, "memory"
+    try:
+        raw = get_redis_client().get(key)
+        if raw:
+            entry = json.loads(raw)
+            _memo_put_local(key, entry)
+            return entry, "redis"
+    except Exception as e:
+        logger.debug(f"Rerank memo read failed (non-critical): {e}")
+    return None, ""
+
+
+def _memo_put_local(key: str, entry: Dict[str, Any]) -> None:
+    with _lock:
+        _memo[key] = entry
+        _memo.move_to_end(key)
+        while len(_memo) > _MEMO_MAX_SIZE:
+            _memo.popitem(last=False)
+
+
+def _memo_put(key: str, entry: Dict[str, Any]) -> None:
+    _memo_put_local(key, entry)
+    try:
+        ttl = int(settings.get("rag_rerank_cache_ttl", "3600"))
+        if ttl > 0:
+            get_redis_client().set(key, json.dumps(entry), ex=ttl)
+    except Exception as e:
+        logger.debug(f"Rerank memo write failed (non-critical): {e}")
+
+
+def rerank_nodes(
+    nodes: List[NodeWithScore],
+    query_str: str,
+    top_n: int,
+    model: Optional[str] = None,
+    api_key: Optional[str] = None,
+    label: str = "",
+) -> List[NodeWithScore]:
+    """Rerank ``nodes`` with Cohere, reusing pooled clients and memoized results.
+
+    Args:
+        nodes: Candidate nodes (node IDs must be stable, as in Qdrant)
+        query_str: Query text the candidates are ranked against
+        top_n: Number of nodes to keep
+        model: Cohere rerank model (defaults to ``rag_rerank_model``)
+        api_key: Cohere API key (defaults to ``cohere_api_key``)
+        label: Log prefix identifying the caller
+
+    Returns:
+        Top-N nodes in relevance order with Cohere relevance scores
+
+    Raises:
+        ImportError: If the Cohere rerank postprocessor is not installed
+    """
+    if not nodes:
+        return []
+    model = model or settings.get("rag_rerank_model", "rerank-v3.5")
+    api_key = api_key or settings.get("cohere_api_key", "")
+
+    key = _memo_key(model, top_n, query_str, nodes)
+    entry, tier = _memo_get(key)
+    if entry is not None:
+        by_id = {nws.node.node_id: nws.node for nws in nodes}
+        ranked = [
+            NodeWithScore(node=by_id[node_id], score=score)
+            for node_id, score in entry["ranking"]
+            if node_id in by_id
+        ]
+        saved_ms = float(entry.get("latency_ms", 0.0))
+        with _lock:
+            _counters[f"{tier}_hits"] += 1
+            _counters["saved_ms"] += saved_ms
+        logger.info(
+            f"{label}Cohere rerank memo hit ({tier}, {model}): {len(nodes)} → "
+            f"{len(ranked)} results, saved ~{saved_ms:.0f}ms"
+        )
+        return ranked
+
+    reranker = _get_reranker(api_key, model, top_n)
+    start = time.monotonic()
+    ranked = reranker.postprocess_nodes(nodes, QueryBundle(query_str=query_str))
+    latency_ms = (time.monotonic() - start) * 1000
+    with _lock:
+        _counters["calls"] += 1
+
+    _memo_put(key, {
+        "ranking": [[nws.node.node_id, nws.score] for nws in ranked],
+        "latency_ms": round(latency_ms, 1),
+    })
+    logger.info(
+        f"{label}Cohere rerank ({model}): {len(nodes)} → {len(ranked)} results "
+        f"in {latency_ms:.0f}ms"
+    )
+    return ranked
+
+
+def get_stats() -> Dict[str, Any]:
+    """Return in-process rerank call/hit counters."""
+    with _lock:
+        stats: Dict[str, Any] = dict(_counters)
+        stats["memo_size"] = len(_memo)
+        stats["pooled_clients"] = len(_clients)
+    stats["saved_ms"] = round(stats["saved_ms"], 1)
+    lookups = stats["calls"] + stats["memory_hits"] + stats["redis_hits"]
+    stats["hit_rate"] = (
+        round((stats["memory_hits"] + stats["redis_hits"]) / lookups, 4) if lookups else 0.0
+    )
+    return stats
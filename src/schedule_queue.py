@@ -0,0 +1,237 @@
+"""Redis due-queue that dispatches Scheduled Insights exactly when due.
+
+``check_scheduled_insights`` used to run every 60 seconds from Celery Beat
+and query SQLite for due tasks, even when the next task was hours away,
+and a task could start up to a minute late.
+
+Scheduling is now event-driven:
+
+- ``scheduled:due`` is a ZSET of task_id → due time (epoch seconds).
+  ``scheduled_tasks_db`` mirrors every ``next_run_at`` change into it
+  (create, update, toggle, delete, advance).
+- A single **timer** — one ``tasks.scheduled.dispatch_due_insights``
+  message with a Celery ETA at the head of the ZSET — wakes up when the
+  earliest task is due, atomically claims every due entry, dispatches
+  ``execute_scheduled_insight`` for each and re-arms for the new head.
+  ``scheduled:timer`` holds the live timer's token and wake time; arming
+  is a compare-and-set, so a timer is only replaced by an earlier one.
+  Superseded timers claim nothing and only re-arm (a no-op while the live
+  timer is pending).  The hash expires two minutes after its wake time so
+  a lost timer message cannot block re-arming; a timer that runs later
+  than that finds no hash and still claims.
+- The timer never sleeps longer than ``MAX_TIMER_SECONDS`` so an ETA
+  message is never held past the Redis broker's visibility timeout
+  (which would redeliver it).
+
+``sync_from_db`` rebuilds the ZSET from SQLite and re-arms the timer; it
+runs at worker start-up and from a low-frequency Beat entry as a repair
+path (e.g. after a Redis flush), not as the dispatch mechanism.
+
+The difference between a task's due time and the moment its execution
+starts is recorded per run (``record_skew``) and summarized by
+:func:`get_stats`.
+
+Usage::
+
+    import schedule_queue
+    schedule_queue.schedule(task_id, "2024-06-01 08:00:00", "Asia/Jerusalem")
+"""
+
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from utils.logger import logger
+from utils.redis_conn import get_redis_client
+
+
+DUE_KEY = "scheduled:due"
+TIMER_KEY = "scheduled:timer"
+SKEW_SAMPLES_KEY = "scheduled:skew:samples"
+SKEW_TOTALS_KEY = "scheduled:skew:totals"
+
+# Longest single timer sleep (seconds); keeps ETA messages well inside the
+# Redis broker's default 1h visibility timeout.
+MAX_TIMER_SECONDS = 1800
+SKEW_SAMPLE_SIZE = 200
+
+# Install a timer unless one that wakes up no later than the head is live.
+# KEYS[1] = due ZSET, KEYS[2] = timer hash
+# ARGV    = now, max_seconds, token
+_ARM_LUA = """
+local head = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+if #head == 0 then
+    redis.call('DEL', KEYS[2])
+    return false
+end
+local now = tonumber(ARGV[1])
+local wake = math.min(tonumber(head[2]), now + tonumber(ARGV[2]))
+local current = redis.call('HGET', KEYS[2], 'wake')
+if current and tonumber(current) <= wake then
+    return false
+end
+redis.call('HSET', KEYS[2], 'token', ARGV[3], 'wake', tostring(wake))
+redis.call('EXPIRE', KEYS[2], math.max(1, math.ceil(wake - now)) + 120)
+return tostring(wake)
+"""
+
+# Fire the timer identified by ARGV[1]: if it is still the live timer (or
+# no timer is recorded — a late timer whose hash already expired), clear it
+# and pop every entry due at ARGV[2].  Returns a flat [member, score, ...]
+# list, or false for a timer superseded by another live one.
+_CLAIM_LUA = """
+local current = redis.call('HGET', KEYS[2], 'token')
+if current and current ~= ARGV[1] then
+    return false
+end
+redis.call('DEL', KEYS[2])
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[2], 'WITHSCORES')
+for i = 1, #due, 2 do
+    redis.call('ZREM', KEYS[1], due[i])
+end
+return due
+"""
+
+_scripts: Dict[str, Any] = {}
+
+
+def _script(name: str) -> Any:
+    """Get a registered (EVALSHA-cached) scheduler Lua script."""
+    script = _scripts.get(name)
+    if script is None:
+        source = _ARM_LUA if name == "arm" else _CLAIM_LUA
+        script = get_redis_client().register_script(source)
+        _scripts[name] = script
+    return script
+
+
+def to_epoch(next_run_at: str, timezone: str) -> float:
+    """Convert a stored ``next_run_at`` (wall-clock in ``timezone``) to epoch seconds."""
+    local = datetime.strptime(next_run_at, "%Y-%m-%d %H:%M:%S")
+    return local.replace(tzinfo=ZoneInfo(timezone or "UTC")).timestamp()
+
+
+# ---------------------------------------------------------------------------
+# Queue maintenance
+# ---------------------------------------------------------------------------
+
+def schedule(task_id: int, next_run_at: str, timezone: str) -> None:
+    """Add or move a task in the due-queue and re-arm the timer if it is earlier."""
+    get_redis_client().zadd(DUE_KEY, {str(task_id): to_epoch(next_run_at, timezone)})
+    arm()
+
+
+def unschedule(task_id: int) -> None:
+    """Remove a task from the due-queue (disabled or deleted)."""
+    get_redis_client().zrem(DUE_KEY, str(task_id))
+
+
+def arm() -> Optional[float]:
+    """Make sure a timer is pending for the earliest due task.
+
+    Returns:
+        Wake-up time (epoch) of a newly sent timer, or None if the live
+        timer already wakes up early enough or the queue is empty
+    """
+    token = uuid.uuid4().hex
+    wake = _script("arm")(
+        keys=[DUE_KEY, TIMER_KEY],
+        args=[time.time(), MAX_TIMER_SECONDS, token],
+    )
+    if not wake:
+        return None
+    wake = float(wake)
+
+    from tasks.scheduled import dispatch_due_insights
+    dispatch_due_insights.apply_async(
+        args=[token], eta=datetime.fromtimestamp(wake, tz=dt_timezone.utc),
+    )
+    logger.debug(f"Insight scheduler armed for {datetime.fromtimestamp(wake)} ({token[:8]})")
+    return wake
+
+
+def claim_due(token: str) -> Optional[List[Tuple[int, float]]]:
+    """Pop every due task if ``token`` belongs to the live timer.
+
+    Returns:
+        (task_id, due epoch) pairs in due order, or None if another timer
+        is live
+    """
+    raw = _script("claim")(keys=[DUE_KEY, TIMER_KEY], args=[token, time.time()])
+    if raw is None:
+        return None
+    return [(int(raw[i]), float(raw[i + 1])) for i in range(0, len(raw), 2)]
+
+
+def sync_from_db() -> int:
+    """Rebuild the due-queue from SQLite and arm the timer.
+
+    Returns:
+        Number of enabled tasks with a due time
+    """
+    import scheduled_tasks_db
+
+    entries: Dict[str, float] = {}
+    for task_id, next_run_at, timezone in scheduled_tasks_db.get_schedule_entries():
+        try:
+            entries[str(task_id)] = to_epoch(next_run_at, timezone)
+        except Exception as e:
+            logger.warning(f"Scheduled task #{task_id} has invalid next_run_at {next_run_at!r}: {e}")
+
+    pipe = get_redis_client().pipeline()
+    pipe.delete(DUE_KEY)
+    if entries:
+        pipe.zadd(DUE_KEY, entries)
+    pipe.execute()
+    arm()
+    return len(entries)
+
+
+# ---------------------------------------------------------------------------
+# Skew metrics
+# ---------------------------------------------------------------------------
+
+def record_skew(task_id: int, skew_ms: int) -> None:
+    """Record the delay between a task's due time and its execution start."""
+    try:
+        pipe = get_redis_client().pipeline()
+        pipe.lpush(SKEW_SAMPLES_KEY, skew_ms)
+        pipe.ltrim(SKEW_SAMPLES_KEY, 0, SKEW_SAMPLE_SIZE - 1)
+        pipe.hincrby(SKEW_TOTALS_KEY, "runs", 1)
+        pipe.hincrby(SKEW_TOTALS_KEY, "sum_ms", skew_ms)
+        pipe.hset(SKEW_TOTALS_KEY, mapping={"last_ms": skew_ms, "last_task_id": task_id})
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"Failed to record schedule skew (non-critical): {e}")
+
+
+def get_stats() -> Dict[str, Any]:
+    """Return due-queue state and dispatch skew statistics."""
+    redis = get_redis_client()
+    head = redis.zrange(DUE_KEY, 0, 0, withscores=True)
+    timer = redis.hgetall(TIMER_KEY)
+    totals = redis.hgetall(SKEW_TOTALS_KEY)
+    samples = sorted(int(s) for s in redis.lrange(SKEW_SAMPLES_KEY, 0, -1))
+
+    def _iso(epoch: Optional[float]) -> Optional[str]:
+        return datetime.fromtimestamp(epoch, tz=dt_timezone.utc).isoformat() if epoch else None
+
+    runs = int(totals.get("runs", 0))
+    return {
+        "queued_tasks": redis.zcard(DUE_KEY),
+        "next_due_task_id": int(head[0][0]) if head else None,
+        "next_due_at": _iso(head[0][1]) if head else None,
+        "timer_wake_at": _iso(float(timer["wake"])) if timer.get("wake") else None,
+        "skew": {
+            "runs": runs,
+            "mean_ms": round(int(totals.get("sum_ms", 0)) / runs) if runs else None,
+            "last_ms": int(totals["last_ms"]) if "last_ms" in totals else None,
+            "last_task_id": int(totals["last_task_id"]) if "last_task_id" in totals else None,
+            "recent_samples": len(samples),
+            "p50_ms": samples[len(samples) // 2] if samples else None,
+            "p95_ms": samples[max(0, int(len(samples) * 0.95) - 1)] if samples else None,
+            "max_ms": samples[-1] if samples else None,
+        },
+    }
@@ -339,58 +339,16 @@ def _next_interval(value: str, now: datetime, tz: ZoneInfo) -> str:
 def _next_cron(value: str, now: datetime, tz: ZoneInfo) -> str:
     """Compute next cron run. value = standard 5-field cron expression.
 
-    Uses a simple brute-force approach: iterate minute-by-minute for
-    up to 2 days to find the next match. For most cron expressions
-    this finds a match within seconds.
-    """
-    fields = value.strip().split()
-    if len(fields) != 5:
-        logger.warning(f"Invalid cron expression (expected 5 fields): {value}")
-        return (now + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S")
-
-    minute_spec, hour_spec, dom_spec, month_spec, dow_spec = fields
-
-    def _matches_field(spec: str, val: int, max_val: int) -> bool:
-        """Check if a value matches a cron field spec."""
-        if spec == "*":
-            return True
-        for part in spec.split(","):
-            if "-" in part:
-                lo, hi = part.split("-", 1)
-                if int(lo) <= val <= int(hi):
-                    return True
-            elif "/" in part:
-                base, step = part.split("/", 1)
-                base_val = 0 if base == "*" else int(base)
-                if (val - base_val) % int(step) == 0 and val >= base_val:
-                    return True
-            else:
-                if val == int(part):
-                    return True
-        return False
-
-    # Start from next minute
-    candidate = (now + timedelta(minutes=1)).replace(second=0, microsecond=0)
-    # Search up to 2 days ahead
-    limit = now + timedelta(days=2)
-
-    while candidate < limit:
-        # cron dow: 0=Sunday, Python weekday: 0=Monday
-        cron_dow = (candidate.weekday() + 1) % 7  # Convert to cron convention
-
-        if (
-            _matches_field(minute_spec, candidate.minute, 59)
-            and _matches_field(hour_spec, candidate.hour, 23)
-            and _matches_field(dom_spec, candidate.day, 31)
-            and _matches_field(month_spec, candidate.month, 12)
-            and _matches_field(dow_spec, cron_dow, 6)
-        ):
-            return candidate.strftime("%Y-%m-%d %H:%M:%S")
+    The expression is compiled once (see ``cron_schedule``) and the next
+    fire time is found by jumping month → day → hour → minute, so sparse
+    schedules (quarterly, yearly) resolve exactly.
 
-        candidate += timedelta(minutes=1)
+    Raises:
+        ValueError: If the expression is invalid or can never match
+    """
+    from cron_schedule import compile_cron
 
-    # Fallback if no match found
-    return (now + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S")
+    return compile_cron(value.strip()).next_after(now).strftime("%Y-%m-%d %H:%M:%S")
 
 
 # ---------------------------------------------------------------------------
@@ -447,6 +405,7 @@ def create_task(
     conn.commit()
 
     task_id = cursor.lastrowid
+    _sync_schedule(task_id)
     logger.info(f"Created scheduled task #{task_id}: '{name}' ({schedule_type}={schedule_value})")
     task = get_task(task_id)  # type: ignore[arg-type]
     assert task is not None, f"Task #{task_id} not found immediately after creation"
@@ -630,6 +589,7 @@ def delete_task(task_id: int) -> bool:
     conn.commit()
     deleted = cursor.rowcount > 0
     if deleted:
+        _sync_schedule(task_id)
         logger.info(f"Deleted scheduled task #{task_id}")
     return deleted
 
@@ -664,6 +624,7 @@ def toggle_task(task_id: int) -> Optional[bool]:
         (int(new_enabled), next_run, now, task_id),
     )
     conn.commit()
+    _sync_schedule(task_id)
 
     logger.info(f"Toggled scheduled task #{task_id}: enabled={new_enabled}")
     return new_enabled
@@ -838,6 +799,49 @@ def update_next_run(task_id: int, next_run_at: Optional[str]) -> None:
         (next_run_at, task_id),
     )
     conn.commit()
+    _sync_schedule(task_id)
+
+
+def _sync_schedule(task_id: int) -> None:
+    """Mirror a task's next_run_at into the Redis due-queue (see schedule_queue)."""
+    try:
+        import schedule_queue
+
+        row = _get_connection().execute(
+            "SELECT enabled, next_run_at, timezone FROM scheduled_tasks WHERE id = ?",
+            (task_id,),
+        ).fetchone()
+        if row and row["enabled"] and row["next_run_at"]:
+            schedule_queue.schedule(task_id, row["next_run_at"], row["timezone"])
+        else:
+            schedule_queue.unschedule(task_id)
+    except Exception as e:
+        logger.debug(f"Failed to sync task #{task_id} to the scheduler queue (non-critical): {e}")
+
+
+def get_schedule_entry(task_id: int) -> Optional[Tuple[str, str]]:
+    """Get (next_run_at, timezone) for a task if it is enabled and scheduled."""
+    conn = _get_connection()
+    row = conn.execute(
+        """
+        SELECT next_run_at, timezone FROM scheduled_tasks
+        WHERE id = ? AND enabled = 1 AND next_run_at IS NOT NULL
+        """,
+        (task_id,),
+    ).fetchone()
+    return (row["next_run_at"], row["timezone"]) if row else None
+
+
+def get_schedule_entries() -> List[Tuple[int, str, str]]:
+    """Get (task_id, next_run_at, timezone) for every enabled, scheduled task."""
+    conn = _get_connection()
+    rows = conn.execute(
+        """
+        SELECT id, next_run_at, timezone FROM scheduled_tasks
+        WHERE enabled = 1 AND next_run_at IS NOT NULL
+        """
+    ).fetchall()
+    return [(row["id"], row["next_run_at"], row["timezone"]) for row in rows]
 
 
 def get_due_tasks() -> List[Dict[str, Any]]:
@@ -173,6 +173,7 @@ DEFAULT_SETTINGS: List[Tuple[str, str, str, str, str]] = [
     ("rag_fulltext_score_sender", "0.95", "rag", "float", "Full-text search score for sender field matches (0.0-1.0)"),
     ("rag_fulltext_score_chat_name", "0.85", "rag", "float", "Full-text search score for chat name field matches (0.0-1.0)"),
     ("rag_fulltext_score_message", "0.75", "rag", "float", "Full-text search score for message content matches (0.0-1.0)"),
+    ("rag_fulltext_batched", "true", "rag", "bool", "Send all per-field full-text searches to Qdrant as one batched request"),
     ("rag_morphology_prefixes", "\u05d4\u05d1\u05dc\u05de\u05e9\u05db\u05d5", "rag", "text", "Single-letter prefixes to strip during fulltext tokenization (e.g. Hebrew הבלמשכו). Leave empty to disable."),
     # rag_min_solo_embed_chars removed — all messages are now always embedded
     # individually.  The per-message cost is negligible (~$0.000005) and the
@@ -181,13 +182,29 @@ DEFAULT_SETTINGS: List[Tuple[str, str, str, str, str]] = [
     ("rag_chunk_max_messages", "5", "rag", "int", "Max messages per conversation chunk before flushing"),
     ("rag_chunk_buffer_ttl", "120", "rag", "int", "Conversation chunk buffer TTL in seconds"),
     ("rag_chunk_overlap_messages", "1", "rag", "int", "Number of messages to keep as overlap between consecutive conversation chunks"),
+    ("rag_ingest_batch_enabled", "true", "rag", "bool", "Coalesce nodes from concurrent ingest tasks (via a shared Redis queue) into one batched embedding + Qdrant upsert"),
+    ("rag_ingest_batch_window_ms", "50", "rag", "int", "Max time (ms) a node waits in the ingestion queue before its batch is flushed"),
+    ("rag_ingest_batch_max_size", "64", "rag", "int", "Flush the ingestion queue as soon as this many nodes are pending"),
+    ("rag_dedup_lru_size", "10000", "rag", "int", "In-process LRU size for recently seen message IDs (dedup tier 1)"),
+    ("rag_dedup_bloom_capacity", "1000000", "rag", "int", "Expected number of stored messages used to size the Redis Bloom dedup filter (1% false-positive rate)"),
+    ("rag_query_embedding_cache_enabled", "true", "rag", "bool", "Cache query embeddings (in-process LRU + Redis) so repeated queries skip the embedding API call"),
+    ("rag_query_embedding_cache_size", "512", "rag", "int", "Max query embeddings kept in the in-process LRU"),
+    ("rag_query_embedding_cache_ttl", "604800", "rag", "int", "Redis TTL (seconds) for cached query embeddings (default: 7 days)"),
+    ("rag_retrieval_max_workers", "8", "rag", "int", "Thread pool size for running independent retrieval stages (expansions, recency, person search) concurrently"),
     ("gmail_signature_markers", "-- ,--,---", "rag", "text", "Comma-separated email signature delimiters (content after these is stripped)"),
     # RAG — LlamaIndex feature toggles
     ("rag_embedding_cache_enabled", "true", "rag", "bool", "Enable Redis-backed embedding cache (avoids re-embedding unchanged content during re-syncs)"),
     ("rag_rerank_top_n", "10", "rag", "int", "Number of results to keep after Cohere reranking (reranking is auto-enabled when cohere_api_key is set)"),
     ("rag_rerank_model", "rerank-multilingual-v3.0", "rag", "text", "Cohere rerank model (rerank-multilingual-v3.0 supports Hebrew). Reranking auto-activates when cohere_api_key is set."),
+    ("rag_rerank_cache_ttl", "3600", "rag", "int", "Seconds to memoize Cohere rerank results for an identical query + candidate set (0 = in-process only)"),
+    ("rag_sparse_idf_enabled", "true", "rag", "bool", "Weight sparse (BM25) query terms by corpus IDF so common words count less in hybrid search"),
+    ("rag_hybrid_sparse_prefetch_factor", "2", "rag", "int", "Sparse prefetch candidates per requested result when IDF weighting is active (unweighted queries use 3)"),
+    ("rag_sparse_encoder_processes", "1", "rag", "int", "Worker processes for encoding large ingest batches into sparse vectors (1 = in-process)"),
     ("rag_query_fusion_num_queries", "3", "rag", "int", "Number of query variants to generate for QueryFusionRetriever (always active)"),
     ("rag_entity_extraction_in_pipeline", "false", "rag", "bool", "Run entity extraction as part of the LlamaIndex ingestion pipeline (instead of standalone)"),
+    ("rag_system_prompt_contacts", "full", "rag", "select", "Known contacts injected into the chat system prompt: full (whole roster), relevant (only names mentioned in the conversation) or none"),
+    ("rag_relationship_expansion_depth", "1", "rag", "int", "Relationship hops to follow when a family/team query expands resolved persons"),
+    ("rag_relationship_expansion_types", "", "rag", "text", "Comma-separated relationship types to follow during expansion (empty = all types)"),
     ("asset_neighborhood_expansion_enabled", "false", "rag", "bool", "Enable asset neighborhood expansion: follow thread/attachment/parent edges at retrieval time for cross-channel coherence"),
     ("pii_redaction_enabled", "false", "rag", "bool", "Enable PII detection and redaction (requires presidio-analyzer and presidio-anonymizer packages)"),
     # RAG — Source display filtering (controls which sources are shown to the user)
@@ -199,6 +216,7 @@ DEFAULT_SETTINGS: List[Tuple[str, str, str, str, str]] = [
     ("chat_identity_extraction_enabled", "true", "rag", "bool", "Learn identity facts from user chat messages (corrections, family info shared in conversation)"),
     # Insights — Scheduled Insights quality settings
     ("insight_default_k", "20", "insights", "int", "Documents per sub-query for insights (higher = more thorough, default 20)"),
+    ("insight_max_parallel_sub_queries", "4", "insights", "int", "Max insight sub-queries retrieved concurrently (1 = sequential)"),
     ("insight_max_context_tokens", "8000", "insights", "int", "Max context tokens for insight LLM calls (higher than chat default for thorough analysis)"),
     ("insight_llm_model", "", "insights", "text", "LLM model override for insights (empty = use main model). Recommended: o3-mini for analytical depth"),
     ("insight_llm_temperature", "0.1", "insights", "float", "Temperature for insight LLM calls (lower = more factual, 0.0-2.0)"),
@@ -223,6 +241,8 @@ DEFAULT_SETTINGS: List[Tuple[str, str, str, str, str]] = [
     ("timezone", "Asia/Jerusalem", "app", "text", "Timezone for date/time display (e.g. Asia/Jerusalem, US/Eastern)"),
     ("ui_api_url", "http://localhost:8765", "app", "text", "Backend API URL for the Streamlit UI"),
     ("cost_tracking_enabled", "true", "app", "bool", "Enable real-time LLM cost tracking and logging"),
+    ("cost_events_retention_days", "90", "app", "int", "Days to keep raw per-call cost events (0 = forever); daily/all-time cost totals are kept regardless"),
+    ("cost_rollup_hourly_retention_days", "35", "app", "int", "Days to keep hourly cost rollups (0 = forever); older windows are summed from daily rollups"),
 ]
 
 # Category display order and labels
@@ -242,6 +262,7 @@ SELECT_OPTIONS: Dict[str, List[str]] = {
     "llm_provider": ["openai", "gemini"],
     "image_provider": ["openai", "google"],
     "log_level": ["DEBUG", "INFO", "WARNING", "ERROR"],
+    "rag_system_prompt_contacts": ["full", "relevant", "none"],
 }
 
 
@@ -458,39 +479,170 @@ _ENV_OVERRIDE_KEYS = frozenset({
 
 
 # ---------------------------------------------------------------------------
-# In-process TTL cache for get_setting_value()
+# Cross-process settings snapshot for get_setting_value()
 # ---------------------------------------------------------------------------
-# Eliminates 10-20+ SQLite round-trips per request.  Settings change rarely
-# (only via the UI Settings page), so a 60-second TTL is a good trade-off.
+# All settings are loaded with one SELECT into an immutable dict, so lookups
+# are plain dict reads.  The snapshot is only reloaded when it is marked
+# stale: locally by every write in this module, and in every other process
+# (gunicorn workers, Celery workers) by a Redis pub/sub listener thread.
+# Writers bump SETTINGS_VERSION_KEY and publish on SETTINGS_CHANNEL; the
+# listener also compares the version key whenever it (re)subscribes, so
+# messages missed while disconnected are not lost.  If Redis is unreachable
+# the snapshot falls back to a 60-second TTL.  The listener pings its
+# connection periodically and reconnects when no reply comes back, so a
+# half-open socket cannot keep it "connected" while changes go unheard.
 
 import time as _time
+from types import MappingProxyType as _MappingProxyType
 
-_SETTINGS_CACHE: dict[str, tuple[Optional[str], float]] = {}
-_SETTINGS_CACHE_TTL: float = 60.0  # seconds
+SETTINGS_VERSION_KEY = "settings:version"
+SETTINGS_CHANNEL = "settings:changed"
+
+_SNAPSHOT_FALLBACK_TTL: float = 60.0  # seconds, only while the listener is down
+_LISTENER_PING_INTERVAL: float = 15.0  # seconds between liveness pings
+_LISTENER_DEAD_AFTER: float = 45.0  # reconnect if nothing was heard for this long
+
+_snapshot: "_MappingProxyType[str, str]" = _MappingProxyType({})
+_snapshot_loaded_at: float = 0.0
+_snapshot_version: Optional[str] = None
+_snapshot_stale = True
+_snapshot_lock = _threading.RLock()
+
+_listener_pid: Optional[int] = None
+_listener_connected = False
 
 
 def invalidate_settings_cache(key: str | None = None) -> None:
-    """Clear the in-process settings cache.
+    """Mark the in-process settings snapshot as stale.
 
     Called automatically by set_settings() and delete_setting() so that
-    UI config changes take effect immediately within the same process.
+    UI config changes take effect immediately within the same process
+    (other processes are notified via Redis pub/sub).
 
     Args:
-        key: If provided, only invalidate that key.  If ``None``, flush all.
+        key: Accepted for backward compatibility; the whole snapshot is
+            reloaded on the next lookup either way.
     """
-    if key is not None:
-        _SETTINGS_CACHE.pop(key, None)
-    else:
-        _SETTINGS_CACHE.clear()
+    global _snapshot_stale
+    _snapshot_stale = True
+
+
+def _notify_settings_changed() -> None:
+    """Invalidate locally and tell every other process to reload settings."""
+    invalidate_settings_cache()
+    try:
+        from utils.redis_conn import get_redis_client
+        client = get_redis_client()
+        version = client.incr(SETTINGS_VERSION_KEY)
+        client.publish(SETTINGS_CHANNEL, str(version))
+    except Exception as e:
+        import logging as _logging
+        _logging.getLogger(__name__).debug(
+            "Settings change notification failed (other processes fall back "
+            "to a %ss TTL): %s", int(_SNAPSHOT_FALLBACK_TTL), e,
+        )
+
+
+def _read_settings_version() -> Optional[str]:
+    try:
+        from utils.redis_conn import get_redis_client
+        return str(get_redis_client().get(SETTINGS_VERSION_KEY) or "0")
+    except Exception:
+        return None
+
+
+def _settings_listener() -> None:
+    """Subscribe to settings change notifications (runs in a daemon thread)."""
+    global _listener_connected
+    backoff = 1.0
+    while True:
+        pubsub = None
+        try:
+            from utils.redis_conn import get_redis_client
+            pubsub = get_redis_client().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(SETTINGS_CHANNEL)
+            # Catch changes published while we were not subscribed
+            if _read_settings_version() != _snapshot_version:
+                invalidate_settings_cache()
+            _listener_connected = True
+            backoff = 1.0
+            last_heard = last_ping = _time.monotonic()
+            while True:
+                message = pubsub.get_message(timeout=1.0)
+                now = _time.monotonic()
+                if message is not None:
+                    last_heard = now
+                    if message.get("type") == "message":
+                        invalidate_settings_cache()
+                if now - last_heard > _LISTENER_DEAD_AFTER:
+                    raise ConnectionError("settings listener connection is unresponsive")
+                if now - last_ping > _LISTENER_PING_INTERVAL:
+                    pubsub.ping()  # the pong counts as hearing from Redis
+                    last_ping = now
+        except Exception:
+            pass
+        finally:
+            _listener_connected = False
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+        _time.sleep(backoff)
+        backoff = min(backoff * 2, 30.0)
+
+
+def _ensure_listener() -> None:
+    """Start the pub/sub listener once per process (re-started after fork)."""
+    global _listener_pid, _listener_connected
+    pid = os.getpid()
+    if _listener_pid == pid:
+        return
+    _listener_pid = pid
+    _listener_connected = False
+    _threading.Thread(
+        target=_settings_listener, name="settings-listener", daemon=True
+    ).start()
+
+
+def _load_snapshot() -> "_MappingProxyType[str, str]":
+    """Reload every setting from SQLite into a new immutable snapshot."""
+    global _snapshot, _snapshot_loaded_at, _snapshot_version, _snapshot_stale
+    # Clear the flag first so an invalidation during the load is kept
+    _snapshot_stale = False
+    version = _read_settings_version() if _listener_connected else None
+    conn = _get_connection()
+    rows = conn.execute("SELECT key, value FROM settings").fetchall()
+    values = {row["key"]: row["value"] for row in rows}
+    _snapshot = _MappingProxyType(values)
+    _snapshot_version = version
+    _snapshot_loaded_at = _time.monotonic()
+    return _snapshot
+
+
+def _get_snapshot() -> "_MappingProxyType[str, str]":
+    """Return the current settings snapshot, reloading it if stale."""
+    _ensure_listener()
+    if not _snapshot_stale and (
+        _listener_connected
+        or (_time.monotonic() - _snapshot_loaded_at) < _SNAPSHOT_FALLBACK_TTL
+    ):
+        return _snapshot
+    with _snapshot_lock:
+        if not _snapshot_stale and (
+            _listener_connected
+            or (_time.monotonic() - _snapshot_loaded_at) < _SNAPSHOT_FALLBACK_TTL
+        ):
+            return _snapshot
+        return _load_snapshot()
 
 
 def get_setting_value(key: str) -> Optional[str]:
     """Get a single setting value by key.
     
-    Uses an in-process TTL cache (60 s) to avoid repeated SQLite lookups
-    for the same key within a short window.  Cache is automatically
-    invalidated when settings are modified via set_settings() or
-    delete_setting().
+    Reads from the in-process settings snapshot (a plain dict lookup).
+    The snapshot is reloaded from SQLite only after settings change —
+    in this process or, via Redis pub/sub, in any other.
 
     For infrastructure settings (hosts, ports, URLs), environment variables
     take precedence over SQLite. This allows Docker and local dev to coexist
@@ -505,7 +657,7 @@ def get_setting_value(key: str) -> Optional[str]:
     Returns:
         The setting value as string, or None if not found
     """
-    # For infrastructure keys, check env var first (bypass cache)
+    # For infrastructure keys, check env var first (bypass snapshot)
     if key in _ENV_OVERRIDE_KEYS:
         env_key = ENV_KEY_MAP.get(key)
         if env_key:
@@ -513,38 +665,21 @@ def get_setting_value(key: str) -> Optional[str]:
             if env_value is not None and env_value.strip():
                 return env_value.strip()
 
-    # Check in-process cache
-    now = _time.monotonic()
-    cached = _SETTINGS_CACHE.get(key)
-    if cached is not None:
-        value, ts = cached
-        if (now - ts) < _SETTINGS_CACHE_TTL:
-            return value
-
-    # Cache miss — query SQLite
-    conn = _get_connection()
-    row = conn.execute(
-        "SELECT value FROM settings WHERE key = ?", (key,)
-    ).fetchone()
-    value = row["value"] if row else None
+    snapshot = _get_snapshot()
+    value = snapshot.get(key)
 
     # Backward compatibility: fall back to deprecated key if new key not found
     if value is None and key in _DEPRECATED_KEY_REVERSE:
         old_key = _DEPRECATED_KEY_REVERSE[key]
-        old_row = conn.execute(
-            "SELECT value FROM settings WHERE key = ?", (old_key,)
-        ).fetchone()
-        if old_row is not None:
+        value = snapshot.get(old_key)
+        if value is not None:
             import logging as _logging
             _logging.getLogger(__name__).warning(
                 "Setting '%s' is deprecated — use '%s'. "
                 "The old key will be removed in a future release.",
                 old_key, key,
             )
-            value = old_row["value"]
 
-    # Store in cache
-    _SETTINGS_CACHE[key] = (value, now)
     return value
 
 
@@ -585,7 +720,7 @@ def set_setting(key: str, value: str) -> bool:
         (value, key)
     )
     conn.commit()
-    invalidate_settings_cache(key)
+    _notify_settings_changed()
     return cursor.rowcount > 0
 
 
@@ -603,7 +738,7 @@ def delete_setting(key: str) -> bool:
     conn = _get_connection()
     cursor = conn.execute("DELETE FROM settings WHERE key = ?", (key,))
     conn.commit()
-    invalidate_settings_cache(key)
+    _notify_settings_changed()
     return cursor.rowcount > 0
 
 
@@ -626,8 +761,9 @@ def set_settings(updates: Dict[str, str]) -> List[str]:
         if cursor.rowcount > 0:
             updated_keys.append(key)
     conn.commit()
-    # Invalidate cache for all updated keys
-    invalidate_settings_cache()
+    # Reload the snapshot here and in every other process
+    if updated_keys:
+        _notify_settings_changed()
     return updated_keys
 
 
@@ -723,7 +859,7 @@ def reset_to_defaults(category: Optional[str] = None) -> int:
         )
         count += cursor.rowcount
     conn.commit()
-    invalidate_settings_cache()
+    _notify_settings_changed()
     return count
 
 
@@ -814,6 +950,8 @@ def register_plugin_settings(
                 )
     
     conn.commit()
+    if count > 0:
+        _notify_settings_changed()
     return count
 
 
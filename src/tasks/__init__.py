@@ -4,7 +4,8 @@ Uses Redis as both broker and result backend (DB 1, separate from
 the main application's DB 0).
 
 Task queues:
-    default  — lightweight tasks (WhatsApp message processing, entity extraction)
+    default  — lightweight tasks (WhatsApp message processing, entity extraction,
+               RAG and cost-tracking maintenance)
     heavy    — CPU/GPU-bound tasks (Whisper transcription, large document sync)
 
 Usage (worker):
@@ -18,7 +19,7 @@ Usage (from application code):
 import os
 
 from celery import Celery
-from celery.signals import worker_process_init
+from celery.signals import worker_process_init, worker_process_shutdown, worker_ready
 
 # ---------------------------------------------------------------------------
 # Redis broker URL
@@ -77,6 +78,8 @@ app.conf.update(
         "tasks.transcription.*": {"queue": "heavy"},
         "tasks.whatsapp.*": {"queue": "default"},
         "tasks.scheduled.*": {"queue": "default"},
+        "tasks.rag.*": {"queue": "default"},
+        "tasks.costs.*": {"queue": "default"},
     },
 
     # Default queue for unrouted tasks
@@ -99,14 +102,38 @@ app.conf.update(
         "tasks.whatsapp",
         "tasks.transcription",
         "tasks.scheduled",
+        "tasks.rag",
+        "tasks.costs",
     ],
 
-    # Celery Beat periodic schedule — drives the Scheduled Insights feature.
-    # The checker polls SQLite every 60s for due tasks and dispatches them.
+    # Celery Beat periodic schedule.
     beat_schedule={
+        # Scheduled Insights are dispatched by an ETA timer on the Redis
+        # due-queue (see schedule_queue); this only repairs the queue.
         "check-scheduled-insights": {
             "task": "tasks.scheduled.check_scheduled_insights",
-            "schedule": 60.0,  # every 60 seconds
+            "schedule": 900.0,  # every 15 minutes
+        },
+        # Flushes conversation-chunk buffers before their Redis TTL fires.
+        # Must run more often than rag_chunk_buffer_ttl // 4 (min 10s).
+        "flush-expiring-chunk-buffers": {
+            "task": "tasks.rag.flush_expiring_chunk_buffers",
+            "schedule": 10.0,  # every 10 seconds
+        },
+        # Reconciles the cached /rag/stats counts with exact Qdrant counts.
+        "reconcile-rag-stats": {
+            "task": "tasks.rag.reconcile_rag_stats",
+            "schedule": 300.0,  # every 5 minutes
+        },
+        # Recomputes BM25 document frequencies (drops counts of deleted points).
+        "rebuild-sparse-corpus-stats": {
+            "task": "tasks.rag.rebuild_sparse_corpus_stats",
+            "schedule": 604800.0,  # weekly
+        },
+        # Prunes raw cost events / hourly rollups past their retention.
+        "compact-cost-events": {
+            "task": "tasks.costs.compact_cost_events",
+            "schedule": 86400.0,  # daily
         },
     },
 )
@@ -133,3 +160,23 @@ def _init_plugins_in_worker(**kwargs):
 
     plugin_registry.discover_plugins()
     plugin_registry.load_enabled_plugins(_flask_app)
+
+
+@worker_process_shutdown.connect
+def _flush_cost_events(**kwargs):
+    """Persist buffered cost events (prefork children skip ``atexit``)."""
+    try:
+        import cost_writer
+        cost_writer.shutdown()
+    except Exception:
+        pass  # Unsaved events stay in the crash spool and are recovered later
+
+
+@worker_ready.connect
+def _arm_insight_scheduler(**kwargs):
+    """Rebuild the Scheduled Insights due-queue and arm its timer on start-up."""
+    try:
+        from tasks.scheduled import check_scheduled_insights
+        check_scheduled_insights.delay()
+    except Exception:
+        pass  # The periodic Beat entry re-arms it
@@ -0,0 +1,41 @@
+"""Celery tasks for cost-tracking housekeeping.
+
+Tasks:
+    compact_cost_events  — Apply the retention policy to raw cost events
+"""
+
+from celery.utils.log import get_task_logger
+
+from tasks import app
+
+logger = get_task_logger(__name__)
+
+
+@app.task(
+    name="tasks.costs.compact_cost_events",
+    ignore_result=True,
+    soft_time_limit=300,
+    time_limit=360,
+)
+def compact_cost_events() -> dict:
+    """Prune raw cost events and hourly rollups past their retention.
+
+    Driven by Celery Beat.  Daily and all-time rollups are never pruned,
+    so cost summaries keep their full history.
+
+    Returns:
+        Dict with the number of raw events and hourly rollup rows deleted.
+    """
+    import cost_db
+    from config import settings
+
+    result = cost_db.compact_cost_events(
+        raw_retention_days=int(settings.get("cost_events_retention_days", "90")),
+        hourly_retention_days=int(settings.get("cost_rollup_hourly_retention_days", "35")),
+    )
+    if result["events_deleted"] or result["hourly_rows_deleted"]:
+        logger.info(
+            f"[costs] Compacted {result['events_deleted']} raw event(s), "
+            f"{result['hourly_rows_deleted']} hourly rollup row(s)"
+        )
+    return result
@@ -0,0 +1,211 @@
+"""Celery tasks for RAG vector store maintenance.
+
+Periodic housekeeping that used to run inline on the ingest path.
+
+Tasks:
+    flush_expiring_chunk_buffers  — Flush conversation-chunk buffers near TTL expiry
+    reconcile_rag_stats           — Refresh cached per-source counts from Qdrant
+    remap_person_ids_after_merge  — Re-point Qdrant person_ids after an identity merge
+    rebuild_sparse_corpus_stats   — Recompute BM25 document frequencies from Qdrant
+"""
+
+import json
+
+from celery.exceptions import SoftTimeLimitExceeded
+from celery.utils.log import get_task_logger
+
+from tasks import app
+
+logger = get_task_logger(__name__)
+
+# Redis key holding the last completed page of a remap job (per Celery task ID)
+REMAP_CHECKPOINT_PREFIX = "rag:merge_remap:"
+REMAP_CHECKPOINT_TTL = 86400  # seconds
+# Error retries of a remap job, counted apart from time-limit requeues
+REMAP_MAX_ERROR_RETRIES = 5
+REMAP_RETRY_DELAY = 30  # seconds, doubled per error retry
+
+# Held while a sparse corpus-stats rebuild is queued or running
+CORPUS_REBUILD_LOCK_KEY = "rag:sparse:rebuild_lock"
+CORPUS_REBUILD_LOCK_TTL = 3900  # seconds (task hard time limit)
+
+
+@app.task(
+    name="tasks.rag.flush_expiring_chunk_buffers",
+    ignore_result=True,
+    soft_time_limit=60,
+    time_limit=90,
+)
+def flush_expiring_chunk_buffers() -> dict:
+    """Flush conversation-chunk buffers whose Redis TTL is about to fire.
+
+    Driven by Celery Beat.  Uses the chunk-buffer deadline ZSET so the cost
+    depends only on the number of due buffers, not on active chats.
+
+    Returns:
+        Dict with the number of buffers flushed.
+    """
+    from llamaindex_rag import get_rag
+
+    flushed = get_rag().flush_expiring_buffers()
+    if flushed:
+        logger.info(f"[rag] Flushed {flushed} near-expiry chunk buffer(s)")
+    return {"flushed": flushed}
+
+
+@app.task(
+    name="tasks.rag.reconcile_rag_stats",
+    ignore_result=True,
+    soft_time_limit=300,
+    time_limit=360,
+)
+def reconcile_rag_stats() -> dict:
+    """Replace the cached vector-store counts with exact Qdrant counts.
+
+    Driven by Celery Beat.  Corrects drift in the incrementally maintained
+    counts served by ``LlamaIndexRAG.get_stats()``.
+
+    Returns:
+        Dict with the reconciled total, or ``skipped`` if another process
+        is already reconciling.
+    """
+    from llamaindex_rag import get_rag
+    from rag_stats import TOTAL_FIELD
+
+    rag = get_rag()
+    counts = rag.stats_service.reconcile()
+    if counts is None:
+        return {"skipped": True}
+    total = counts.get(TOTAL_FIELD, 0)
+    if rag.HYBRID_ENABLED and total:
+        _backfill_sparse_corpus_stats()
+    return {"total": total}
+
+
+def _backfill_sparse_corpus_stats() -> None:
+    """Queue a corpus-stats rebuild if the statistics were never rebuilt.
+
+    Live ingestion starts counting documents as soon as it runs, so a
+    non-zero document count does not mean the existing collection is
+    covered; only a completed rebuild (``rebuilt_at``) does.  The marker
+    lives in the statistics hash, so a Redis flush also triggers a rebuild.
+    """
+    try:
+        from utils.corpus_stats import get_corpus_stats
+        from utils.redis_conn import get_redis_client
+
+        if get_corpus_stats().summary()["rebuilt_at"]:
+            return
+        if get_redis_client().set(
+            CORPUS_REBUILD_LOCK_KEY, "queued", nx=True, ex=CORPUS_REBUILD_LOCK_TTL,
+        ):
+            rebuild_sparse_corpus_stats.delay()
+            logger.info("[rag] Sparse corpus stats never rebuilt, queued a rebuild")
+    except Exception as e:
+        logger.debug(f"[rag] Sparse corpus stats backfill check failed: {e}")
+
+
+@app.task(
+    bind=True,
+    name="tasks.rag.remap_person_ids_after_merge",
+    max_retries=None,  # requeues are unbounded; errors use REMAP_MAX_ERROR_RETRIES
+    acks_late=True,
+    reject_on_worker_lost=True,
+    soft_time_limit=540,
+    time_limit=600,
+)
+def remap_person_ids_after_merge(self, target_id: int, source_ids: list) -> dict:
+    """Replace merged-away person IDs in Qdrant payloads with the target ID.
+
+    Resumable: after every page the progress is checkpointed in Redis under
+    the Celery task ID and published via ``update_state`` (state
+    ``PROGRESS``).  Retries, redeliveries after a worker crash, and the
+    self-requeue on the soft time limit all keep the task ID, so they
+    continue from the last checkpoint instead of rescanning.
+
+    Time-limit requeues also increment ``request.retries``, so failures
+    are counted separately in Redis (``<checkpoint key>:errors``) and
+    only those count towards ``REMAP_MAX_ERROR_RETRIES`` and the backoff.
+
+    Args:
+        target_id: The surviving person ID.
+        source_ids: The merged (deleted) person IDs.
+
+    Returns:
+        Dict with points_updated / points_scanned / batches counts.
+    """
+    from llamaindex_rag import get_rag
+    from utils.redis_conn import get_redis_client
+
+    key = f"{REMAP_CHECKPOINT_PREFIX}{self.request.id}"
+    errors_key = f"{key}:errors"
+    redis = get_redis_client()
+    checkpoint = None
+    raw = redis.get(key)
+    if raw:
+        checkpoint = json.loads(raw)
+        logger.info(
+            f"[rag] Resuming person_ids remap {source_ids} → {target_id} "
+            f"after {checkpoint.get('points_scanned', 0)} scanned point(s)"
+        )
+
+    def _on_progress(state: dict) -> None:
+        redis.set(key, json.dumps(state), ex=REMAP_CHECKPOINT_TTL)
+        self.update_state(
+            state="PROGRESS",
+            meta={"target_id": target_id, "source_ids": source_ids, **state},
+        )
+
+    try:
+        result = get_rag().update_person_ids_after_merge(
+            target_id=target_id,
+            source_ids=source_ids,
+            checkpoint=checkpoint,
+            on_progress=_on_progress,
+        )
+    except SoftTimeLimitExceeded:
+        # Out of time, not failing — continue from the checkpoint in a new run
+        logger.info(f"[rag] person_ids remap {self.request.id} hit time limit, requeueing")
+        raise self.retry(countdown=1, max_retries=None)
+    except Exception as exc:
+        errors = redis.incr(errors_key)
+        redis.expire(errors_key, REMAP_CHECKPOINT_TTL)
+        if errors <= REMAP_MAX_ERROR_RETRIES:
+            backoff = REMAP_RETRY_DELAY * (2 ** (errors - 1))
+            logger.warning(
+                f"[rag] person_ids remap failed ({exc}), retrying in {backoff}s "
+                f"(attempt {errors}/{REMAP_MAX_ERROR_RETRIES})"
+            )
+            raise self.retry(exc=exc, countdown=backoff)
+        redis.delete(errors_key)
+        raise
+
+    redis.delete(key, errors_key)
+    return {"target_id": target_id, "source_ids": source_ids, **result}
+
+
+@app.task(
+    name="tasks.rag.rebuild_sparse_corpus_stats",
+    soft_time_limit=3600,
+    time_limit=3900,
+)
+def rebuild_sparse_corpus_stats() -> dict:
+    """Recompute sparse-vector document frequencies from the whole collection.
+
+    Queued by ``reconcile_rag_stats`` when a hybrid collection's corpus
+    statistics have never been rebuilt (backfill), and weekly by Celery Beat to drop counts of
+    deleted points.
+
+    Returns:
+        Corpus summary (docs, vocabulary, avg_doc_length, rebuilt_at).
+    """
+    from llamaindex_rag import get_rag
+    from utils.redis_conn import get_redis_client
+
+    try:
+        rag = get_rag()
+        if not rag.HYBRID_ENABLED:
+            return {"skipped": True}
+        return rag.rebuild_sparse_corpus_stats()
+    finally:
+        get_redis_client().delete(CORPUS_REBUILD_LOCK_KEY)
@@ -1,8 +1,12 @@
 """Celery tasks for Scheduled Insights execution.
 
-Two tasks:
-    check_scheduled_insights  — Periodic (every 60s via Beat): polls SQLite for
-                                due tasks and dispatches individual executions.
+Three tasks:
+    dispatch_due_insights     — Timer: sent with a Celery ETA for the earliest
+                                due task (see schedule_queue); claims every
+                                due task, dispatches its execution and re-arms.
+    check_scheduled_insights  — Periodic repair (every 15 min via Beat):
+                                rebuilds the Redis due-queue from SQLite and
+                                re-arms the timer.
     execute_scheduled_insight — On-demand: runs a single insight query through
                                 the multi-query RAG pipeline and stores the result.
 
@@ -299,55 +303,102 @@ def _get_template_sub_queries(task_name: str) -> Optional[List[str]]:
 
 @app.task(
     bind=True,
-    name="tasks.scheduled.check_scheduled_insights",
+    name="tasks.scheduled.dispatch_due_insights",
     max_retries=0,
     acks_late=False,
     soft_time_limit=30,
     time_limit=60,
 )
-def check_scheduled_insights(self) -> dict:
-    """Poll for due scheduled tasks and dispatch individual executions.
+def dispatch_due_insights(self, token: str) -> dict:
+    """Dispatch every scheduled task that is due, then re-arm the timer.
 
-    This task runs every 60 seconds via Celery Beat.  It checks the
-    SQLite database for any enabled tasks whose ``next_run_at`` is in
-    the past and dispatches ``execute_scheduled_insight`` for each one.
+    Sent by ``schedule_queue.arm`` with an ETA at the earliest due time.
+    Only the live timer (matching ``token``) claims tasks; the claim pops
+    the due entries atomically, so each run is dispatched exactly once.
+
+    Args:
+        token: Timer token issued by ``schedule_queue.arm``
 
     Returns:
         Dict with count of dispatched tasks.
     """
     try:
+        import schedule_queue
         import scheduled_tasks_db
 
-        due_tasks = scheduled_tasks_db.get_due_tasks()
-
-        if not due_tasks:
-            return {"status": "ok", "dispatched": 0}
+        claimed = schedule_queue.claim_due(token)
+        if claimed is None:
+            # Never leave the queue without a timer, even if this one lost
+            schedule_queue.arm()
+            return {"status": "superseded", "dispatched": 0}
 
         dispatched = 0
-        for task in due_tasks:
-            task_id = task["id"]
+        now = time.time()
+        for task_id, due_at in claimed:
             try:
-                # Advance next_run_at BEFORE dispatching to prevent
-                # double-dispatch if the checker runs again before the
-                # task completes.
+                entry = scheduled_tasks_db.get_schedule_entry(task_id)
+                if entry is None:
+                    continue  # Deleted or disabled since it was queued
+                next_run_at, timezone = entry
+                if schedule_queue.to_epoch(next_run_at, timezone) > now + 1:
+                    # Rescheduled after the entry was queued — requeue as is
+                    schedule_queue.schedule(task_id, next_run_at, timezone)
+                    continue
+
+                # Advance next_run_at BEFORE dispatching (also requeues the
+                # task for its next run).
                 scheduled_tasks_db.advance_next_run(task_id)
 
-                # Dispatch execution
-                execute_scheduled_insight.delay(task_id)
+                execute_scheduled_insight.apply_async(
+                    args=[task_id], kwargs={"scheduled_for": due_at},
+                )
                 dispatched += 1
                 logger.info(
-                    f"[beat] Dispatched insight task #{task_id}: '{task['name']}'"
+                    f"[scheduler] Dispatched insight task #{task_id} "
+                    f"({int((time.time() - due_at) * 1000)}ms after due)"
                 )
             except Exception as e:
                 logger.error(
-                    f"[beat] Failed to dispatch task #{task_id}: {e}"
+                    f"[scheduler] Failed to dispatch task #{task_id}: {e}"
                 )
 
+        schedule_queue.arm()
         return {"status": "ok", "dispatched": dispatched}
 
     except Exception as exc:
         trace = traceback.format_exc()
-        logger.error(f"[beat] check_scheduled_insights failed: {exc}\n{trace}")
+        logger.error(f"[scheduler] dispatch_due_insights failed: {exc}\n{trace}")
+        return {"status": "error", "error": str(exc)}
+
+
+@app.task(
+    bind=True,
+    name="tasks.scheduled.check_scheduled_insights",
+    max_retries=0,
+    acks_late=False,
+    soft_time_limit=30,
+    time_limit=60,
+)
+def check_scheduled_insights(self) -> dict:
+    """Rebuild the scheduler due-queue from SQLite and re-arm its timer.
+
+    Dispatch itself is event-driven (see ``dispatch_due_insights``); this
+    runs at worker start-up and every 15 minutes via Celery Beat so the
+    queue recovers from a Redis flush or a lost timer message.  Overdue
+    tasks found here are dispatched immediately by the re-armed timer.
+
+    Returns:
+        Dict with the number of queued tasks.
+    """
+    try:
+        import schedule_queue
+
+        queued = schedule_queue.sync_from_db()
+        return {"status": "ok", "queued": queued}
+
+    except Exception as exc:
+        trace = traceback.format_exc()
+        logger.error(f"[scheduler] check_scheduled_insights failed: {exc}\n{trace}")
         return {"status": "error", "error": str(exc)}
 
 
@@ -361,7 +412,7 @@ def check_scheduled_insights(self) -> dict:
     soft_time_limit=180,
     time_limit=240,
 )
-def execute_scheduled_insight(self, task_id: int) -> dict:
+def execute_scheduled_insight(self, task_id: int, scheduled_for: Optional[float] = None) -> dict:
     """Execute a single scheduled insight query through the multi-query RAG pipeline.
 
     Quality pipeline:
@@ -375,11 +426,21 @@ def execute_scheduled_insight(self, task_id: int) -> dict:
 
     Args:
         task_id: The scheduled_tasks row ID to execute.
+        scheduled_for: Due time (epoch seconds) when dispatched by the
+            scheduler; None for manual runs.
 
     Returns:
         Dict with execution result metadata.
     """
     start_ms = int(time.time() * 1000)
+    skew_ms = None
+    if scheduled_for is not None and self.request.retries == 0:
+        skew_ms = start_ms - int(scheduled_for * 1000)
+        try:
+            import schedule_queue
+            schedule_queue.record_skew(task_id, skew_ms)
+        except Exception:
+            pass  # Metrics only
 
     try:
         import scheduled_tasks_db
@@ -471,6 +532,8 @@ def execute_scheduled_insight(self, task_id: int) -> dict:
         # Add execution metadata to quality metrics
         quality_metrics["duration_ms"] = duration_ms
         quality_metrics["cost_usd"] = round(query_cost, 6)
+        if skew_ms is not None:
+            quality_metrics["schedule_skew_ms"] = skew_ms
 
         # 9. Determine status
         status = "success"
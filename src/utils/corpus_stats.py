@@ -0,0 +1,240 @@
+"""Incremental corpus statistics for BM25 sparse vectors.
+
+``utils.sparse_vectors`` used to assume an average document length of 100
+tokens and gave every query token weight 1.0, so frequent function words
+(את, של, על, the, and) counted as much as rare names in the sparse leg of
+hybrid search.
+
+:class:`CorpusStats` keeps the two statistics BM25 needs, in Redis so the
+API and Celery workers share them:
+
+- ``rag:sparse:df`` — HASH of sparse index → document frequency;
+- ``rag:sparse:corpus`` — HASH with ``docs`` and ``tokens`` totals (the
+  running average document length is ``tokens / docs``) and
+  ``rebuilt_at``, the time of the last full rebuild.
+
+Both are updated incrementally by ``LlamaIndexRAG._upsert_sparse_vectors``
+after each ingested batch and read with one round-trip per query.
+Deleted points are not subtracted; ``LlamaIndexRAG.rebuild_sparse_corpus_stats``
+recomputes everything from the collection (also used to backfill an
+existing corpus — statistics without ``rebuilt_at`` only cover what was
+ingested since they appeared).  Until the corpus holds ``MIN_DOCS_FOR_IDF`` documents
+query weights stay at 1.0.
+
+A rebuild counts into staging keys and swaps them in at the end.  While it
+runs, ``rag:sparse:rebuild`` names the staging keys and incremental updates
+are applied to both, so documents ingested during the scroll are not lost
+by the swap (one the scroll also reaches is counted twice until the next
+rebuild).  ``reset_collection`` drops everything with :meth:`CorpusStats.clear`.
+
+Usage:
+    from utils.corpus_stats import get_corpus_stats
+
+    weights = get_corpus_stats().idf_weights(indices)  # None → unweighted
+"""
+
+import time
+import uuid
+from collections import Counter
+from math import log
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.logger import logger
+from utils.redis_conn import get_redis_client
+
+
+DF_KEY = "rag:sparse:df"
+CORPUS_KEY = "rag:sparse:corpus"
+REBUILD_KEY = "rag:sparse:rebuild"  # suffix of the in-progress rebuild's staging keys
+REBUILD_TTL = 4000  # seconds; outlives the rebuild task's time limit
+
+MIN_DOCS_FOR_IDF = 50  # Below this, IDF estimates are mostly noise
+_PIPELINE_CHUNK = 5000  # document frequencies per script call
+
+# Add document frequencies and totals to the statistics, and to the staging
+# keys of an in-progress rebuild if there is one.
+# KEYS[1] = df hash, KEYS[2] = corpus hash, KEYS[3] = rebuild marker (optional)
+# ARGV    = docs, tokens, index1, count1, index2, count2, ...
+_RECORD_LUA = """
+local targets = {{KEYS[1], KEYS[2]}}
+local suffix = KEYS[3] and redis.call('GET', KEYS[3])
+if suffix then
+    table.insert(targets, {KEYS[1] .. ':rebuild:' .. suffix, KEYS[2] .. ':rebuild:' .. suffix})
+end
+for _, target in ipairs(targets) do
+    for i = 3, #ARGV, 2 do
+        redis.call('HINCRBY', target[1], ARGV[i], ARGV[i + 1])
+    end
+    if tonumber(ARGV[1]) > 0 then
+        redis.call('HINCRBY', target[2], 'docs', ARGV[1])
+        redis.call('HINCRBY', target[2], 'tokens', ARGV[2])
+    end
+end
+return #targets
+"""
+
+
+def bm25_idf(df: int, n_docs: int) -> float:
+    """BM25 inverse document frequency (the non-negative "+1" variant)."""
+    return log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+
+
+class CorpusStats:
+    """Redis-backed document frequencies and document-length totals."""
+
+    def __init__(
+        self,
+        df_key: str = DF_KEY,
+        corpus_key: str = CORPUS_KEY,
+        rebuild_key: Optional[str] = REBUILD_KEY,
+    ) -> None:
+        self.df_key = df_key
+        self.corpus_key = corpus_key
+        self.rebuild_key = rebuild_key  # None for staging stores
+        self._record_script = None
+
+    # =========================================================================
+    # Ingestion side
+    # =========================================================================
+
+    def record_documents(self, documents: Iterable[Tuple[Sequence[int], int]]) -> int:
+        """Add documents to the statistics.
+
+        Args:
+            documents: (unique sparse indices, document length in tokens)
+                per document
+
+        Returns:
+            Number of documents recorded
+        """
+        df: Counter = Counter()
+        docs = 0
+        tokens = 0
+        for indices, length in documents:
+            df.update(set(indices))  # CRC32 collisions can repeat an index
+            docs += 1
+            tokens += length
+        if not docs:
+            return 0
+
+        if self._record_script is None:
+            self._record_script = get_redis_client().register_script(_RECORD_LUA)
+        keys = [self.df_key, self.corpus_key]
+        if self.rebuild_key:
+            keys.append(self.rebuild_key)
+        items = list(df.items())
+        for start in range(0, max(len(items), 1), _PIPELINE_CHUNK):
+            args: List[int] = [docs, tokens] if start == 0 else [0, 0]
+            for idx, count in items[start:start + _PIPELINE_CHUNK]:
+                args.extend((idx, count))
+            self._record_script(keys=keys, args=args)
+        return docs
+
+    def avg_doc_length(self) -> Optional[float]:
+        """Running average document length, or None for an empty corpus."""
+        docs, tokens = get_redis_client().hmget(self.corpus_key, ["docs", "tokens"])
+        if not docs or int(docs) == 0:
+            return None
+        return int(tokens or 0) / int(docs)
+
+    # =========================================================================
+    # Query side
+    # =========================================================================
+
+    def idf_weights(self, indices: Sequence[int]) -> Optional[List[float]]:
+        """IDF weight per sparse index (one Redis round-trip).
+
+        Returns:
+            Weights aligned with ``indices``, or None while the corpus is
+            smaller than ``MIN_DOCS_FOR_IDF``
+        """
+        if not indices:
+            return []
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.hget(self.corpus_key, "docs")
+        pipe.hmget(self.df_key, [str(i) for i in indices])
+        docs, dfs = pipe.execute()
+        n_docs = int(docs or 0)
+        if n_docs < MIN_DOCS_FOR_IDF:
+            return None
+        return [bm25_idf(min(int(df or 0), n_docs), n_docs) for df in dfs]
+
+    def summary(self) -> Dict[str, float]:
+        """Document count, vocabulary size, average document length and
+        last rebuild time (epoch seconds, 0 if never rebuilt)."""
+        redis = get_redis_client()
+        docs, tokens, rebuilt_at = redis.hmget(self.corpus_key, ["docs", "tokens", "rebuilt_at"])
+        n_docs = int(docs or 0)
+        return {
+            "docs": n_docs,
+            "vocabulary": redis.hlen(self.df_key),
+            "avg_doc_length": round(int(tokens or 0) / n_docs, 2) if n_docs else 0.0,
+            "rebuilt_at": int(rebuilt_at or 0),
+        }
+
+    # =========================================================================
+    # Maintenance
+    # =========================================================================
+
+    def begin_rebuild(self) -> "CorpusStats":
+        """Create staging statistics for a rebuild and mirror updates into them.
+
+        Returns:
+            The staging store; pass it to :meth:`replace_with` when done
+        """
+        suffix = uuid.uuid4().hex[:8]
+        staging = CorpusStats(
+            df_key=f"{self.df_key}:rebuild:{suffix}",
+            corpus_key=f"{self.corpus_key}:rebuild:{suffix}",
+            rebuild_key=None,
+        )
+        if self.rebuild_key:
+            get_redis_client().set(self.rebuild_key, suffix, ex=REBUILD_TTL)
+        return staging
+
+    def abort_rebuild(self, staging: "CorpusStats") -> None:
+        """Stop mirroring into ``staging`` and delete it."""
+        if self.rebuild_key:
+            get_redis_client().delete(self.rebuild_key)
+        staging.clear()
+
+    def mark_rebuilt(self) -> None:
+        """Record that these statistics were computed from the whole collection."""
+        get_redis_client().hset(self.corpus_key, "rebuilt_at", int(time.time()))
+
+    def replace_with(self, other: "CorpusStats") -> None:
+        """Atomically swap in statistics built under ``other``'s keys.
+
+        Also ends mirroring of incremental updates into ``other``.
+        """
+        redis = get_redis_client()
+        pipe = redis.pipeline()
+        if self.rebuild_key:
+            pipe.delete(self.rebuild_key)
+        pipe.delete(self.df_key, self.corpus_key)
+        if redis.exists(other.df_key):
+            pipe.rename(other.df_key, self.df_key)
+        if redis.exists(other.corpus_key):
+            pipe.rename(other.corpus_key, self.corpus_key)
+        pipe.execute()
+
+    def clear(self) -> None:
+        """Delete all statistics (the next backfill check then rebuilds)."""
+        get_redis_client().delete(self.df_key, self.corpus_key)
+
+
+_corpus_stats = CorpusStats()
+
+
+def get_corpus_stats() -> CorpusStats:
+    """Return the shared corpus statistics store."""
+    return _corpus_stats
+
+
+def query_idf_weights(indices: Sequence[int]) -> Optional[List[float]]:
+    """IDF weights for a query, or None if unavailable (never raises)."""
+    try:
+        return _corpus_stats.idf_weights(indices)
+    except Exception as e:
+        logger.debug(f"Sparse IDF lookup failed, using unweighted query (non-critical): {e}")
+        return None
@@ -4,9 +4,10 @@ All calls use httpx.AsyncClient for non-blocking Reflex event handlers.
 Mirrors the existing ui/utils/api.py but async.
 """
 
+import json
 import logging
 import os
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Optional
 
 import httpx
 
@@ -143,7 +144,7 @@ async def rename_conversation(conversation_id: str, title: str) -> bool:
 # RAG QUERY
 # =========================================================================
 
-async def rag_query(
+def _rag_query_payload(
     question: str,
     conversation_id: str | None = None,
     k: int = 10,
@@ -175,6 +176,35 @@ async def rag_query(
         payload["filter_content_types"] = filter_content_types
     if sort_order and sort_order != "relevance":
         payload["sort_order"] = sort_order
+    return payload
+
+
+async def rag_query(
+    question: str,
+    conversation_id: str | None = None,
+    k: int = 10,
+    filter_chat_name: str | None = None,
+    filter_sender: str | None = None,
+    filter_days: int | None = None,
+    filter_sources: list[str] | None = None,
+    filter_date_from: str | None = None,
+    filter_date_to: str | None = None,
+    filter_content_types: list[str] | None = None,
+    sort_order: str | None = None,
+) -> dict[str, Any]:
+    payload = _rag_query_payload(
+        question,
+        conversation_id=conversation_id,
+        k=k,
+        filter_chat_name=filter_chat_name,
+        filter_sender=filter_sender,
+        filter_days=filter_days,
+        filter_sources=filter_sources,
+        filter_date_from=filter_date_from,
+        filter_date_to=filter_date_to,
+        filter_content_types=filter_content_types,
+        sort_order=sort_order,
+    )
 
     try:
         resp = await _get_client().post("/rag/query", json=payload, timeout=120)
@@ -191,6 +221,52 @@ async def rag_query(
         return {"error": str(e)}
 
 
+async def rag_query_stream(
+    question: str, **kwargs: Any
+) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """Stream a RAG query from ``/rag/query/stream`` (Server-Sent Events).
+
+    Takes the same arguments as :func:`rag_query`.
+
+    Yields:
+        ``(event, data)`` tuples: ``("meta", {...})``, ``("token", {"delta"})``
+        per answer chunk, then ``("done", {...})`` with the same payload as
+        ``rag_query`` — or ``("error", {"error"})`` on failure.
+    """
+    payload = _rag_query_payload(question, **kwargs)
+
+    try:
+        async with _get_client().stream(
+            "POST", "/rag/query/stream", json=payload, timeout=120,
+        ) as resp:
+            if resp.status_code != 200:
+                await resp.aread()
+                try:
+                    error = resp.json().get("error", f"HTTP {resp.status_code}")
+                except Exception:
+                    error = f"HTTP {resp.status_code}"
+                yield "error", {"error": error}
+                return
+
+            event = "message"
+            data_lines: list[str] = []
+            async for line in resp.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                elif line.startswith("data:"):
+                    data_lines.append(line[5:].strip())
+                elif not line and data_lines:
+                    yield event, json.loads("\n".join(data_lines))
+                    event = "message"
+                    data_lines = []
+    except httpx.ConnectError:
+        yield "error", {"error": "Connection error — is the API running?"}
+    except httpx.ReadTimeout:
+        yield "error", {"error": "Request timed out"}
+    except Exception as e:
+        yield "error", {"error": str(e)}
+
+
 # =========================================================================
 # FILTERS DATA
 # =========================================================================
@@ -10,6 +10,7 @@ import ast
 import json
 import logging
 import os
+import time
 from typing import Any
 
 import reflex as rx
@@ -31,6 +32,9 @@ _API_PUBLIC_URL = os.environ.get(
     os.environ.get("API_URL", "http://localhost:8765"),
 )
 
+# Min seconds between UI pushes while an answer is streaming in
+_STREAM_FLUSH_INTERVAL = 0.05
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -1732,7 +1736,7 @@ class AppState(rx.State):
     # =====================================================================
 
     async def send_message(self, form_data: dict | None = None):
-        """Send a user message and get an AI response."""
+        """Send a user message and stream the AI response as it is generated."""
         question = self.input_text.strip()
         if not question:
             return
@@ -1743,9 +1747,14 @@ class AppState(rx.State):
         self.is_loading = True
         yield  # Update UI
 
-        # Call RAG API
+        # Stream RAG API response — tokens are rendered as they arrive
         filters = self.active_filters
-        data = await api_client.rag_query(
+        data: dict[str, Any] = {}
+        answer_parts: list[str] = []
+        streaming_idx = -1
+        last_flush = 0.0
+
+        async for event, payload in api_client.rag_query_stream(
             question=question,
             conversation_id=self.conversation_id or None,
             k=10,
@@ -1757,12 +1766,34 @@ class AppState(rx.State):
             filter_date_to=self.filter_date_to or None,
             filter_content_types=self.selected_content_types or None,
             sort_order=self.sort_order,
-        )
+        ):
+            if event == "meta":
+                if payload.get("conversation_id"):
+                    self.conversation_id = payload["conversation_id"]
+            elif event == "token":
+                answer_parts.append(payload.get("delta", ""))
+                if streaming_idx < 0:
+                    # First token: swap the typing indicator for the answer
+                    self.is_loading = False
+                    self.messages.append(_empty_msg("assistant", ""))
+                    streaming_idx = len(self.messages) - 1
+                # Throttle UI updates to ~20/s to keep the websocket light
+                now = time.monotonic()
+                if now - last_flush >= _STREAM_FLUSH_INTERVAL:
+                    self.messages[streaming_idx]["content"] = "".join(answer_parts)
+                    last_flush = now
+                    yield
+            elif event in ("done", "error"):
+                data = payload if event == "done" else {"error": payload.get("error", "Unknown error")}
+                break
 
         self.is_loading = False
 
+        if not data:
+            data = {"error": "Stream ended unexpectedly"}
+
         if "error" in data:
-            self.messages.append(_empty_msg("assistant", f"❌ {data['error']}"))
+            msg = _empty_msg("assistant", f"❌ {data['error']}")
         else:
             raw_answer = data.get("answer", "No answer received")
             answer = _parse_answer(raw_answer)
@@ -1791,7 +1822,13 @@ class AppState(rx.State):
             msg["sources"] = sources_md
             msg["cost"] = cost_str
             msg.update(rich_fields)
+
+        # Replace the streamed draft with the final (post-processed) message
+        if streaming_idx >= 0:
+            self.messages[streaming_idx] = msg
+        else:
             self.messages.append(msg)
+        yield
 
         # Refresh sidebar conversations
         await self._refresh_conversations()